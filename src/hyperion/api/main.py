@@ -78,12 +78,12 @@ _quality_tracker = None
 
 
 def get_query_engine():
-    """Get or create RAG query engine."""
+    """Get or create RAG query engine (process-wide singleton)."""
     global _query_engine
     if _query_engine is None:
-        from hyperion.modules.rag.query import RAGQueryEngine
+        from hyperion.modules.rag.query import get_engine
 
-        _query_engine = RAGQueryEngine()
+        _query_engine = get_engine()
     return _query_engine
 
 
@@ -503,9 +503,9 @@ async def health_check_v2():
 
     # Test RAG
     try:
-        from hyperion.modules.rag.query import RAGQueryEngine
+        from hyperion.modules.rag.query import get_engine
 
-        _ = RAGQueryEngine()
+        _ = get_engine()
         status["rag"] = "ok"
     except Exception as e:
         status["rag"] = f"error: {str(e)}"
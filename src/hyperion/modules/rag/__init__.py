@@ -1,6 +1,6 @@
 """Module RAG Hyperion - Chat intelligent avec les repos."""
 
 from hyperion.modules.rag.ingestion import RAGIngester
-from hyperion.modules.rag.query import RAGQueryEngine
+from hyperion.modules.rag.query import RAGQueryEngine, get_engine
 
-__all__ = ["RAGIngester", "RAGQueryEngine"]
+__all__ = ["RAGIngester", "RAGQueryEngine", "get_engine"]
@@ -0,0 +1,188 @@
+"""Micro-batching des requêtes RAG (embeddings et recherche Qdrant)."""
+
+import asyncio
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Filter, QueryRequest, SearchParams
+
+
+class BatchedQuery:
+    """
+    Regroupe les recherches Qdrant concurrentes en un seul appel batch.
+
+    Les requêtes arrivant dans une fenêtre de ``max_wait_ms`` (ou jusqu'à
+    ``max_batch`` requêtes) partent ensemble via ``query_batch_points`` :
+    un seul aller-retour réseau, Qdrant répartit le travail sur ses segments.
+
+    La file et le worker sont liés à la boucle d'événements courante ; ils
+    sont recréés si l'appelant change de boucle (ex: aquery() lancé par des
+    asyncio.run successifs).
+    """
+
+    def __init__(
+        self,
+        qdrant_client: QdrantClient,
+        collection_name: str,
+        search_params: SearchParams | None = None,
+        max_batch: int = 16,
+        max_wait_ms: float = 5.0,
+        timeout: int = 1,
+    ):
+        self.qdrant_client = qdrant_client
+        self.collection_name = collection_name
+        self.search_params = search_params
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def search(
+        self,
+        embedding,
+        search_filter: Filter | None,
+        limit: int,
+        with_payload: bool | list[str] = True,
+    ) -> list:
+        """Ajoute une recherche au prochain batch et attend ses résultats."""
+        loop = asyncio.get_running_loop()
+        queue = self._ensure_worker(loop)
+        future = loop.create_future()
+        await queue.put((embedding, search_filter, limit, with_payload, future))
+        return await future
+
+    def _ensure_worker(self, loop: asyncio.AbstractEventLoop) -> asyncio.Queue:
+        """Démarre (ou redémarre) le worker pour la boucle courante."""
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def _run(self, queue: asyncio.Queue):
+        """Draine la file par fenêtres de max_wait / max_batch."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        """Envoie un batch à Qdrant et résout les futures associées."""
+        # QueryRequest est un modèle pydantic : il attend une liste de floats
+        requests = [
+            QueryRequest(
+                query=embedding.tolist(),
+                filter=search_filter,
+                limit=limit,
+                params=self.search_params,
+                with_payload=with_payload,
+                with_vector=False,
+            )
+            for embedding, search_filter, limit, with_payload, _ in batch
+        ]
+
+        try:
+            responses = await asyncio.to_thread(
+                self.qdrant_client.query_batch_points,
+                collection_name=self.collection_name,
+                requests=requests,
+                timeout=self.timeout,
+            )
+            if len(responses) != len(batch):
+                # Correspondance requête -> réponse incertaine : tout le batch échoue
+                raise RuntimeError(
+                    f"query_batch_points: {len(responses)} réponses pour {len(batch)} requêtes"
+                )
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (*_, future), response in zip(batch, responses, strict=True):
+            if not future.done():
+                future.set_result(response.points)
+
+
+class DynamicBatcher:
+    """
+    Regroupe les encodages d'embeddings concurrents en un seul appel.
+
+    Un thread worker draine jusqu'à ``max_batch`` questions toutes les
+    ``max_wait_ms`` et appelle ``encode_fn`` une seule fois sur la liste :
+    les kernels BERT sont bien plus efficaces par item en batch de 8 à 32
+    qu'en appels unitaires.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[list[str]], np.ndarray],
+        max_batch: int = 32,
+        max_wait_ms: float = 10.0,
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Ajoute un texte au prochain batch, retourne une future sur son embedding."""
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        """Encode un texte via le batch courant (bloquant)."""
+        return self.submit(text).result()
+
+    def _run(self):
+        """Boucle du worker : collecte une fenêtre puis encode en une fois."""
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                embeddings = self.encode_fn([text for text, _ in items])
+                if len(embeddings) != len(items):
+                    # Correspondance texte -> embedding incertaine : tout le batch échoue
+                    raise RuntimeError(
+                        f"encode_fn: {len(embeddings)} embeddings pour {len(items)} textes"
+                    )
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(items, embeddings, strict=True):
+                future.set_result(embedding)
@@ -10,6 +10,28 @@ from hyperion.settings import DATA_DIR
 
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+
+# Quantization des vecteurs stockés (en RAM) :
+# "binary" = 1 bit/dim + rescore (top_k=1), "scalar" = int8, "none" = désactivé
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "binary").lower()
+QDRANT_QUANTIZATION_OVERSAMPLING = float(
+    os.getenv(
+        "QDRANT_QUANTIZATION_OVERSAMPLING", "4.0" if QDRANT_QUANTIZATION == "binary" else "2.0"
+    )
+)
+
+# Recherche factice au démarrage pour charger HNSW + vecteurs quantifiés en RAM
+QDRANT_WARMUP = os.getenv("QDRANT_WARMUP", "true").lower() == "true"
+
+# Exploration HNSW à la requête (top_k=1 : un ef bas suffit)
+HNSW_EF_QUERY = int(os.getenv("HNSW_EF_QUERY", "32"))
+
+# Micro-batching des recherches concurrentes (aquery)
+QDRANT_ENABLE_BATCHING = os.getenv("QDRANT_ENABLE_BATCHING", "false").lower() == "true"
+QDRANT_BATCH_MAX_SIZE = int(os.getenv("QDRANT_BATCH_MAX_SIZE", "16"))
+QDRANT_BATCH_MAX_WAIT_MS = float(os.getenv("QDRANT_BATCH_MAX_WAIT_MS", "5"))
 QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "hyperion_repos")
 
 # ============================================================================
@@ -61,6 +83,11 @@ def get_optimal_device():
 EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", get_optimal_device())
 EMBEDDING_DIM = 1024  # Dimension BGE-large
 
+# Micro-batching des encodages concurrents (fenêtre de quelques ms)
+EMBEDDING_BATCHING = os.getenv("EMBEDDING_BATCHING", "false").lower() == "true"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "10"))
+
 # Chunk configuration
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "512"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
@@ -78,6 +105,18 @@ LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "128"))
 LLM_TOP_K = int(os.getenv("LLM_TOP_K", "1"))  # Un seul chunk pour vitesse ultime 2→1
 LLM_TIMEOUT = int(os.getenv("LLM_TIMEOUT", "2"))
 
+# Cache KV de préfixe Ollama : le modèle reste chargé (keep_alive) et num_ctx
+# doit rester constant entre appels pour que le préfixe du prompt soit réutilisé
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "2048"))
+
+# Pool de connexions HTTP keep-alive vers Ollama (réutilisation des sockets)
+OLLAMA_MAX_KEEPALIVE = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "16"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+
+# Requêtes concurrentes (RAGQueryEngine.aquery) : le débit côté Ollama dépend
+# de OLLAMA_NUM_PARALLEL, à régler sur le serveur Ollama (ex: 4), pas ici.
+
 # ============================================================================
 # Prompt Templates
 # ============================================================================
@@ -93,7 +132,10 @@ Règles :
 - Formate les réponses de manière lisible
 """
 
-QUERY_PROMPT_TEMPLATE = """{context}
+# Partie statique en tête : préfixe identique d'un appel à l'autre (cache KV),
+# seuls le contexte et la question varient en fin de prompt
+QUERY_PROMPT_TEMPLATE = SYSTEM_PROMPT + """
+{context}
 
 Q: {question}
 A:"""
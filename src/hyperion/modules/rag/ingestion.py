@@ -5,7 +5,17 @@ from pathlib import Path
 
 import yaml
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    HnswConfigDiff,
+    PointStruct,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
 from sentence_transformers import SentenceTransformer
 
 from hyperion.modules.rag.config import (
@@ -15,10 +25,31 @@ from hyperion.modules.rag.config import (
     QDRANT_COLLECTION,
     QDRANT_HOST,
     QDRANT_PORT,
+    QDRANT_QUANTIZATION,
     REPOS_DIR,
 )
 from hyperion.modules.understanding.code_extractor import CodeExtractor
 
+# Longueurs des aperçus stockés dans le payload (contexte LLM / source API)
+CONTEXT_PREVIEW_CHARS = 100
+SOURCE_PREVIEW_CHARS = 30
+
+
+def build_text_previews(text: str) -> dict[str, str]:
+    """
+    Pré-calcule les aperçus de texte utilisés par RAGQueryEngine.
+
+    Stockés dans le payload à l'ingestion pour éviter le découpage de chaînes
+    à chaque requête.
+    """
+    context_preview = text
+    if len(context_preview) > CONTEXT_PREVIEW_CHARS:
+        context_preview = context_preview[:CONTEXT_PREVIEW_CHARS] + "..."
+    return {
+        "text_preview_context": context_preview,
+        "text_preview_source": context_preview[:SOURCE_PREVIEW_CHARS] + "...",
+    }
+
 
 class RAGIngester:
     """
@@ -67,12 +98,25 @@ class RAGIngester:
             print(f"📦 Création collection : {self.collection_name}")
             self.qdrant_client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE),
+                # Vecteurs normalisés à l'encodage : DOT == cosinus, sans renormalisation
+                vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.DOT),
+                hnsw_config=HnswConfigDiff(on_disk=False),  # Graphe HNSW en RAM
+                quantization_config=self._quantization_config(),
             )
             print("✅ Collection créée")
         else:
             print(f"✅ Collection existante : {self.collection_name}")
 
+    def _quantization_config(self):
+        """Quantization des vecteurs selon QDRANT_QUANTIZATION (None si désactivée)."""
+        if QDRANT_QUANTIZATION == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        if QDRANT_QUANTIZATION == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+            )
+        return None
+
     def ingest_repo(self, repo_name: str) -> int:
         """
         Ingère un repo dans Qdrant.
@@ -115,7 +159,11 @@ class RAGIngester:
         texts = [c["text"] for c in chunks]
         print("   • Génération embeddings...")
         embeddings = self.embedding_model.encode(
-            texts, batch_size=32, show_progress_bar=True, convert_to_numpy=True
+            texts,
+            batch_size=32,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
         )
 
         # Créer points Qdrant
@@ -132,6 +180,7 @@ class RAGIngester:
                         "text": chunk["text"],
                         "section": chunk["section"],
                         "metadata": chunk["metadata"],
+                        **build_text_previews(chunk["text"]),
                     },
                 )
             )
@@ -1,27 +1,65 @@
 """Query engine pour RAG avec validation qualité intégrée."""
 
+import asyncio
+import logging
 import os
+import threading
 import time
+from collections.abc import Generator
+from functools import cached_property
 
+import httpx
+import numpy as np
 from langchain_ollama import OllamaLLM
+from ollama import AsyncClient, Client
 from qdrant_client import QdrantClient
-from qdrant_client.models import FieldCondition, Filter, MatchValue
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchValue,
+    QuantizationSearchParams,
+    SearchParams,
+)
 from sentence_transformers import SentenceTransformer
 
+from hyperion.modules.rag.batching import BatchedQuery, DynamicBatcher
 from hyperion.modules.rag.config import (
+    EMBEDDING_BATCH_MAX_WAIT_MS,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCHING,
     EMBEDDING_DEVICE,
+    EMBEDDING_DIM,
     EMBEDDING_MODEL,
+    HNSW_EF_QUERY,
     LLM_MAX_TOKENS,
     LLM_TEMPERATURE,
     LLM_TIMEOUT,
     LLM_TOP_K,
     OLLAMA_BASE_URL,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_KEEPALIVE_EXPIRY,
+    OLLAMA_MAX_KEEPALIVE,
     OLLAMA_MODEL,
+    OLLAMA_NUM_CTX,
+    QDRANT_BATCH_MAX_SIZE,
+    QDRANT_BATCH_MAX_WAIT_MS,
     QDRANT_COLLECTION,
+    QDRANT_ENABLE_BATCHING,
+    QDRANT_GRPC_PORT,
     QDRANT_HOST,
     QDRANT_PORT,
+    QDRANT_PREFER_GRPC,
+    QDRANT_QUANTIZATION,
+    QDRANT_QUANTIZATION_OVERSAMPLING,
+    QDRANT_WARMUP,
     QUERY_PROMPT_TEMPLATE,
 )
+from hyperion.modules.rag.ingestion import build_text_previews
+
+logger = logging.getLogger(__name__)
+
+# Champs du payload utilisés pour construire la réponse (voir _payload_fields)
+PAYLOAD_FIELDS = ["repo", "section", "text_preview_context", "text_preview_source"]
 
 # Import du système de validation qualité v2.8
 try:
@@ -29,7 +67,7 @@ try:
 
     VALIDATION_AVAILABLE = True
 except ImportError as e:
-    print(f"⚠️ Validation qualité non disponible: {e}")
+    logger.warning("Validation qualité non disponible: %s", e)
     VALIDATION_AVAILABLE = False
 
 
@@ -52,61 +90,558 @@ class RAGQueryEngine:
         collection_name: str = QDRANT_COLLECTION,
         ollama_base_url: str = OLLAMA_BASE_URL,
         ollama_model: str = OLLAMA_MODEL,
+        enable_batching: bool = QDRANT_ENABLE_BATCHING,
     ):
         """Initialise le query engine avec validation qualité v2.8."""
-        # Qdrant client
-        self.qdrant_client = QdrantClient(host=qdrant_host, port=qdrant_port)
+        # Qdrant client (gRPC si disponible, sinon HTTP)
+        self.qdrant_client = self._connect_qdrant(qdrant_host, qdrant_port)
         self.collection_name = collection_name
+        self._search_params = self._build_search_params()
+        self._filter_cache: dict[str, Filter] = {}  # Un filtre par repo (peu nombreux)
+
+        # Préchauffage des segments Qdrant en arrière-plan (évite les défauts de
+        # page sur les premières requêtes, qui ont un timeout strict de 1s)
+        if QDRANT_WARMUP:
+            threading.Thread(target=self._warmup_qdrant, name="qdrant-warmup", daemon=True).start()
+
+        # Micro-batching des recherches concurrentes (aquery uniquement)
+        self._batched_query = None
+        if enable_batching:
+            self._batched_query = BatchedQuery(
+                self.qdrant_client,
+                collection_name,
+                search_params=self._search_params,
+                max_batch=QDRANT_BATCH_MAX_SIZE,
+                max_wait_ms=QDRANT_BATCH_MAX_WAIT_MS,
+            )
+
+        # Micro-batching des encodages concurrents (optionnel)
+        self._embedding_batcher = None
+        if EMBEDDING_BATCHING:
+            self._embedding_batcher = DynamicBatcher(
+                self._encode_batch,
+                max_batch=EMBEDDING_BATCH_SIZE,
+                max_wait_ms=EMBEDDING_BATCH_MAX_WAIT_MS,
+            )
+
+        # LLM Ollama (connexion à la demande, sockets keep-alive réutilisées)
+        self._http_limits = httpx.Limits(
+            max_keepalive_connections=OLLAMA_MAX_KEEPALIVE,
+            keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+        )
 
-        # Modèle embeddings avec fallback automatique
-        print("📥 Chargement modèle embeddings...")
+        # Client Ollama async (créé à la demande, voir _get_async_llm_client)
+        self.ollama_base_url = ollama_base_url
+        self.ollama_model = ollama_model
+        self._async_llm_client: AsyncClient | None = None
+        self._async_llm_loop: asyncio.AbstractEventLoop | None = None
+
+        # Système de validation qualité v2.8
+        self.enable_validation = os.getenv("ENABLE_RESPONSE_VALIDATION", "true").lower() == "true"
+        self.validation_mode = os.getenv("VALIDATION_MODE", "flag")  # "flag" ou "reject"
+
+        if not VALIDATION_AVAILABLE:
+            logger.warning("Module validation qualité non disponible")
+        elif not self.enable_validation:
+            logger.info("Validation qualité désactivée (ENABLE_RESPONSE_VALIDATION=false)")
+
+    # ------------------------------------------------------------------
+    # Ressources lourdes chargées à la demande (démarrage à froid rapide)
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def embedding_model(self) -> SentenceTransformer:
+        """Modèle embeddings, chargé au premier usage avec fallback automatique."""
+        logger.info("Chargement modèle embeddings %s...", EMBEDDING_MODEL)
         try:
-            self.embedding_model = SentenceTransformer(EMBEDDING_MODEL, device=EMBEDDING_DEVICE)
-            print(f"✅ Embeddings prêts ({EMBEDDING_DEVICE})")
+            model = SentenceTransformer(EMBEDDING_MODEL, device=EMBEDDING_DEVICE)
+            logger.info("Embeddings prêts (%s)", EMBEDDING_DEVICE)
         except Exception as e:
             if EMBEDDING_DEVICE == "cuda":
-                print(f"⚠️ Erreur GPU embeddings: {e}")
-                print("🔄 Fallback automatique vers CPU...")
-                self.embedding_model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
-                print("✅ Embeddings prêts (cpu - fallback)")
+                logger.warning("Erreur GPU embeddings: %s, fallback automatique vers CPU", e)
+                model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+                logger.info("Embeddings prêts (cpu - fallback)")
             else:
                 raise
-
-        # LLM Ollama (optimisé)
-        print(f"🤖 Connexion à Ollama ({ollama_model})...")
-        self.llm = OllamaLLM(
-            base_url=ollama_base_url,
-            model=ollama_model,
+        return model
+
+    @cached_property
+    def llm(self) -> OllamaLLM:
+        """Client LLM Ollama (langchain), créé au premier usage."""
+        logger.info("Connexion à Ollama (%s)...", self.ollama_model)
+        llm = OllamaLLM(
+            base_url=self.ollama_base_url,
+            model=self.ollama_model,
             temperature=LLM_TEMPERATURE,
             num_predict=LLM_MAX_TOKENS,
             timeout=LLM_TIMEOUT,  # Timeout pour éviter attentes longues
+            keep_alive=OLLAMA_KEEP_ALIVE,  # Modèle gardé chargé (cache KV de préfixe)
+            num_ctx=OLLAMA_NUM_CTX,
+            client_kwargs={"limits": self._http_limits},
         )
-        print("✅ LLM prêt")
+        logger.info("LLM prêt")
+        return llm
 
-        # Système de validation qualité v2.8
-        self.enable_validation = os.getenv("ENABLE_RESPONSE_VALIDATION", "true").lower() == "true"
-        self.validation_mode = os.getenv("VALIDATION_MODE", "flag")  # "flag" ou "reject"
+    @cached_property
+    def _llm_client(self) -> Client:
+        """Client Ollama synchrone de query(), partagé (sockets keep-alive réutilisées)."""
+        return Client(host=self.ollama_base_url, timeout=LLM_TIMEOUT, limits=self._http_limits)
 
-        if self.enable_validation and VALIDATION_AVAILABLE:
-            print("🔍 Initialisation validation qualité v2.8...")
+    @cached_property
+    def response_validator(self) -> "ResponseValidator | None":
+        """Validateur qualité v2.8 (partage le modèle embeddings), créé au premier usage."""
+        if not (self.enable_validation and VALIDATION_AVAILABLE):
+            return None
+
+        logger.info("Initialisation validation qualité v2.8...")
+        try:
+            validator = ResponseValidator(self.embedding_model)
+            logger.info("Validation qualité prête")
+            return validator
+        except Exception as e:
+            logger.warning("Erreur init validation: %s", e)
+            self.enable_validation = False
+            return None
+
+    def _connect_qdrant(self, qdrant_host: str, qdrant_port: int) -> QdrantClient:
+        """
+        Connecte Qdrant en gRPC (protobuf, RTT plus faible) avec fallback HTTP.
+
+        Le client gRPC est paresseux : un appel get_collections() vérifie que
+        le port gRPC répond avant de l'adopter.
+        """
+        if QDRANT_PREFER_GRPC:
             try:
-                self.response_validator = ResponseValidator(self.embedding_model)
-                print("✅ Validation qualité prête")
+                client = QdrantClient(
+                    host=qdrant_host,
+                    port=qdrant_port,
+                    grpc_port=QDRANT_GRPC_PORT,
+                    prefer_grpc=True,
+                    timeout=5,
+                )
+                client.get_collections()
+                return client
             except Exception as e:
-                print(f"⚠️ Erreur init validation: {e}")
-                self.enable_validation = False
-                self.response_validator = None
-        else:
-            if not VALIDATION_AVAILABLE:
-                print("⚠️ Module validation qualité non disponible")
+                logger.warning("Qdrant gRPC indisponible (%s), fallback HTTP", e)
+        return QdrantClient(host=qdrant_host, port=qdrant_port)
+
+    def _warmup_qdrant(self) -> None:
+        """Recherche factice forçant le chargement de l'index HNSW en RAM."""
+        probe = np.full(EMBEDDING_DIM, EMBEDDING_DIM**-0.5, dtype=np.float32)
+        try:
+            self.qdrant_client.query_points(
+                collection_name=self.collection_name,
+                query=probe,
+                limit=1,
+                search_params=self._search_params,
+                with_payload=False,
+                with_vectors=False,
+                timeout=10,
+            )
+        except Exception as e:
+            logger.warning("Préchauffage Qdrant impossible: %s", e)
+
+    def _build_search_params(self) -> SearchParams:
+        """Paramètres de recherche : ef HNSW réduit + rescore sur vecteurs quantifiés."""
+        quantization = None
+        if QDRANT_QUANTIZATION != "none":
+            quantization = QuantizationSearchParams(
+                rescore=True, oversampling=QDRANT_QUANTIZATION_OVERSAMPLING
+            )
+        return SearchParams(hnsw_ef=HNSW_EF_QUERY, exact=False, quantization=quantization)
+
+    # ------------------------------------------------------------------
+    # Étapes du pipeline (partagées entre query() et aquery())
+    # ------------------------------------------------------------------
+
+    def _encode_batch(self, questions: list[str]) -> np.ndarray:
+        """Encode un batch de questions (utilisé par le DynamicBatcher)."""
+        return self.embedding_model.encode(
+            questions,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
+
+    def _embed(self, question: str) -> np.ndarray:
+        """
+        Génère l'embedding de la question.
+
+        Vecteur float32 normalisé une fois ici (la collection utilise la
+        distance DOT, équivalente au cosinus) puis envoyé tel quel à Qdrant.
+        """
+        if self._embedding_batcher:
+            return self._embedding_batcher.encode(question)
+        return self.embedding_model.encode(
+            question,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,  # Désactiver pour vitesse
+        ).astype(np.float32, copy=False)
+
+    def _build_filter(self, repo_filter: str | None) -> Filter | None:
+        """Construit (ou réutilise) le filtre Qdrant sur le repo (optionnel)."""
+        if not repo_filter:
+            return None
+        search_filter = self._filter_cache.get(repo_filter)
+        if search_filter is None:
+            search_filter = Filter(
+                must=[FieldCondition(key="repo", match=MatchValue(value=repo_filter))]
+            )
+            self._filter_cache[repo_filter] = search_filter
+        return search_filter
+
+    def _payload_fields(self) -> list[str]:
+        """
+        Champs du payload à rapatrier de Qdrant.
+
+        Le texte complet (potentiellement volumineux) n'est demandé que si la
+        validation qualité en a besoin ; les points sans aperçus pré-calculés
+        sont complétés ensuite par _fetch_text.
+        """
+        if self.enable_validation and VALIDATION_AVAILABLE:
+            return PAYLOAD_FIELDS + ["text"]
+        return PAYLOAD_FIELDS
+
+    def _search(
+        self, question_embedding: np.ndarray, search_filter: Filter | None, top_k: int
+    ) -> list:
+        """Recherche les chunks les plus proches dans Qdrant."""
+        return self.qdrant_client.query_points(
+            collection_name=self.collection_name,
+            query=question_embedding,  # ndarray sérialisé directement (protobuf)
+            limit=min(top_k, 1),  # Un seul chunk pour vitesse maximum
+            query_filter=search_filter,
+            search_params=self._search_params,
+            with_payload=self._payload_fields(),
+            with_vectors=False,
+            timeout=1,  # Timeout Qdrant strict
+        ).points
+
+    @staticmethod
+    def _results_missing_text(search_results: list) -> list:
+        """Points indexés avant les aperçus pré-calculés, rapatriés sans leur texte."""
+        return [
+            result
+            for result in search_results
+            if "text_preview_context" not in result.payload and "text" not in result.payload
+        ]
+
+    def _fetch_text(self, results: list) -> None:
+        """
+        Relit le texte des anciens points pour en calculer les aperçus.
+
+        Sans validation, "text" n'est pas demandé à la recherche (voir
+        _payload_fields) : seuls les points sans text_preview_* paient cet
+        aller-retour supplémentaire.
+        """
+        records = self.qdrant_client.retrieve(
+            collection_name=self.collection_name,
+            ids=[result.id for result in results],
+            with_payload=["text"],
+            with_vectors=False,
+        )
+        texts = {record.id: record.payload.get("text", "") for record in records}
+        for result in results:
+            result.payload["text"] = texts.get(result.id, "")
+
+    def _assemble_context(self, search_results: list) -> tuple[str, list, list, list]:
+        """Assemble contexte, chunks complets, sources et scores."""
+        context_parts = []
+        full_context_chunks = []  # Chunks complets pour validation qualité
+        sources = []
+        source_scores = []
+
+        for result in search_results:
+            payload = result.payload
+
+            # Texte complet pour validation qualité
+            full_context_chunks.append(payload.get("text", ""))
+            source_scores.append(result.score)
+
+            # Aperçus pré-calculés à l'ingestion (recalculés pour les anciens points)
+            if "text_preview_context" not in payload:
+                payload = {**payload, **build_text_previews(payload.get("text", ""))}
+
+            context_parts.append(payload["text_preview_context"])
+            sources.append(
+                {
+                    "repo": payload["repo"],
+                    "section": payload["section"],
+                    "score": result.score,
+                    "text": payload["text_preview_source"],
+                }
+            )
+
+        context = "\n\n---\n\n".join(context_parts)
+        return context, full_context_chunks, sources, source_scores
+
+    def _get_async_llm_client(self) -> AsyncClient:
+        """
+        Retourne le client Ollama async lié à la boucle courante.
+
+        Les connexions httpx sont attachées à une boucle d'événements : le
+        client est recréé si aquery() est appelé depuis une nouvelle boucle.
+        query() n'en crée jamais (client synchrone, voir _llm_client).
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_llm_client is None or self._async_llm_loop is not loop:
+            self._async_llm_client = AsyncClient(
+                host=self.ollama_base_url, timeout=LLM_TIMEOUT, limits=self._http_limits
+            )
+            self._async_llm_loop = loop
+        return self._async_llm_client
+
+    def _generate_kwargs(self, prompt: str) -> dict:
+        """Paramètres de génération Ollama communs aux clients sync et async."""
+        return {
+            "model": self.ollama_model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {
+                "temperature": LLM_TEMPERATURE,
+                "num_predict": LLM_MAX_TOKENS,
+                "num_ctx": OLLAMA_NUM_CTX,
+            },
+        }
+
+    def _generate(self, prompt: str) -> str:
+        """Appelle le LLM Ollama (client synchrone partagé)."""
+        response = self._llm_client.generate(**self._generate_kwargs(prompt))
+        return response["response"].strip()
+
+    async def _agenerate(self, prompt: str) -> str:
+        """Appelle le LLM Ollama de manière asynchrone."""
+        response = await self._get_async_llm_client().generate(**self._generate_kwargs(prompt))
+        return response["response"].strip()
+
+    def _build_response(
+        self,
+        answer: str,
+        question: str,
+        repo_filter: str | None,
+        sources: list,
+        full_context_chunks: list,
+        source_scores: list,
+        processing_time: float,
+    ) -> dict:
+        """Valide la réponse (v2.8) et construit le dict final."""
+        # 6. Validation qualité v2.8
+        validation_result = None
+        if self.enable_validation and self.response_validator:
+            try:
+                validation_result = self.response_validator.validate_response(
+                    answer=answer,
+                    question=question,
+                    context_chunks=full_context_chunks,
+                    source_scores=source_scores,
+                    processing_time=processing_time,
+                )
+
+                # Traitement selon mode validation
+                if validation_result["action"] == "reject" and self.validation_mode == "reject":
+                    original_answer = answer
+                    answer = "Je ne peux pas répondre avec certitude basée sur les sources disponibles. Veuillez reformuler votre question ou être plus spécifique."
+                    validation_result["original_answer"] = original_answer
+                    validation_result["answer_modified"] = True
+
+            except Exception as validation_error:
+                logger.warning("Erreur validation qualité: %s", validation_error)
+                # Continue sans validation en cas d'erreur
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Requête RAG traitée en %.2fs (%d sources, repo=%s)",
+                processing_time,
+                len(sources),
+                repo_filter,
+            )
+
+        # 7. Construire réponse finale
+        response = {
+            "answer": answer,
+            "sources": sources,
+            "question": question,
+            "repo_filter": repo_filter,
+            "processing_time": round(processing_time, 2),
+            "performance": "fast" if processing_time < 3.0 else "slow",
+        }
+
+        # Ajouter métadonnées qualité si validation activée
+        if validation_result:
+            response["quality"] = {
+                "confidence": validation_result["confidence"],
+                "grade": validation_result["quality_grade"],
+                "action": validation_result["action"],
+                "should_flag": validation_result["should_flag"],
+                "hallucination_detected": validation_result["hallucination_analysis"][
+                    "is_hallucination"
+                ],
+                "hallucination_severity": validation_result["hallucination_analysis"]["severity"],
+                "recommendations": validation_result["recommendations"][:3],  # Limiter pour API
+                "validation_time": validation_result["validation_metadata"]["validation_time"],
+                "answer_modified": validation_result.get("answer_modified", False),
+            }
+
+        return response
+
+    def _error_response(
+        self, error: Exception, question: str, repo_filter: str | None, start_time: float
+    ) -> dict:
+        """Réponse d'erreur homogène."""
+        processing_time = time.time() - start_time
+        return {
+            "answer": f"Erreur lors du traitement de la question: {str(error)}",
+            "sources": [],
+            "question": question,
+            "repo_filter": repo_filter,
+            "processing_time": round(processing_time, 2),
+            "performance": "error",
+        }
+
+    # ------------------------------------------------------------------
+    # API publique
+    # ------------------------------------------------------------------
+
+    async def aquery(
+        self, question: str, repo_filter: str | None = None, top_k: int = LLM_TOP_K
+    ) -> dict:
+        """
+        Version asynchrone de query().
+
+        L'embedding (CPU/GPU) et la recherche Qdrant tournent dans des threads
+        pour ne pas bloquer la boucle, et l'appel LLM passe par
+        ``ollama.AsyncClient``. Plusieurs sessions concurrentes se recouvrent
+        donc côté Ollama (voir ``OLLAMA_NUM_PARALLEL`` dans config.py).
+
+        Args:
+            question: Question en langage naturel
+            repo_filter: Filtrer sur un repo spécifique (optionnel)
+            top_k: Nombre de chunks à récupérer
+
+        Returns:
+            Même format que query()
+        """
+        start_time = time.time()
+
+        try:
+            # 1. Embedding en thread, filtre construit pendant ce temps
+            embedding_task = asyncio.create_task(asyncio.to_thread(self._embed, question))
+            search_filter = self._build_filter(repo_filter)
+            question_embedding = await embedding_task
+
+            # 2. Recherche dans Qdrant (batchée avec les requêtes concurrentes si activé)
+            if self._batched_query:
+                search_results = await self._batched_query.search(
+                    question_embedding,
+                    search_filter,
+                    min(top_k, 1),
+                    with_payload=self._payload_fields(),
+                )
             else:
-                print("ℹ️ Validation qualité désactivée (ENABLE_RESPONSE_VALIDATION=false)")
-            self.response_validator = None
+                search_results = await asyncio.to_thread(
+                    self._search, question_embedding, search_filter, top_k
+                )
+
+            legacy_results = self._results_missing_text(search_results)
+            if legacy_results:
+                await asyncio.to_thread(self._fetch_text, legacy_results)
+
+            # 3. Assembler contexte
+            context, full_context_chunks, sources, source_scores = self._assemble_context(
+                search_results
+            )
+
+            # 4. Construire prompt
+            full_prompt = QUERY_PROMPT_TEMPLATE.format(context=context, question=question)
+
+            # 5. Appeler LLM (async)
+            answer = await self._agenerate(full_prompt)
+
+            processing_time = time.time() - start_time
+            return self._build_response(
+                answer,
+                question,
+                repo_filter,
+                sources,
+                full_context_chunks,
+                source_scores,
+                processing_time,
+            )
+
+        except Exception as e:
+            return self._error_response(e, question, repo_filter, start_time)
+
+    def query_stream(
+        self, question: str, repo_filter: str | None = None, top_k: int = LLM_TOP_K
+    ) -> Generator[str, None, dict]:
+        """
+        Répond à une question en streamant la réponse du LLM token par token.
+
+        Les étapes 1 à 4 sont identiques à query() ; les morceaux de réponse
+        sont ensuite émis dès qu'Ollama les produit (TTFT minimal pour un chat).
+        La réponse complète (sources, qualité...) est la valeur de retour du
+        générateur, récupérable via ``result = yield from engine.query_stream(...)``.
+
+        Args:
+            question: Question en langage naturel
+            repo_filter: Filtrer sur un repo spécifique (optionnel)
+            top_k: Nombre de chunks à récupérer
+
+        Yields:
+            Morceaux de la réponse au fil de la génération
+
+        Returns:
+            Même format que query()
+        """
+        start_time = time.time()
+
+        try:
+            # 1-2. Embedding + recherche Qdrant
+            question_embedding = self._embed(question)
+            search_results = self._search(
+                question_embedding, self._build_filter(repo_filter), top_k
+            )
+            legacy_results = self._results_missing_text(search_results)
+            if legacy_results:
+                self._fetch_text(legacy_results)
+
+            # 3-4. Contexte + prompt
+            context, full_context_chunks, sources, source_scores = self._assemble_context(
+                search_results
+            )
+            full_prompt = QUERY_PROMPT_TEMPLATE.format(context=context, question=question)
+
+            # 5. Streaming LLM (réponse accumulée pour validation)
+            answer_parts = []
+            for chunk in self.llm.stream(full_prompt):
+                answer_parts.append(chunk)
+                yield chunk
+
+            processing_time = time.time() - start_time
+            return self._build_response(
+                "".join(answer_parts).strip(),
+                question,
+                repo_filter,
+                sources,
+                full_context_chunks,
+                source_scores,
+                processing_time,
+            )
+
+        except Exception as e:
+            return self._error_response(e, question, repo_filter, start_time)
 
     def query(self, question: str, repo_filter: str | None = None, top_k: int = LLM_TOP_K) -> dict:
         """
         Répond à une question via RAG avec validation qualité v2.8.
 
+        Version synchrone de aquery() : mêmes étapes, sans boucle d'événements,
+        avec le client Ollama synchrone partagé (connexions réutilisées d'un
+        appel à l'autre).
+
         Args:
             question: Question en langage naturel
             repo_filter: Filtrer sur un repo spécifique (optionnel)
@@ -124,130 +659,53 @@ class RAGQueryEngine:
         start_time = time.time()
 
         try:
-            # 1. Générer embedding de la question (optimisé)
-            question_embedding = self.embedding_model.encode(
-                question,
-                convert_to_numpy=True,
-                show_progress_bar=False,  # Désactiver pour vitesse
+            # 1-2. Embedding + recherche Qdrant
+            question_embedding = self._embed(question)
+            search_results = self._search(
+                question_embedding, self._build_filter(repo_filter), top_k
             )
+            legacy_results = self._results_missing_text(search_results)
+            if legacy_results:
+                self._fetch_text(legacy_results)
 
-            # 2. Recherche dans Qdrant (ultra-optimisé)
-            search_filter = None
-            if repo_filter:
-                search_filter = Filter(
-                    must=[FieldCondition(key="repo", match=MatchValue(value=repo_filter))]
-                )
-
-            search_results = self.qdrant_client.query_points(
-                collection_name=self.collection_name,
-                query=question_embedding.tolist(),
-                limit=min(top_k, 1),  # Un seul chunk pour vitesse maximum
-                query_filter=search_filter,
-                timeout=1,  # Timeout Qdrant strict
-            ).points
-
-            # 3. Assembler contexte (optimisé, texte réduit)
-            context_parts = []
-            full_context_chunks = []  # Chunks complets pour validation qualité
-            sources = []
-            source_scores = []
-
-            for result in search_results:
-                payload = result.payload
-
-                # Texte complet pour validation qualité
-                full_text = payload["text"]
-                full_context_chunks.append(full_text)
-                source_scores.append(result.score)
-
-                # Ultra-limitation pour vitesse maximale (comme avant)
-                display_text = full_text
-                if len(display_text) > 100:  # Extrême réduction 200→100
-                    display_text = display_text[:100] + "..."
-
-                context_parts.append(display_text)
-                sources.append(
-                    {
-                        "repo": payload["repo"],
-                        "section": payload["section"],
-                        "score": result.score,
-                        "text": display_text[:30] + "...",  # Preview ultra réduit 50→30
-                    }
-                )
-
-            context = "\n\n---\n\n".join(context_parts)
-
-            # 4. Construire prompt (optimisé)
+            # 3-4. Contexte + prompt
+            context, full_context_chunks, sources, source_scores = self._assemble_context(
+                search_results
+            )
             full_prompt = QUERY_PROMPT_TEMPLATE.format(context=context, question=question)
 
-            # 5. Appeler LLM avec timeout
-            answer = self.llm.invoke(full_prompt).strip()
+            # 5. Appeler LLM
+            answer = self._generate(full_prompt)
 
             processing_time = time.time() - start_time
+            return self._build_response(
+                answer,
+                question,
+                repo_filter,
+                sources,
+                full_context_chunks,
+                source_scores,
+                processing_time,
+            )
 
-            # 6. NOUVEAU: Validation qualité v2.8
-            validation_result = None
-            if self.enable_validation and self.response_validator:
-                try:
-                    validation_result = self.response_validator.validate_response(
-                        answer=answer,
-                        question=question,
-                        context_chunks=full_context_chunks,
-                        source_scores=source_scores,
-                        processing_time=processing_time,
-                    )
-
-                    # Traitement selon mode validation
-                    if validation_result["action"] == "reject" and self.validation_mode == "reject":
-                        original_answer = answer
-                        answer = "Je ne peux pas répondre avec certitude basée sur les sources disponibles. Veuillez reformuler votre question ou être plus spécifique."
-                        validation_result["original_answer"] = original_answer
-                        validation_result["answer_modified"] = True
-
-                except Exception as validation_error:
-                    print(f"⚠️ Erreur validation qualité: {validation_error}")
-                    # Continue sans validation en cas d'erreur
-
-            # 7. Construire réponse finale
-            response = {
-                "answer": answer,
-                "sources": sources,
-                "question": question,
-                "repo_filter": repo_filter,
-                "processing_time": round(processing_time, 2),
-                "performance": "fast" if processing_time < 3.0 else "slow",
-            }
-
-            # Ajouter métadonnées qualité si validation activée
-            if validation_result:
-                response["quality"] = {
-                    "confidence": validation_result["confidence"],
-                    "grade": validation_result["quality_grade"],
-                    "action": validation_result["action"],
-                    "should_flag": validation_result["should_flag"],
-                    "hallucination_detected": validation_result["hallucination_analysis"][
-                        "is_hallucination"
-                    ],
-                    "hallucination_severity": validation_result["hallucination_analysis"][
-                        "severity"
-                    ],
-                    "recommendations": validation_result["recommendations"][:3],  # Limiter pour API
-                    "validation_time": validation_result["validation_metadata"]["validation_time"],
-                    "answer_modified": validation_result.get("answer_modified", False),
-                }
+        except Exception as e:
+            return self._error_response(e, question, repo_filter, start_time)
 
-            return response
+    def warmup(self) -> None:
+        """
+        Précharge les ressources lourdes avant la première vraie requête.
 
+        Charge le modèle embeddings (et ses kernels) via un encodage factice,
+        puis demande à Ollama de charger le modèle en mémoire (prompt vide,
+        maintenu chargé par keep_alive).
+        """
+        self._embed("warmup")
+        try:
+            self._llm_client.generate(
+                model=self.ollama_model, prompt="", keep_alive=OLLAMA_KEEP_ALIVE
+            )
         except Exception as e:
-            processing_time = time.time() - start_time
-            return {
-                "answer": f"Erreur lors du traitement de la question: {str(e)}",
-                "sources": [],
-                "question": question,
-                "repo_filter": repo_filter,
-                "processing_time": round(processing_time, 2),
-                "performance": "error",
-            }
+            logger.warning("Préchargement Ollama impossible: %s", e)
 
     def chat(
         self, question: str, repo: str | None = None, history: list[dict] | None = None
@@ -277,3 +735,26 @@ class RAGQueryEngine:
         result["history"] = history
 
         return result
+
+
+# ============================================================================
+# Instance partagée (process-wide)
+# ============================================================================
+
+_ENGINE: RAGQueryEngine | None = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine(**kwargs) -> RAGQueryEngine:
+    """
+    Retourne le RAGQueryEngine partagé par tout le process.
+
+    Évite de recharger le modèle embeddings et de reconnecter Qdrant/Ollama à
+    chaque handler. Les kwargs ne sont utilisés qu'à la première création.
+    """
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = RAGQueryEngine(**kwargs)
+    return _ENGINE
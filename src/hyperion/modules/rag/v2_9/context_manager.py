@@ -4,28 +4,347 @@ Context Manager for Hyperion v2.9
 Gestion intelligente du contexte avec mémoire et personalisation.
 """
 
+import copy
+import heapq
 import logging
+import math
+import pickle
+import re
+import sys
+import threading
 import time
-from collections import deque
+from array import array
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from itertools import chain, islice
+from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# ============================================================================
+# Tables de mots-clés (construites une seule fois au chargement du module)
+# ============================================================================
+
+
+def _interned(table: dict[str, list[str]]) -> dict[str, list[str]]:
+    """Interne labels et mots-clés : vocabulaire fermé partagé par toutes les sessions."""
+    return {
+        sys.intern(label): [sys.intern(word) for word in words] for label, words in table.items()
+    }
+
+
+DETAIL_KEYWORDS = _interned(
+    {
+        "detailed": ["detail", "explain", "how exactly", "step by step"],
+        "brief": ["quick", "brief", "summary", "tldr"],
+    }
+)
+
+EXAMPLE_REQUEST_KEYWORDS = [sys.intern(word) for word in ("example", "show me", "demonstrate")]
+
+TECHNICAL_DOMAINS = _interned(
+    {
+        "backend": ["api", "server", "database", "backend"],
+        "frontend": ["ui", "frontend", "interface", "component"],
+        "devops": ["docker", "deploy", "infrastructure", "ci/cd"],
+        "security": ["auth", "security", "permission", "vulnerability"],
+        "testing": ["test", "testing", "unittest", "coverage"],
+    }
+)
+
+TECH_TOPICS = _interned(
+    {
+        "authentication": ["auth", "login", "token", "session"],
+        "database": ["db", "database", "query", "sql"],
+        "api": ["api", "endpoint", "request", "response"],
+        "testing": ["test", "testing", "unittest", "mock"],
+        "error_handling": ["error", "exception", "try", "catch"],
+    }
+)
+
+INTENT_PATTERNS = _interned(
+    {
+        "learn": ["learn", "understand", "explain", "what is"],
+        "troubleshoot": ["error", "problem", "issue", "bug", "not working"],
+        "implement": ["how to", "implement", "create", "build"],
+        "optimize": ["optimize", "improve", "performance", "faster"],
+        "compare": ["compare", "difference", "vs", "versus", "better"],
+        "find": ["find", "search", "locate", "where"],
+    }
+)
+
+TOPIC_KEYWORDS = _interned(
+    {
+        "auth": ["auth", "login", "token"],
+        "api": ["api", "endpoint", "request"],
+        "database": ["db", "database", "query"],
+        "testing": ["test", "testing", "unittest"],
+        "deployment": ["deploy", "docker", "build"],
+    }
+)
+
+RESPONSE_STYLE_KEYWORDS = _interned(
+    {
+        "example_based": ["example", "for instance", "e.g."],
+        "step_by_step": ["step", "first", "then", "finally"],
+        "explanatory": ["because", "since", "therefore"],
+    }
+)
+
+REFERENCE_KEYWORDS = _interned(
+    {
+        "temporal": ["that", "this", "it", "same"],
+        "continuation": ["also", "additionally", "moreover"],
+        "contrast": ["but", "however", "instead"],
+    }
+)
+
+
+# Bit de chaque domaine technique (appartenance des intérêts en une opération)
+DOMAIN_BITS = {domain: 1 << bit for bit, domain in enumerate(TECHNICAL_DOMAINS)}
+
+# Identifiants entiers des topics techniques (comptage vectorisé des stats)
+TECH_TOPIC_IDS = {topic: topic_id for topic_id, topic in enumerate(TECH_TOPICS)}
+TECH_TOPIC_NAMES = list(TECH_TOPICS)
+
+# Catégories scannées en une passe : catégorie -> (table, mots entiers ?)
+KEYWORD_CATEGORIES: dict[str, tuple[dict[str, list[str]], bool]] = {
+    "detail": (DETAIL_KEYWORDS, False),
+    "example_request": ({"example_heavy": EXAMPLE_REQUEST_KEYWORDS}, False),
+    "domain": (TECHNICAL_DOMAINS, False),
+    "tech_topic": (TECH_TOPICS, False),
+    "intent": (INTENT_PATTERNS, False),
+    "topic": (TOPIC_KEYWORDS, False),
+    "style": (RESPONSE_STYLE_KEYWORDS, True),
+    "reference": (REFERENCE_KEYWORDS, True),
+}
+
+try:
+    import ahocorasick
+
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import hyperscan
+
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import lz4.frame
+
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Historique de profil gardé en mémoire ; au-delà, les plus anciens partent sur disque
+PROFILE_HISTORY_MAX = 200
+PROFILE_SPILL_BATCH = 100
+
+# Taille minimale d'une réponse froide avant compression LZ4
+COLD_TEXT_MIN_CHARS = 512
+
+# Decay exponentiel par tour des scores de topics (ConvoCache) et seuil d'oubli
+TOPIC_SCORE_DECAY = math.exp(-0.5)
+TOPIC_SCORE_MIN = 0.01
+
+
+def _keyword_re(keywords: list[str], whole_word: bool = False) -> re.Pattern:
+    """
+    Compile une liste de mots-clés en une seule alternation.
+
+    Les mots-clés techniques sont des radicaux ("auth", "test") ancrés en
+    début de mot ; les mots outils ("it", "but") doivent être des mots entiers.
+    """
+    alternation = "|".join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+    return re.compile(rf"\b(?:{alternation})" + (r"(?!\w)" if whole_word else ""))
+
+
+def _is_word_char(char: str) -> bool:
+    """Équivalent de ``\\w`` pour un caractère."""
+    return char.isalnum() or char == "_"
+
+
+def _utf8_char_before(data: bytes, offset: int) -> str:
+    """Caractère UTF-8 se terminant juste avant ``offset`` (offset > 0)."""
+    start = offset - 1
+    while start > 0 and 0x80 <= data[start] < 0xC0:
+        start -= 1
+    return data[start:offset].decode("utf-8", "replace")
+
+
+def _utf8_char_at(data: bytes, offset: int) -> str:
+    """Caractère UTF-8 commençant à ``offset`` (offset < len(data))."""
+    end = offset + 1
+    while end < len(data) and 0x80 <= data[end] < 0xC0:
+        end += 1
+    return data[offset:end].decode("utf-8", "replace")
+
+
+class KeywordScanner:
+    """
+    Scan multi-catégories des mots-clés en une seule passe sur le texte.
+
+    Avec Hyperscan (serveurs multi-sessions), une base de littéraux compilée
+    une fois est scannée par un DFA vectorisé SIMD. Sinon, avec
+    pyahocorasick, un automate unique couvre tous les mots-clés de toutes
+    les catégories : O(|texte| + matches) quel que soit le nombre de
+    mots-clés. Sans ces librairies, repli sur une regex compilée par label.
+    Tous les chemins appliquent les mêmes frontières de mots.
+    """
+
+    def __init__(self, categories: dict[str, tuple[dict[str, list[str]], bool]]):
+        self.categories = categories
+        self._hs_db = None
+        self._hs_entries: list[tuple[int, list[tuple[str, str, bool]]]] = []
+        self._hs_local = threading.local()  # Scratch Hyperscan : un par thread
+        self._automaton = None
+        self._patterns: dict[str, dict[str, re.Pattern]] = {}
+
+        entries: dict[str, list[tuple[str, str, bool]]] = {}
+        for category, (table, whole_word) in categories.items():
+            for label, keywords in table.items():
+                for keyword in keywords:
+                    entries.setdefault(keyword, []).append((category, label, whole_word))
+
+        if HYPERSCAN_AVAILABLE:
+            expressions = [keyword.encode("utf-8") for keyword in entries]
+            self._hs_entries = [
+                (len(expression), targets)
+                for expression, targets in zip(expressions, entries.values(), strict=True)
+            ]
+            self._hs_db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            self._hs_db.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                literal=True,
+            )
+        elif AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword, targets in entries.items():
+                self._automaton.add_word(keyword, (len(keyword), targets))
+            self._automaton.make_automaton()
+        else:
+            self._patterns = {
+                category: {
+                    label: _keyword_re(keywords, whole_word) for label, keywords in table.items()
+                }
+                for category, (table, whole_word) in categories.items()
+            }
+
+    def scan(self, text_lower: str) -> dict[str, set[str]]:
+        """Retourne {catégorie: {labels trouvés}} pour un texte en minuscules."""
+        hits: dict[str, set[str]] = defaultdict(set)
+
+        if self._hs_db is not None:
+            return self._scan_hyperscan(text_lower, hits)
+
+        if self._automaton is None:
+            for category, patterns in self._patterns.items():
+                for label, pattern in patterns.items():
+                    if pattern.search(text_lower):
+                        hits[category].add(label)
+            return hits
+
+        text_len = len(text_lower)
+        for end, (length, targets) in self._automaton.iter(text_lower):
+            start = end - length + 1
+            if start > 0 and _is_word_char(text_lower[start - 1]):
+                continue
+            word_end = end + 1 == text_len or not _is_word_char(text_lower[end + 1])
+            for category, label, whole_word in targets:
+                if word_end or not whole_word:
+                    hits[category].add(label)
+
+        return hits
+
+    def _scan_hyperscan(self, text_lower: str, hits: dict[str, set[str]]) -> dict[str, set[str]]:
+        """Scan Hyperscan (offsets en octets UTF-8, mêmes frontières de mots)."""
+        data = text_lower.encode("utf-8")
+        data_len = len(data)
+
+        def on_match(expression_id, _start, end, _flags, _context):
+            length, targets = self._hs_entries[expression_id]
+            start = end - length
+            if start > 0 and _is_word_char(_utf8_char_before(data, start)):
+                return None
+            word_end = end == data_len or not _is_word_char(_utf8_char_at(data, end))
+            for category, label, whole_word in targets:
+                if word_end or not whole_word:
+                    hits[category].add(label)
+            return None
+
+        scratch = getattr(self._hs_local, "scratch", None)
+        if scratch is None:
+            scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+        self._hs_db.scan(data, match_event_handler=on_match, scratch=scratch)
+        return hits
+
+    def first(self, hits: dict[str, set[str]], category: str) -> str | None:
+        """Premier label trouvé dans l'ordre de la table (priorité des catégories)."""
+        found = hits.get(category)
+        if not found:
+            return None
+        return next((label for label in self.categories[category][0] if label in found), None)
+
+
+class _CompressedStr:
+    """Texte froid stocké compressé en LZ4, décompressé à la demande."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, text: str):
+        self._data = lz4.frame.compress(text.encode("utf-8"))
+
+    def get(self) -> str:
+        return lz4.frame.decompress(self._data).decode("utf-8")
+
+
+def _compress_cold_text(text: "str | _CompressedStr") -> "str | _CompressedStr":
+    """Compresse un texte froid si LZ4 est disponible et le texte assez long."""
+    if LZ4_AVAILABLE and isinstance(text, str) and len(text) >= COLD_TEXT_MIN_CHARS:
+        return _CompressedStr(text)
+    return text
+
 
-@dataclass
+def _as_text(text: "str | _CompressedStr") -> str:
+    """Matérialise un texte éventuellement compressé."""
+    return text.get() if isinstance(text, _CompressedStr) else text
+
+
+@dataclass(slots=True)
 class ConversationTurn:
     """Un échange dans la conversation"""
 
     timestamp: float
     user_query: str
-    system_response: str
+    system_response: "str | _CompressedStr"  # Compressé une fois l'échange refroidi
     context_used: list[str]
     satisfaction_score: float | None = None
     follow_up_queries: list[str] = field(default_factory=list)
+    user_id: str | None = None  # Profil propriétaire (stats de satisfaction)
 
+    # Analyses mémorisées à la création, réutilisées par la compression
+    query_lower: str = ""
+    query_topics: frozenset[str] = frozenset()
 
-@dataclass
+
+@dataclass(slots=True)
 class UserProfile:
     """Profil utilisateur pour personnalisation"""
 
@@ -34,6 +353,7 @@ class UserProfile:
     preferred_language: str = "fr"
     preferred_detail_level: str = "balanced"  # brief, balanced, detailed
     domain_interests: list[str] = field(default_factory=list)
+    domain_interests_bits: int = 0  # Bitset de domain_interests (cf. DOMAIN_BITS)
     interaction_history: list[ConversationTurn] = field(default_factory=list)
 
     # Préférences apprises
@@ -41,14 +361,26 @@ class UserProfile:
     common_topics: list[str] = field(default_factory=list)
     successful_interaction_patterns: dict[str, int] = field(default_factory=dict)
 
+    # Statistiques de satisfaction maintenues incrémentalement
+    satisfaction_sum: float = 0.0
+    satisfaction_count: int = 0
+
+    # Échanges déchargés sur disque (comptés dans interaction_count)
+    spilled_interaction_count: int = 0
 
-@dataclass
+    # Sérialise les écritures des sessions d'un même utilisateur (analyses, déchargement)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+@dataclass(slots=True)
 class ContextWindow:
     """Fenêtre de contexte pour une session"""
 
     session_id: str
     conversation_history: deque = field(default_factory=lambda: deque(maxlen=20))
-    active_topics: list[str] = field(default_factory=list)
+    # Topic -> dernière apparition (dict ordonné : appartenance en O(1))
+    active_topics: dict[str, float] = field(default_factory=dict)
+    active_topic_ids: array = field(default_factory=lambda: array("i"))  # Miroir en IDs
     current_repo_context: str | None = None
     user_intent_chain: list[str] = field(default_factory=list)
 
@@ -57,6 +389,15 @@ class ContextWindow:
     last_interaction_time: float = field(default_factory=time.time)
     context_quality_score: float = 0.0
 
+    # Empreinte de conversation : topics pondérés par decay exponentiel par tour
+    decayed_topic_scores: dict[str, float] = field(default_factory=dict)
+
+    # Partie de l'enrichissement propre à la session, invalidée à chaque tour
+    cached_enhancements: dict[str, Any] | None = None
+
+    # Sérialise les écritures (tour entrant vs analyses en arrière-plan)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
 
 class ContextManager:
     """
@@ -72,13 +413,25 @@ class ContextManager:
     - Optimisation de fenêtre contextuelle
     """
 
-    def __init__(self, max_sessions: int = 1000, context_retention_hours: int = 24):
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        context_retention_hours: int = 24,
+        max_users: int = 10000,
+        background_analytics: bool = False,
+        profile_spill_dir: str | Path | None = None,
+    ):
         self.max_sessions = max_sessions
         self.context_retention_hours = context_retention_hours
+        self.max_users = max_users
+
+        # Storage (LRU : ordre d'accès, le moins récent en tête)
+        self.active_contexts: OrderedDict[str, ContextWindow] = OrderedDict()
+        self.user_profiles: OrderedDict[str, UserProfile] = OrderedDict()
 
-        # Storage
-        self.active_contexts: dict[str, ContextWindow] = {}
-        self.user_profiles: dict[str, UserProfile] = {}
+        # Index d'expiration : tas (last_interaction_time, session_id) à
+        # suppression paresseuse (entrées périmées ignorées au dépilage)
+        self._touch_heap: list[tuple[float, str]] = []
         self.global_patterns: dict[str, Any] = {
             "common_sequences": {},
             "successful_styles": {},
@@ -88,34 +441,67 @@ class ContextManager:
         # Configuration
         self.context_compression_threshold = 15  # Nombre de tours avant compression
 
+        # Scan des mots-clés (une passe par texte pour toutes les catégories)
+        self._keyword_scanner = KeywordScanner(KEYWORD_CATEGORIES)
+
+        # Analyses post-tour hors du chemin critique (cohérence à terme)
+        self._analytics_executor = (
+            ThreadPoolExecutor(max_workers=2, thread_name_prefix="context-analytics")
+            if background_analytics
+            else None
+        )
+
+        # Déchargement de l'historique froid des profils (pickle compressé Zstd)
+        self._profile_spill_dir = Path(profile_spill_dir) if profile_spill_dir else None
+        if self._profile_spill_dir and not ZSTD_AVAILABLE:
+            logger.warning("zstandard non installé : historique des profils gardé en mémoire")
+            self._profile_spill_dir = None
+        if self._profile_spill_dir:
+            self._profile_spill_dir.mkdir(parents=True, exist_ok=True)
+
         logger.info("ContextManager v2.9 initialisé")
 
     def get_or_create_context(self, session_id: str, _user_id: str | None = None) -> ContextWindow:
         """Obtenir ou créer un contexte de session"""
 
-        if session_id not in self.active_contexts:
+        context = self.active_contexts.get(session_id)
+
+        if context is None:
             # Créer nouveau contexte
             context = ContextWindow(session_id=session_id)
             self.active_contexts[session_id] = context
+            self._touch(context)
 
-            # Nettoyer les anciens contextes si nécessaire
+            # Nettoyer les anciens contextes si nécessaire, puis éviction LRU
             if len(self.active_contexts) > self.max_sessions:
                 self._cleanup_old_contexts()
+                while len(self.active_contexts) > self.max_sessions:
+                    self.active_contexts.popitem(last=False)
 
             logger.debug(f"Nouveau contexte créé: {session_id}")
         else:
-            context = self.active_contexts[session_id]
+            self.active_contexts.move_to_end(session_id)
             context.last_interaction_time = time.time()
+            self._touch(context)
 
         return context
 
     def get_user_profile(self, user_id: str) -> UserProfile:
         """Obtenir ou créer un profil utilisateur"""
-        if user_id not in self.user_profiles:
-            self.user_profiles[user_id] = UserProfile(user_id=user_id)
+        profile = self.user_profiles.get(user_id)
+
+        if profile is None:
+            profile = UserProfile(user_id=user_id)
+            self.user_profiles[user_id] = profile
             logger.debug(f"Nouveau profil utilisateur créé: {user_id}")
 
-        return self.user_profiles[user_id]
+            # Éviction LRU des profils les moins récemment utilisés
+            while len(self.user_profiles) > self.max_users:
+                self.user_profiles.popitem(last=False)
+        else:
+            self.user_profiles.move_to_end(user_id)
+
+        return profile
 
     def add_conversation_turn(
         self,
@@ -126,114 +512,207 @@ class ContextManager:
         sources_used: list[str],
     ):
         """Ajouter un échange à l'historique conversationnel"""
+        self.add_conversation_turns_batch(session_id, user_id, [(query, response, sources_used)])
+
+    def add_conversation_turns_batch(
+        self,
+        session_id: str,
+        user_id: str | None,
+        turns: list[tuple[str, str, list[str]]],
+    ):
+        """Ajouter une rafale d'échanges (query, response, sources) en une fois"""
+
+        if not turns:
+            return
 
         context = self.get_or_create_context(session_id, user_id)
+        profile = self.get_user_profile(user_id) if user_id else None
+
+        # Horodatage commun à la rafale
+        now = time.time()
+        new_turns = []
+        turn_hits = []
+
+        for query, response, sources_used in turns:
+            # Minuscules et scan calculés une fois pour tout le tour
+            query_lower = query.lower()
+            hits = self._keyword_scanner.scan(query_lower)
+            turn_hits.append(hits)
+
+            new_turns.append(
+                ConversationTurn(
+                    timestamp=now,
+                    user_query=query,
+                    system_response=response,
+                    context_used=sources_used,
+                    user_id=user_id,
+                    query_lower=query_lower,
+                    query_topics=frozenset(hits["topic"]),
+                )
+            )
 
-        turn = ConversationTurn(
-            timestamp=time.time(),
-            user_query=query,
-            system_response=response,
-            context_used=sources_used,
-        )
+        # Par lots tenant dans la place libre du deque : la compression passe avant
+        # qu'un échange non résumé ne soit évincé
+        done = 0
+        while done < len(new_turns):
+            with context.lock:
+                history = context.conversation_history
+                room = len(new_turns) - done
+                if history.maxlen is not None:
+                    if len(history) >= history.maxlen:
+                        # Analyses du lot précédent pas encore passées (arrière-plan)
+                        self._compress_context_history(context)
+                    room = min(room, max(history.maxlen - len(history), 1))
+                chunk = slice(done, done + room)
+                history.extend(new_turns[chunk])
+                context.cached_enhancements = None
+            if profile:
+                with profile.lock:
+                    profile.interaction_history.extend(new_turns[chunk])
+
+            # Analyses non nécessaires à la réponse courante : en arrière-plan si activé
+            if self._analytics_executor:
+                self._analytics_executor.submit(
+                    self._post_turn_analytics, context, profile, turn_hits[chunk], now
+                )
+            else:
+                self._post_turn_analytics(context, profile, turn_hits[chunk], now)
+            done = chunk.stop
+
+        logger.debug(f"{len(new_turns)} tour(s) de conversation ajouté(s): {session_id}")
+
+    def _post_turn_analytics(
+        self,
+        context: ContextWindow,
+        profile: UserProfile | None,
+        turn_hits: list[dict[str, set[str]]],
+        now: float,
+    ):
+        """Apprentissage, topics, intentions et compression après l'ajout des tours"""
 
-        context.conversation_history.append(turn)
+        with context.lock:
+            for hits in turn_hits:
+                # Mise à jour des topics actifs et de l'empreinte pondérée
+                self._update_active_topics(context, hits, now)
+                self._update_decayed_topic_scores(context, hits)
 
-        # Mise à jour du profil utilisateur si disponible
-        if user_id:
-            profile = self.get_user_profile(user_id)
-            profile.interaction_history.append(turn)
+                # Mise à jour de la chaîne d'intentions
+                self._update_intent_chain(context, hits)
 
-            # Apprentissage automatique des préférences
-            self._learn_user_preferences(profile, turn)
+            # Compression si nécessaire (une seule vérification par lot)
+            if len(context.conversation_history) >= self.context_compression_threshold:
+                self._compress_context_history(context)
 
-        # Mise à jour des topics actifs
-        self._update_active_topics(context, query)
+            context.cached_enhancements = None
 
-        # Mise à jour de la chaîne d'intentions
-        self._update_intent_chain(context, query)
+        # Profil partagé entre les sessions de l'utilisateur : son propre verrou
+        if profile:
+            with profile.lock:
+                # Apprentissage automatique des préférences
+                for hits in turn_hits:
+                    self._learn_user_preferences(profile, hits)
 
-        # Compression si nécessaire
-        if len(context.conversation_history) >= self.context_compression_threshold:
-            self._compress_context_history(context)
+                # Historique de profil borné en mémoire (taille relue sous le verrou)
+                if len(profile.interaction_history) > PROFILE_HISTORY_MAX:
+                    self._spill_interaction_history(profile, now)
 
-        logger.debug(f"Tour de conversation ajouté: {session_id}")
+    def _spill_interaction_history(self, profile: UserProfile, now: float):
+        """Décharger les échanges les plus anciens du profil sur disque (Zstd)"""
 
-    def _learn_user_preferences(self, profile: UserProfile, turn: ConversationTurn):
-        """Apprentissage automatique des préférences utilisateur"""
+        if not self._profile_spill_dir:
+            return
+
+        cold_turns = profile.interaction_history[:PROFILE_SPILL_BATCH]
+        payload = zstandard.ZstdCompressor(level=3).compress(
+            pickle.dumps(cold_turns, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+
+        safe_user_id = re.sub(r"[^\w.-]", "_", profile.user_id)
+        # Rang du premier échange déchargé : nom unique même pour deux lots simultanés
+        spill_path = (
+            self._profile_spill_dir
+            / f"{safe_user_id}.{int(now * 1000)}.{profile.spilled_interaction_count}.zst"
+        )
+        try:
+            spill_path.write_bytes(payload)
+        except OSError as e:
+            logger.warning(f"Échec déchargement historique {profile.user_id}: {e}")
+            return
+
+        del profile.interaction_history[:PROFILE_SPILL_BATCH]
+        profile.spilled_interaction_count += len(cold_turns)
+        logger.debug(f"{len(cold_turns)} échanges déchargés: {spill_path}")
+
+    def close(self):
+        """Attendre les analyses en cours et arrêter le pool d'arrière-plan"""
+        if self._analytics_executor:
+            self._analytics_executor.shutdown(wait=True)
 
-        query = turn.user_query.lower()
+    def _scan(self, text: str) -> dict[str, set[str]]:
+        """Scan des mots-clés de toutes les catégories en une passe."""
+        return self._keyword_scanner.scan(text.lower())
+
+    def _learn_user_preferences(self, profile: UserProfile, hits: dict[str, set[str]]):
+        """Apprentissage automatique des préférences utilisateur"""
 
         # Analyse du niveau de détail préféré
-        if any(word in query for word in ["detail", "explain", "how exactly", "step by step"]):
-            if profile.preferred_detail_level != "detailed":
-                profile.preferred_detail_level = "detailed"
-
-        elif (
-            any(word in query for word in ["quick", "brief", "summary", "tldr"])
-            and profile.preferred_detail_level != "brief"
-        ):
-            profile.preferred_detail_level = "brief"
-
-        # Détection des domaines d'intérêt
-        technical_domains = {
-            "backend": ["api", "server", "database", "backend"],
-            "frontend": ["ui", "frontend", "interface", "component"],
-            "devops": ["docker", "deploy", "infrastructure", "ci/cd"],
-            "security": ["auth", "security", "permission", "vulnerability"],
-            "testing": ["test", "testing", "unittest", "coverage"],
-        }
+        detail_level = self._keyword_scanner.first(hits, "detail")
+        if detail_level and profile.preferred_detail_level != detail_level:
+            profile.preferred_detail_level = detail_level
 
-        for domain, keywords in technical_domains.items():
-            if (
-                any(keyword in query for keyword in keywords)
-                and domain not in profile.domain_interests
-            ):
-                profile.domain_interests.append(domain)
+        # Détection des domaines d'intérêt (ordre de la table, nouveaux seulement)
+        if hits["domain"]:
+            for domain, bit in DOMAIN_BITS.items():
+                if domain in hits["domain"] and not profile.domain_interests_bits & bit:
+                    profile.domain_interests_bits |= bit
+                    profile.domain_interests.append(domain)
 
         # Analyse du style de réponse préféré
-        if any(word in query for word in ["example", "show me", "demonstrate"]):
+        if hits["example_request"]:
             profile.preferred_response_style = "example_heavy"
 
-    def _update_active_topics(self, context: ContextWindow, query: str):
+    def _update_active_topics(self, context: ContextWindow, hits: dict[str, set[str]], now: float):
         """Mise à jour des topics actifs"""
 
-        # Extraction simple de topics
-        query_lower = query.lower()
-        potential_topics = []
-
-        # Topics techniques
-        tech_topics = {
-            "authentication": ["auth", "login", "token", "session"],
-            "database": ["db", "database", "query", "sql"],
-            "api": ["api", "endpoint", "request", "response"],
-            "testing": ["test", "testing", "unittest", "mock"],
-            "error_handling": ["error", "exception", "try", "catch"],
+        # Topics techniques (ordre de la table)
+        potential_topics = [topic for topic in TECH_TOPICS if topic in hits["tech_topic"]]
+
+        # Decay temporel par topic : oublié après 5 minutes sans apparition
+        active_topics = {
+            topic: last_seen
+            for topic, last_seen in context.active_topics.items()
+            if now - last_seen < 300
         }
 
-        for topic, keywords in tech_topics.items():
-            if any(keyword in query_lower for keyword in keywords):
-                potential_topics.append(topic)
+        # Ajouter (ou rafraîchir en fin d'ordre) les topics détectés
+        for topic in potential_topics:
+            active_topics.pop(topic, None)
+            active_topics[topic] = now
 
-        # Mise à jour avec decay temporel
-        current_time = time.time()
-        context.active_topics = [
-            topic
-            for topic in context.active_topics
-            if current_time - context.last_interaction_time < 300  # 5 minutes
-        ]
+        # Limiter le nombre de topics actifs (les plus anciens sortent)
+        while len(active_topics) > 5:
+            active_topics.pop(next(iter(active_topics)))
 
-        # Ajouter nouveaux topics
-        for topic in potential_topics:
-            if topic not in context.active_topics:
-                context.active_topics.append(topic)
+        context.active_topics = active_topics
+        context.active_topic_ids = array("i", (TECH_TOPIC_IDS[topic] for topic in active_topics))
 
-        # Limiter le nombre de topics actifs
-        context.active_topics = context.active_topics[-5:]
+    def _update_decayed_topic_scores(self, context: ContextWindow, hits: dict[str, set[str]]):
+        """Empreinte de conversation : score = score * exp(-λ) + occurrence du tour"""
 
-    def _update_intent_chain(self, context: ContextWindow, query: str):
+        scores = {
+            topic: weighted
+            for topic, score in context.decayed_topic_scores.items()
+            if (weighted := score * TOPIC_SCORE_DECAY) >= TOPIC_SCORE_MIN
+        }
+        for topic in hits["tech_topic"]:
+            scores[topic] = scores.get(topic, 0.0) + 1.0
+
+        context.decayed_topic_scores = scores
+
+    def _update_intent_chain(self, context: ContextWindow, hits: dict[str, set[str]]):
         """Mise à jour de la chaîne d'intentions"""
 
-        intent = self._detect_intent(query)
+        intent = self._keyword_scanner.first(hits, "intent")
         if intent:
             context.user_intent_chain.append(intent)
 
@@ -242,22 +721,7 @@ class ContextManager:
 
     def _detect_intent(self, query: str) -> str | None:
         """Détection d'intention simplifiée"""
-        query_lower = query.lower()
-
-        intent_patterns = {
-            "learn": ["learn", "understand", "explain", "what is"],
-            "troubleshoot": ["error", "problem", "issue", "bug", "not working"],
-            "implement": ["how to", "implement", "create", "build"],
-            "optimize": ["optimize", "improve", "performance", "faster"],
-            "compare": ["compare", "difference", "vs", "versus", "better"],
-            "find": ["find", "search", "locate", "where"],
-        }
-
-        for intent, patterns in intent_patterns.items():
-            if any(pattern in query_lower for pattern in patterns):
-                return intent
-
-        return None
+        return self._keyword_scanner.first(self._scan(query), "intent")
 
     def _compress_context_history(self, context: ContextWindow):
         """Compression intelligente de l'historique"""
@@ -265,41 +729,37 @@ class ContextManager:
         if len(context.conversation_history) < self.context_compression_threshold:
             return
 
-        # Garder les N derniers échanges complets
+        # Garder les N derniers échanges complets (instantané unique du deque)
         recent_turns = 5
-        important_turns = []
+        history = list(context.conversation_history)
+        recent = history[-recent_turns:]
+        old_turns = history[:-recent_turns]
 
         # Identifier les échanges importants (haute satisfaction, topics clés)
-        for turn in list(context.conversation_history)[:-recent_turns]:
-            if (turn.satisfaction_score and turn.satisfaction_score > 0.8) or any(
-                topic in turn.user_query.lower() for topic in context.active_topics
-            ):
-                important_turns.append(turn)
-
-        # Créer résumé des anciens échanges
-        if len(context.conversation_history) > recent_turns + len(important_turns):
-            old_turns = list(context.conversation_history)[:-recent_turns]
-            summary = self._create_conversation_summary(old_turns)
-
-            # Remplacer par le résumé
-            context.conversation_history.clear()
+        important_turns = [
+            turn
+            for turn in old_turns
+            if (turn.satisfaction_score and turn.satisfaction_score > 0.8)
+            or any(topic in turn.query_lower for topic in context.active_topics)
+        ]
 
-            # Ajouter résumé comme premier élément
+        # Résumer les anciens échanges, garder importants et récents tels quels
+        if len(old_turns) > len(important_turns):
             summary_turn = ConversationTurn(
                 timestamp=old_turns[0].timestamp,
                 user_query="[SUMMARY]",
-                system_response=summary,
+                # Résumé court (quelques centaines de caractères) : gardé en clair
+                system_response=self._create_conversation_summary(old_turns),
                 context_used=["conversation_summary"],
             )
-            context.conversation_history.append(summary_turn)
-
-            # Ré-ajouter les échanges importants et récents
+            # Les échanges importants conservés sont froids : réponses compressées
             for turn in important_turns:
-                context.conversation_history.append(turn)
+                turn.system_response = _compress_cold_text(turn.system_response)
 
-            for turn in list(context.conversation_history)[-recent_turns:]:
-                if turn.user_query != "[SUMMARY]":
-                    context.conversation_history.append(turn)
+            context.conversation_history = deque(
+                [summary_turn, *important_turns, *recent],
+                maxlen=context.conversation_history.maxlen,
+            )
 
         logger.debug(f"Historique compressé pour session {context.session_id}")
 
@@ -310,13 +770,13 @@ class ContextManager:
         key_points = []
 
         for turn in turns:
-            # Extraire topics
-            query_topics = self._extract_topics_from_text(turn.user_query)
-            topics.update(query_topics)
+            # Topics mémorisés sur le tour (pas de nouveau scan)
+            topics.update(turn.query_topics)
 
             # Extraire points clés
-            if len(turn.system_response) > 100:
-                key_points.append(turn.system_response[:100] + "...")
+            response = _as_text(turn.system_response)
+            if len(response) > 100:
+                key_points.append(response[:100] + "...")
 
         summary_parts = []
 
@@ -330,22 +790,8 @@ class ContextManager:
 
     def _extract_topics_from_text(self, text: str) -> list[str]:
         """Extraction simple de topics d'un texte"""
-        text_lower = text.lower()
-        topics = []
-
-        topic_keywords = {
-            "auth": ["auth", "login", "token"],
-            "api": ["api", "endpoint", "request"],
-            "database": ["db", "database", "query"],
-            "testing": ["test", "testing", "unittest"],
-            "deployment": ["deploy", "docker", "build"],
-        }
-
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                topics.append(topic)
-
-        return topics
+        found = self._scan(text)["topic"]
+        return [topic for topic in TOPIC_KEYWORDS if topic in found]
 
     def get_contextual_prompt_enhancement(
         self, session_id: str, user_id: str | None, current_query: str
@@ -353,37 +799,52 @@ class ContextManager:
         """Obtenir des améliorations contextuelles pour le prompt"""
 
         context = self.get_or_create_context(session_id, user_id)
-        enhancements = {}
 
-        # Contexte conversationnel
-        if context.conversation_history:
-            recent_context = self._build_recent_context(context)
-            enhancements["conversation_context"] = recent_context
+        # Partie propre à la session : recalculée seulement après un nouveau tour
+        with context.lock:
+            if context.cached_enhancements is None:
+                context.cached_enhancements = self._build_session_enhancements(context)
+            # Copie profonde : l'appelant peut modifier listes et dicts sans altérer le cache
+            enhancements = copy.deepcopy(context.cached_enhancements)
 
-        # Profil utilisateur
+        # Profil utilisateur (peut évoluer via les autres sessions de l'utilisateur)
         if user_id:
             profile = self.get_user_profile(user_id)
-            enhancements["user_preferences"] = {
-                "expertise_level": profile.expertise_level,
-                "detail_level": profile.preferred_detail_level,
-                "response_style": profile.preferred_response_style,
-                "domain_interests": profile.domain_interests,
-            }
+            with profile.lock:
+                enhancements["user_preferences"] = {
+                    "expertise_level": profile.expertise_level,
+                    "detail_level": profile.preferred_detail_level,
+                    "response_style": profile.preferred_response_style,
+                    "domain_interests": list(profile.domain_interests),
+                }
+
+        # Références contextuelles
+        references = self._resolve_contextual_references(context, current_query.lower())
+        if references:
+            enhancements["contextual_references"] = references
+
+        return enhancements
+
+    def _build_session_enhancements(self, context: ContextWindow) -> dict[str, Any]:
+        """Enrichissements dépendant uniquement de l'état de la session"""
 
-        # Topics actifs
+        enhancements: dict[str, Any] = {}
+
+        # Contexte conversationnel
+        if context.conversation_history:
+            enhancements["conversation_context"] = self._build_recent_context(context)
+
+        # Topics actifs et leur pondération décroissante
         if context.active_topics:
-            enhancements["active_topics"] = context.active_topics
+            enhancements["active_topics"] = list(context.active_topics)
+        if context.decayed_topic_scores:
+            enhancements["topic_weights"] = dict(context.decayed_topic_scores)
 
         # Prédiction d'intention
         predicted_intent = self._predict_next_intent(context)
         if predicted_intent:
             enhancements["predicted_intent"] = predicted_intent
 
-        # Références contextuelles
-        references = self._resolve_contextual_references(context, current_query)
-        if references:
-            enhancements["contextual_references"] = references
-
         return enhancements
 
     def _build_recent_context(self, context: ContextWindow) -> str:
@@ -392,14 +853,15 @@ class ContextManager:
         if not context.conversation_history:
             return ""
 
-        # Prendre les 3 derniers échanges
-        recent_turns = list(context.conversation_history)[-3:]
+        # Prendre les 3 derniers échanges (sans copier tout le deque)
+        history = context.conversation_history
+        recent_turns = islice(history, max(0, len(history) - 3), None)
 
         context_parts = []
         for turn in recent_turns:
             if turn.user_query != "[SUMMARY]":
                 context_parts.append(f"User: {turn.user_query}")
-                context_parts.append(f"Assistant: {turn.system_response[:200]}...")
+                context_parts.append(f"Assistant: {_as_text(turn.system_response)[:200]}...")
 
         return "\n".join(context_parts)
 
@@ -426,33 +888,24 @@ class ContextManager:
 
         return None
 
-    def _resolve_contextual_references(self, context: ContextWindow, query: str) -> list[str]:
-        """Résolution des références contextuelles"""
+    def _resolve_contextual_references(self, context: ContextWindow, query_lower: str) -> list[str]:
+        """Résolution des références contextuelles (requête déjà en minuscules)"""
 
         references = []
-        query_lower = query.lower()
+        found = self._keyword_scanner.scan(query_lower)["reference"]
 
         # Références temporelles
-        if (
-            any(word in query_lower for word in ["that", "this", "it", "same"])
-            and context.conversation_history
-        ):
-            last_turn = list(context.conversation_history)[-1]
+        if "temporal" in found and context.conversation_history:
+            last_turn = context.conversation_history[-1]
             references.append(f"Référence possible: {last_turn.user_query}")
 
         # Références de continuation
-        if (
-            any(word in query_lower for word in ["also", "additionally", "moreover"])
-            and context.active_topics
-        ):
-            references.append(f"Topic actuel: {context.active_topics[-1]}")
+        if "continuation" in found and context.active_topics:
+            references.append(f"Topic actuel: {next(reversed(context.active_topics))}")
 
         # Références d'opposition
-        if (
-            any(word in query_lower for word in ["but", "however", "instead"])
-            and context.conversation_history
-        ):
-            last_turn = list(context.conversation_history)[-1]
+        if "contrast" in found and context.conversation_history:
+            last_turn = context.conversation_history[-1]
             references.append(f"Contraste avec: {last_turn.user_query}")
 
         return references
@@ -460,55 +913,81 @@ class ContextManager:
     def set_satisfaction_score(self, session_id: str, score: float):
         """Définir le score de satisfaction pour le dernier échange"""
 
-        if session_id in self.active_contexts:
-            context = self.active_contexts[session_id]
-            if context.conversation_history:
-                last_turn = list(context.conversation_history)[-1]
-                last_turn.satisfaction_score = score
+        context = self.active_contexts.get(session_id)
+        if context is None:
+            return
 
-                # Apprentissage global des patterns réussis
-                self._update_global_patterns(last_turn, score)
+        # Dernier tour lu et re-noté sous le verrou de la session (ajouts concurrents)
+        with context.lock:
+            if not context.conversation_history:
+                return
+            last_turn = context.conversation_history[-1]
+            previous_score = last_turn.satisfaction_score
+            last_turn.satisfaction_score = score
+
+        # Stats incrémentales du profil (un re-score remplace l'ancien)
+        profile = self.user_profiles.get(last_turn.user_id) if last_turn.user_id else None
+        if profile:
+            with profile.lock:
+                if previous_score is None:
+                    profile.satisfaction_count += 1
+                else:
+                    profile.satisfaction_sum -= previous_score
+                profile.satisfaction_sum += score
+
+        # Apprentissage global des patterns réussis
+        self._update_global_patterns(last_turn, score)
 
     def _update_global_patterns(self, turn: ConversationTurn, satisfaction: float):
         """Mise à jour des patterns globaux de succès"""
 
         if satisfaction > 0.7:  # Interaction réussie
             # Enregistrer le style de réponse réussi
-            response_style = self._analyze_response_style(turn.system_response)
+            response_style = self._analyze_response_style(_as_text(turn.system_response))
             if response_style not in self.global_patterns["successful_styles"]:
                 self.global_patterns["successful_styles"][response_style] = 0
             self.global_patterns["successful_styles"][response_style] += 1
 
     def _analyze_response_style(self, response: str) -> str:
         """Analyser le style d'une réponse"""
-        response_lower = response.lower()
-
-        if any(word in response_lower for word in ["example", "for instance", "e.g."]):
-            return "example_based"
-        elif any(word in response_lower for word in ["step", "first", "then", "finally"]):
-            return "step_by_step"
-        elif any(word in response_lower for word in ["because", "since", "therefore"]):
-            return "explanatory"
-        elif len(response) < 200:
+        style = self._keyword_scanner.first(self._scan(response), "style")
+        if style:
+            return style
+
+        if len(response) < 200:
             return "concise"
-        else:
-            return "detailed"
+        return "detailed"
+
+    def _touch(self, context: ContextWindow):
+        """Indexe la dernière interaction d'un contexte dans le tas d'expiration."""
+        heapq.heappush(self._touch_heap, (context.last_interaction_time, context.session_id))
+
+        # Compaction si les entrées périmées dominent le tas
+        if len(self._touch_heap) > 2 * len(self.active_contexts) + 64:
+            self._touch_heap = [
+                (ctx.last_interaction_time, sid) for sid, ctx in self.active_contexts.items()
+            ]
+            heapq.heapify(self._touch_heap)
 
     def _cleanup_old_contexts(self):
-        """Nettoyer les anciens contextes"""
+        """Nettoyer les anciens contextes (O(k log n) pour k contextes expirés)"""
         current_time = time.time()
         cutoff_time = current_time - (self.context_retention_hours * 3600)
 
-        to_remove = []
-        for session_id, context in self.active_contexts.items():
-            if context.last_interaction_time < cutoff_time:
-                to_remove.append(session_id)
+        removed = 0
+        while self._touch_heap and self._touch_heap[0][0] < cutoff_time:
+            timestamp, session_id = heapq.heappop(self._touch_heap)
+            context = self.active_contexts.get(session_id)
+
+            # Entrée périmée : contexte supprimé ou touché depuis
+            if context is None or context.last_interaction_time != timestamp:
+                continue
 
-        for session_id in to_remove:
             del self.active_contexts[session_id]
+            removed += 1
 
-        if to_remove:
-            logger.debug(f"Nettoyé {len(to_remove)} contextes anciens")
+        if removed:
+            logger.debug(f"Nettoyé {removed} contextes anciens")
 
     def get_context_statistics(self) -> dict[str, Any]:
         """Obtenir les statistiques du gestionnaire de contexte"""
@@ -524,16 +1003,17 @@ class ContextManager:
             "successful_styles": dict(self.global_patterns["successful_styles"]),
         }
 
-    def _get_most_common_topics(self) -> list[str]:
+    def _get_most_common_topics(self) -> list[tuple[str, int]]:
         """Obtenir les topics les plus communs"""
-        topic_counts = {}
-
-        for context in self.active_contexts.values():
-            for topic in context.active_topics:
-                topic_counts[topic] = topic_counts.get(topic, 0) + 1
+        topic_ids = np.fromiter(
+            chain.from_iterable(ctx.active_topic_ids for ctx in self.active_contexts.values()),
+            dtype=np.int32,
+        )
+        counts = np.bincount(topic_ids, minlength=len(TECH_TOPIC_NAMES))
 
-        # Retourner les 10 plus communs
-        return sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        # Retourner les 10 plus communs (tri stable : égalités dans l'ordre de la table)
+        top = np.argsort(-counts, kind="stable")[:10]
+        return [(TECH_TOPIC_NAMES[i], int(counts[i])) for i in top if counts[i]]
 
     def export_user_profile(self, user_id: str) -> dict[str, Any] | None:
         """Exporter le profil d'un utilisateur"""
@@ -549,20 +1029,7 @@ class ContextManager:
             "domain_interests": profile.domain_interests,
             "preferred_response_style": profile.preferred_response_style,
             "common_topics": profile.common_topics,
-            "interaction_count": len(profile.interaction_history),
-            "avg_satisfaction": sum(
-                turn.satisfaction_score
-                for turn in profile.interaction_history
-                if turn.satisfaction_score is not None
-            )
-            / max(
-                len(
-                    [
-                        turn
-                        for turn in profile.interaction_history
-                        if turn.satisfaction_score is not None
-                    ]
-                ),
-                1,
-            ),
+            "interaction_count": len(profile.interaction_history)
+            + profile.spilled_interaction_count,
+            "avg_satisfaction": profile.satisfaction_sum / max(profile.satisfaction_count, 1),
         }
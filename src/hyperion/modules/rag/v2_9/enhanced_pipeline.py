@@ -4,17 +4,192 @@ Enhanced RAG Pipeline for Hyperion v2.9
 Pipeline RAG amélioré avec optimisations et nouvelles fonctionnalités.
 """
 
+import asyncio
+import hashlib
 import logging
+import math
+import re
 import time
-from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass, field
-from typing import Any
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, NamedTuple
 
 import numpy as np
 
+try:
+    import faiss
+
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*_args, **_kwargs):
+        """Repli sans Numba : les noyaux restent des fonctions NumPy vectorisées."""
+        return lambda func: func
+
+
 logger = logging.getLogger(__name__)
 
 
+# Poids du score combiné : similarité, sémantique, pertinence, fraîcheur, autorité
+COMBINED_SCORE_WEIGHTS = np.array([0.3, 0.25, 0.2, 0.15, 0.1])
+
+
+# Intentions de requête par ordre de priorité (la première trouvée l'emporte)
+QUERY_INTENT_KEYWORDS = {
+    "how_to": ["how to", "how do", "comment"],
+    "definition": ["what is", "qu'est-ce que", "define"],
+    "explanation": ["why", "pourquoi"],
+    "example": ["show me", "example", "exemple"],
+    "comparison": ["compare", "difference", "vs"],
+}
+
+# Une seule regex à groupes nommés : un passage sur la requête pour toutes les intentions.
+# Groupes en lookahead (largeur nulle) : un mot-clé n'en consomme pas un autre qui le
+# chevauche ("tvshow me" voit "vs" et "show me")
+QUERY_INTENT_RE = re.compile(
+    "(?="
+    + "|".join(
+        f"(?P<{intent}>{'|'.join(map(re.escape, keywords))})"
+        for intent, keywords in QUERY_INTENT_KEYWORDS.items()
+    )
+    + ")"
+)
+
+
+# Marqueurs de contenu, détectés en une seule passe regex par chunk
+TECHNICAL_TERMS = frozenset({"class", "function", "method", "variable", "import", "return"})
+EXAMPLE_MARKERS = frozenset({"example", "e.g.", "for instance"})
+EXPLANATION_MARKERS = frozenset({"because", "since", "therefore"})
+CONTENT_MARKERS_RE = re.compile(
+    "|".join(
+        map(
+            re.escape,
+            sorted(TECHNICAL_TERMS | EXAMPLE_MARKERS | EXPLANATION_MARKERS, key=len, reverse=True),
+        )
+    )
+)
+
+
+@njit(cache=True, fastmath=True)
+def _combined_score_kernel(scores: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Somme pondérée ligne à ligne d'une matrice (N, 5) de composantes."""
+    return (scores * weights).sum(axis=1)
+
+
+@njit(cache=True, fastmath=True)
+def _rerank_score_kernel(
+    coherence: np.ndarray,
+    tech_scores: np.ndarray,
+    lengths: np.ndarray,
+    has_example: np.ndarray,
+    has_explanation: np.ndarray,
+) -> np.ndarray:
+    """Score sémantique : cohérence, spécificité contextuelle et complétude."""
+    # Spécificité : termes techniques + bonus de longueur appropriée
+    length_scores = np.where((lengths >= 50) & (lengths <= 500), 1.0, 0.5)
+    specificity = (tech_scores + length_scores) / 2
+
+    # Complétude : exemple, explication, contexte suffisant
+    completeness = 0.3 * has_example + 0.3 * has_explanation + np.where(lengths > 100, 0.4, 0.0)
+
+    return coherence * 0.4 + specificity * 0.3 + completeness * 0.3
+
+
+# Connecteurs logiques (cohérence) et marqueurs de détail (complétude) des réponses
+COHERENCE_MARKERS_RE = re.compile("because|therefore|however|moreover")
+DETAIL_MARKERS_RE = re.compile("example|specifically|detail")
+
+# Synonymes pour la récupération élargie (au plus MAX_EXPANSIONS_PER_WORD par mot)
+QUERY_EXPANSIONS = {
+    "function": ("method", "procedure", "routine"),
+    "error": ("exception", "bug", "issue", "problem"),
+    "class": ("object", "type", "structure"),
+    "variable": ("field", "attribute", "property"),
+}
+MAX_EXPANSIONS_PER_WORD = 2
+
+
+# Score d'autorité par extension de fichier source (défaut : AUTHORITY_DEFAULT)
+AUTHORITY_BY_EXTENSION = {
+    "md": 0.9,  # Documentation
+    "py": 0.8,  # Code source (tests compris)
+}
+AUTHORITY_DEFAULT = 0.6
+
+
+# Phrases d'un chunk : segments entre terminateurs, parcourus en flux
+SENTENCE_RE = re.compile(r"[^.!?]+")
+
+# Phrases conservées par chunk compressé : les premières d'office, puis les pertinentes
+MIN_COMPRESSED_SENTENCES = 3
+MAX_COMPRESSED_SENTENCES = 5
+
+
+# Poids de la dernière mesure dans les moyennes mobiles de durée par étape
+STATS_EWMA_ALPHA = 0.1
+
+# Étapes chronométrées du pipeline -> clé de moyenne dans les statistiques
+STAGE_STATS_KEYS = {
+    "retrieval": "avg_retrieval_time",
+    "rerank": "avg_rerank_time",
+    "generation": "avg_generation_time",
+}
+
+
+# Estimation des tokens par caractère selon l'écriture (CJK, chiffres, latin/autres)
+CJK_TOKENS_PER_CHAR = 0.55
+DIGIT_TOKENS_PER_CHAR = 0.4
+OTHER_TOKENS_PER_CHAR = 0.25
+CJK_RE = re.compile(r"[\u4e00-\u9fff]+")
+DIGITS_DELETE_TABLE = str.maketrans("", "", "0123456789")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation du nombre de tokens d'un texte (passes linéaires en C, sans split)."""
+    total = len(text)
+    digits = total - len(text.translate(DIGITS_DELETE_TABLE))
+    cjk = 0 if text.isascii() else total - len(CJK_RE.sub("", text))
+    return math.ceil(
+        cjk * CJK_TOKENS_PER_CHAR
+        + digits * DIGIT_TOKENS_PER_CHAR
+        + (total - cjk - digits) * OTHER_TOKENS_PER_CHAR
+    )
+
+
+class QuantizedEmbedding(NamedTuple):
+    """Embedding quantifié en int8 avec son échelle (valeur ~ values * scale)"""
+
+    values: np.ndarray
+    scale: float
+
+
+def quantize_embedding(vector: np.ndarray) -> QuantizedEmbedding:
+    """Quantification int8 symétrique par vecteur (4x moins d'octets qu'en float32)."""
+    peak = float(np.abs(vector).max()) if vector.size else 0.0
+    scale = peak / 127 if peak > 0 else 1.0
+    return QuantizedEmbedding(np.round(vector / scale).astype(np.int8), scale)
+
+
+def dequantize_embedding(embedding: QuantizedEmbedding) -> np.ndarray:
+    """Vecteur float32 approché d'un embedding quantifié."""
+    return embedding.values.astype(np.float32) * np.float32(embedding.scale)
+
+
+def _tokenize(text: str) -> frozenset[str]:
+    """Ensemble des mots en minuscules d'un texte (hash des str mis en cache)."""
+    return frozenset(text.lower().split())
+
+
 @dataclass
 class RAGConfig:
     """Configuration pour le pipeline RAG v2.9"""
@@ -24,6 +199,12 @@ class RAGConfig:
     min_similarity: float = 0.7
     chunk_overlap_ratio: float = 0.1
 
+    # Top-K adaptatif : nombre de mots maximal par niveau de complexité
+    enable_adaptive_top_k: bool = True
+    query_complexity_thresholds: dict[str, int] = field(
+        default_factory=lambda: {"simple": 5, "moderate": 15}
+    )
+
     # Génération
     max_tokens: int = 2048
     temperature: float = 0.1
@@ -35,20 +216,36 @@ class RAGConfig:
     enable_progressive_retrieval: bool = True
     enable_answer_fusion: bool = True
 
+    # Génération augmentée par cache (CAG) pour les petits corpus indexés
+    enable_cag: bool = True
+    cag_threshold_tokens: int = 8000
+
     # Cache et performance
     enable_embedding_cache: bool = True
+    enable_response_cache: bool = True
+    max_embedding_cache_size: int = 10_000
+    max_response_cache_size: int = 1024
+    semantic_cache_threshold: float = 0.93  # Cosinus minimal pour un hit sémantique
     max_concurrent_retrievals: int = 3
     retrieval_timeout: float = 30.0
 
 
-@dataclass
+class ChunkMetadata(NamedTuple):
+    """Métadonnées d'un chunk (tuple léger, extra seulement si nécessaire)"""
+
+    lines: str
+    repo: str
+    extra: dict[str, Any] | None = None
+
+
+@dataclass(slots=True)
 class RetrievalResult:
     """Résultat de récupération enrichi"""
 
     content: str
     score: float
     source: str
-    metadata: dict[str, Any]
+    metadata: ChunkMetadata
     chunk_id: str
 
     # Nouvelles métriques v2.9
@@ -58,8 +255,35 @@ class RetrievalResult:
     authority_score: float = 0.0
     combined_score: float = 0.0
 
+    # Dérivés du contenu, calculés une fois (cf. set_content)
+    content_lower: str = field(init=False, repr=False, compare=False)
+    tokens: frozenset[str] = field(init=False, repr=False, compare=False)
+    token_estimate: int | None = field(default=None, init=False, repr=False, compare=False)
+    extension: str = field(init=False, repr=False, compare=False)
 
-@dataclass
+    def __post_init__(self):
+        _, dot, extension = self.source.lower().rpartition(".")
+        self.extension = extension if dot else ""
+        self.set_content(self.content)
+
+    def set_content(self, content: str):
+        """Remplace le contenu et rafraîchit ses dérivés (minuscules, mots)."""
+        self.content = content
+        self.content_lower = content.lower()
+        self.tokens = frozenset(self.content_lower.split())
+        self.token_estimate = None  # Recalculé à la demande (cf. estimate_tokens)
+
+
+class ContentAnalysis(NamedTuple):
+    """Analyse d'un contenu en une passe (entrées du noyau de reranking)"""
+
+    tech_score: float
+    length: int
+    has_example: bool
+    has_explanation: bool
+
+
+@dataclass(slots=True)
 class RAGResponse:
     """Réponse RAG enrichie v2.9"""
 
@@ -77,6 +301,164 @@ class RAGResponse:
     # Métadonnées de traitement
     retrieval_stats: dict[str, Any] = field(default_factory=dict)
     generation_stats: dict[str, Any] = field(default_factory=dict)
+    cache_hit: bool = False
+
+
+class SemanticCache:
+    """
+    Cache de réponses RAG : correspondance exacte puis sémantique.
+
+    - Exact : OrderedDict LRU indexé par sha256(requête traitée + repo)
+    - Sémantique : embeddings normalisés des requêtes en cache, produit
+      scalaire (= cosinus) contre la nouvelle requête, hit si >= seuil.
+      Recherche exhaustive équivalente à un IndexFlatIP, suffisante pour
+      quelques milliers d'entrées.
+    """
+
+    def __init__(self, max_size: int = 1000, threshold: float = 0.93):
+        self.max_size = max_size
+        self.threshold = threshold
+        self._responses: OrderedDict[str, RAGResponse] = OrderedDict()
+        self._embeddings: dict[str, np.ndarray] = {}  # Clé -> embedding normalisé
+        self._repos: dict[str, str] = {}  # Clé -> repo (pas de hit inter-repos)
+
+    @staticmethod
+    def make_key(processed_query: str, repo_context: str) -> str:
+        return hashlib.sha256(f"{repo_context}\0{processed_query}".encode()).hexdigest()
+
+    def get(self, key: str) -> RAGResponse | None:
+        """Correspondance exacte."""
+        response = self._responses.get(key)
+        if response is not None:
+            self._responses.move_to_end(key)
+        return response
+
+    def get_similar(self, embedding: np.ndarray, repo_context: str) -> RAGResponse | None:
+        """Correspondance sémantique : meilleure requête du même repo au-dessus du seuil."""
+        keys = [key for key in self._embeddings if self._repos[key] == repo_context]
+        if not keys:
+            return None
+
+        similarities = np.stack([self._embeddings[key] for key in keys]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self.get(keys[best])
+
+    def put(
+        self,
+        key: str,
+        response: RAGResponse,
+        repo_context: str,
+        embedding: np.ndarray | None = None,
+    ) -> int:
+        """Ajoute une réponse, évince les moins récemment utilisées au-delà de max_size.
+
+        Retourne le nombre d'entrées évincées.
+        """
+        self._responses[key] = response
+        self._responses.move_to_end(key)
+        self._repos[key] = repo_context
+        if embedding is not None:
+            self._embeddings[key] = embedding
+
+        evictions = 0
+        while len(self._responses) > self.max_size:
+            evicted, _ = self._responses.popitem(last=False)
+            self._embeddings.pop(evicted, None)
+            self._repos.pop(evicted, None)
+            evictions += 1
+        return evictions
+
+    def clear(self):
+        self._responses.clear()
+        self._embeddings.clear()
+        self._repos.clear()
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+
+class CAGContext(NamedTuple):
+    """Corpus d'un repo préchargé pour la génération augmentée par cache"""
+
+    context: str
+    sources: list[RetrievalResult]
+
+
+class ChunkIndex:
+    """
+    Index vectoriel des chunks d'un repo (produit scalaire sur vecteurs normalisés).
+
+    FAISS IndexScalarQuantizer 8 bits si disponible (produits scalaires int8
+    en SIMD), sinon la même recherche exhaustive en NumPy float32. Toutes les
+    requêtes d'un lot sont cherchées en un seul produit matriciel
+    (n_requêtes, d) x (d, n_chunks).
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._chunks: list[RetrievalResult] = []
+        self.total_tokens = 0  # Taille estimée du corpus indexé
+        self._index = None
+        if FAISS_AVAILABLE:
+            self._index = faiss.IndexScalarQuantizer(
+                dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+            # Vecteurs normalisés : composantes dans [-1, 1], plage fixée une fois
+            self._index.train(np.vstack([-np.ones(dim), np.ones(dim)]).astype(np.float32))
+        self._vectors = np.empty((0, dim), dtype=np.float32)  # Repli NumPy
+
+    def add(self, chunks: list[RetrievalResult], embeddings: np.ndarray):
+        """Ajoute des chunks et leurs embeddings normalisés (n, d)."""
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self._index is not None:
+            self._index.add(vectors)
+        else:
+            self._vectors = np.vstack([self._vectors, vectors])
+        self._chunks.extend(chunks)
+        self.total_tokens += sum(estimate_tokens(chunk.content) for chunk in chunks)
+
+    @property
+    def chunks(self) -> list[RetrievalResult]:
+        """Chunks indexés, dans l'ordre d'ajout."""
+        return list(self._chunks)
+
+    def search(self, queries: np.ndarray, k: int) -> list[list[RetrievalResult]]:
+        """K plus proches chunks de chaque requête, copies notées par cosinus."""
+        k = min(k, len(self._chunks))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if self._index is not None:
+            scores, ids = self._index.search(queries, k)
+        else:
+            similarities = queries @ self._vectors.T
+            ids = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(similarities, ids, axis=1)
+            order = np.argsort(-scores, axis=1, kind="stable")
+            ids = np.take_along_axis(ids, order, axis=1)
+            scores = np.take_along_axis(scores, order, axis=1)
+
+        # Copies : le pipeline annote et compresse les chunks retournés
+        return [
+            [
+                RetrievalResult(
+                    content=self._chunks[i].content,
+                    score=score,
+                    source=self._chunks[i].source,
+                    metadata=self._chunks[i].metadata,
+                    chunk_id=self._chunks[i].chunk_id,
+                )
+                for i, score in zip(row_ids.tolist(), row_scores.tolist(), strict=True)
+                if i >= 0
+            ]
+            for row_ids, row_scores in zip(ids, scores, strict=True)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._chunks)
 
 
 class EnhancedRAGPipeline:
@@ -92,23 +474,43 @@ class EnhancedRAGPipeline:
     - Retrieval progressif avec feedback
     """
 
-    def __init__(self, config: RAGConfig | None = None):
+    def __init__(
+        self,
+        config: RAGConfig | None = None,
+        embed_fn: Callable[[str], np.ndarray] | None = None,
+    ):
         self.config = config or RAGConfig()
 
+        # Encodeur de requêtes optionnel (active la couche sémantique du cache)
+        self.embed_fn = embed_fn
+
         # Composants du pipeline
-        self.embeddings_cache: dict[str, np.ndarray] = {}
-        self.response_cache: dict[str, RAGResponse] = {}
+        # LRU sha256(texte) -> embedding normalisé, quantifié en int8
+        self.embeddings_cache: OrderedDict[bytes, QuantizedEmbedding] = OrderedDict()
+        self.chunk_indexes: dict[str, ChunkIndex] = {}  # Repo -> index vectoriel
+        self.kv_cache: dict[str, CAGContext] = {}  # Repo -> corpus préchargé (CAG)
+        self.response_cache = SemanticCache(
+            max_size=self.config.max_response_cache_size,
+            threshold=self.config.semantic_cache_threshold,
+        )
 
         # Stats et métriques
         self.stats = {
             "total_queries": 0,
             "cache_hits": 0,
-            "avg_retrieval_time": 0.0,
-            "avg_generation_time": 0.0,
+            "cache_evictions": 0,  # Caches d'embeddings et de réponses
+            # Estimations de tokens mémorisées sur les chunks
+            "token_estimate_hits": 0,
+            "token_estimate_misses": 0,
+            # Moyennes mobiles (EWMA) par étape, NaN tant qu'aucune mesure
+            "avg_retrieval_time": math.nan,
+            "avg_rerank_time": math.nan,
+            "avg_generation_time": math.nan,
         }
 
-        # Threading pour optimisations
-        self.executor = ThreadPoolExecutor(max_workers=self.config.max_concurrent_retrievals)
+        # Concurrence bornée des appels asynchrones (sémaphore lié à la boucle courante)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
 
         logger.info("EnhancedRAGPipeline v2.9 initialisé")
 
@@ -122,27 +524,64 @@ class EnhancedRAGPipeline:
 
         try:
             # 1. Préparation et normalisation de la requête
-            processed_query = await self._preprocess_query(question, user_context)
-
-            # 2. Récupération progressive des chunks
-            chunks = await self._progressive_retrieval(processed_query, repo_context)
-
-            # 3. Reranking sémantique des résultats
-            if self.config.enable_semantic_reranking:
-                chunks = await self._semantic_reranking(chunks, processed_query)
-
-            # 4. Compression de contexte
-            if self.config.enable_context_compression:
-                chunks = await self._compress_context(chunks, processed_query)
-
-            # 5. Génération de la réponse
-            if self.config.enable_answer_fusion:
-                answer = await self._generate_fused_answer(chunks, processed_query)
+            processed_query = self._preprocess_query(question, user_context)
+
+            # Cache de réponses : exact puis sémantique (saute tout le pipeline)
+            cache_key = query_embedding = None
+            if self.config.enable_response_cache:
+                cache_key = SemanticCache.make_key(processed_query, repo_context)
+                cached = self.response_cache.get(cache_key)
+                if cached is None and self.embed_fn is not None:
+                    query_embedding = self._get_query_embedding(processed_query)
+                    cached = self.response_cache.get_similar(query_embedding, repo_context)
+                if cached is not None:
+                    self.stats["total_queries"] += 1
+                    self.stats["cache_hits"] += 1
+                    return replace(cached, processing_time=time.time() - start_time, cache_hit=True)
+
+            query_tokens = _tokenize(processed_query)  # Une tokenisation par requête
+
+            # Durées par étape en nanosecondes entières
+            stage_ns: dict[str, int] = {}
+
+            cag = self._get_cag_context(repo_context)
+            if cag is not None:
+                # CAG : tout le corpus du repo tient dans le contexte, pas de récupération
+                t0 = time.perf_counter_ns()
+                chunks = [replace(chunk, score=1.0, combined_score=1.0) for chunk in cag.sources]
+                answer = await self._generate_cag_answer(processed_query, repo_context)
+                stage_ns["generation"] = time.perf_counter_ns() - t0
             else:
-                answer = await self._generate_single_answer(chunks, processed_query)
+                # 2. Récupération progressive des chunks
+                t0 = time.perf_counter_ns()
+                chunks = await self._progressive_retrieval(
+                    processed_query, repo_context, query_tokens
+                )
+                t1 = time.perf_counter_ns()
+                stage_ns["retrieval"] = t1 - t0
+
+                # 3. Reranking sémantique des résultats
+                if self.config.enable_semantic_reranking:
+                    chunks = self._semantic_reranking(chunks, query_tokens)
+
+                # 4. Compression de contexte
+                if self.config.enable_context_compression:
+                    chunks = self._compress_context(chunks, query_tokens)
+                t2 = time.perf_counter_ns()
+                stage_ns["rerank"] = t2 - t1
+
+                # 5. Génération de la réponse
+                if self.config.enable_answer_fusion:
+                    answer = await self._generate_fused_answer(chunks, processed_query)
+                else:
+                    answer = await self._generate_single_answer(chunks, processed_query)
+                stage_ns["generation"] = time.perf_counter_ns() - t2
+
+            # Statistiques mises à jour avant la construction de la réponse
+            self._update_stats(stage_ns)
 
             # 6. Évaluation de la qualité
-            quality_scores = await self._evaluate_response_quality(answer, chunks, question)
+            quality_scores = self._evaluate_response_quality(answer, chunks, question)
 
             # 7. Construction de la réponse finale
             processing_time = time.time() - start_time
@@ -160,8 +599,10 @@ class EnhancedRAGPipeline:
                 generation_stats=self._get_generation_stats(),
             )
 
-            # Mise à jour des statistiques
-            self._update_stats(response)
+            if cache_key is not None:
+                self.stats["cache_evictions"] += self.response_cache.put(
+                    cache_key, response, repo_context, query_embedding
+                )
 
             return response
 
@@ -169,7 +610,85 @@ class EnhancedRAGPipeline:
             logger.error(f"Erreur pipeline RAG: {e}")
             raise
 
-    async def _preprocess_query(self, question: str, user_context: dict | None) -> str:
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Sémaphore de concurrence, recréé si la boucle d'événements change"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrent_retrievals)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _guarded(self, coro):
+        """Exécute une coroutine sous le sémaphore de concurrence"""
+        async with self._get_semaphore():
+            return await coro
+
+    def _get_query_embedding(self, processed_query: str) -> np.ndarray:
+        """Embedding normalisé de la requête (mis en cache)"""
+        return self._embed_batch([processed_query])[0]
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        """Embeddings normalisés (n, d) : cache consulté par lot, manquants encodés ensemble"""
+        keys = [hashlib.sha256(text.encode()).digest() for text in texts]
+        embeddings: list[np.ndarray | None] = []
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.embeddings_cache.get(key)
+            if cached is None:
+                embeddings.append(None)
+                missing.append(i)
+            else:
+                self.embeddings_cache.move_to_end(key)
+                embeddings.append(dequantize_embedding(cached))
+
+        if missing:
+            fresh = np.vstack(
+                [np.asarray(self.embed_fn(texts[i]), dtype=np.float32) for i in missing]
+            )
+            norms = np.linalg.norm(fresh, axis=1, keepdims=True)
+            fresh /= np.where(norms > 0, norms, 1.0)
+
+            for i, embedding in zip(missing, fresh, strict=True):
+                embeddings[i] = embedding
+                if self.config.enable_embedding_cache:
+                    self.embeddings_cache[keys[i]] = quantize_embedding(embedding)
+                    self.embeddings_cache.move_to_end(keys[i])
+            while len(self.embeddings_cache) > self.config.max_embedding_cache_size:
+                self.embeddings_cache.popitem(last=False)
+                self.stats["cache_evictions"] += 1
+
+        return np.vstack(embeddings)
+
+    def index_chunks(self, repo_context: str, chunks: list[RetrievalResult]):
+        """Indexe les chunks d'un repo pour la récupération vectorielle (requiert embed_fn)"""
+        if self.embed_fn is None:
+            raise ValueError("embed_fn requis pour indexer des chunks")
+        if not chunks:
+            return
+
+        embeddings = self._embed_batch([chunk.content for chunk in chunks])
+        index = self.chunk_indexes.get(repo_context)
+        if index is None:
+            index = self.chunk_indexes[repo_context] = ChunkIndex(embeddings.shape[1])
+        index.add(chunks, embeddings)
+        self.kv_cache.pop(repo_context, None)  # Corpus modifié : contexte CAG à reconstruire
+
+    def _get_cag_context(self, repo_context: str) -> CAGContext | None:
+        """Corpus complet du repo s'il tient sous le seuil CAG (préchargé une fois)"""
+        if not self.config.enable_cag:
+            return None
+
+        cag = self.kv_cache.get(repo_context)
+        if cag is None:
+            index = self.chunk_indexes.get(repo_context)
+            if index is None or index.total_tokens > self.config.cag_threshold_tokens:
+                return None
+            sources = index.chunks
+            cag = CAGContext("\n".join(chunk.content for chunk in sources), sources)
+            self.kv_cache[repo_context] = cag
+        return cag
+
+    def _preprocess_query(self, question: str, user_context: dict | None) -> str:
         """Prétraitement intelligent de la requête"""
 
         # Normalisation de base
@@ -197,28 +716,29 @@ class EnhancedRAGPipeline:
 
     def _detect_query_intent(self, query: str) -> str | None:
         """Détection simple d'intention de requête"""
-        query_lower = query.lower()
-
-        if any(word in query_lower for word in ["how to", "how do", "comment"]):
-            return "how_to"
-        elif any(word in query_lower for word in ["what is", "qu'est-ce que", "define"]):
-            return "definition"
-        elif any(word in query_lower for word in ["why", "pourquoi"]):
-            return "explanation"
-        elif any(word in query_lower for word in ["show me", "example", "exemple"]):
-            return "example"
-        elif any(word in query_lower for word in ["compare", "difference", "vs"]):
-            return "comparison"
-
-        return None
+        found = {match.lastgroup for match in QUERY_INTENT_RE.finditer(query.lower())}
+        if not found:
+            return None
+        return next(intent for intent in QUERY_INTENT_KEYWORDS if intent in found)
 
-    async def _progressive_retrieval(self, query: str, repo_context: str) -> list[RetrievalResult]:
+    async def _progressive_retrieval(
+        self, query: str, repo_context: str, query_tokens: frozenset[str]
+    ) -> list[RetrievalResult]:
         """Récupération progressive avec raffinement"""
 
+        # Nombre de chunks visé selon la complexité de la requête
+        k = self._adaptive_k(query)
+
         # Étape 1: Récupération initiale large
-        initial_chunks = await self._retrieve_chunks(
-            query, repo_context, limit=self.config.max_chunks * 2
-        )
+        index = self.chunk_indexes.get(repo_context)
+        expanded_chunks = None
+        if index is not None:
+            # Requête et requête élargie cherchées en un seul lot
+            queries = self._embed_batch([query, self._expand_query(query)])
+            initial_chunks, expanded_chunks = index.search(queries, k * 2)
+            expanded_chunks = expanded_chunks[:k]
+        else:
+            initial_chunks = await self._retrieve_chunks(query, repo_context, limit=k * 2)
 
         # Étape 2: Filtrage par seuil de similarité
         filtered_chunks = [
@@ -226,12 +746,15 @@ class EnhancedRAGPipeline:
         ]
 
         # Étape 3: Si pas assez de résultats, récupération élargie
-        if len(filtered_chunks) < self.config.max_chunks // 2:
+        if len(filtered_chunks) < k // 2:
             logger.debug("Récupération élargie nécessaire")
-            expanded_query = await self._expand_query(query)
-            additional_chunks = await self._retrieve_chunks(
-                expanded_query, repo_context, limit=self.config.max_chunks
-            )
+            if expanded_chunks is not None:
+                additional_chunks = expanded_chunks
+            else:
+                expanded_query = self._expand_query(query)
+                additional_chunks = await self._retrieve_chunks(
+                    expanded_query, repo_context, limit=k
+                )
 
             # Fusion et déduplication
             all_chunk_ids = {chunk.chunk_id for chunk in filtered_chunks}
@@ -244,189 +767,209 @@ class EnhancedRAGPipeline:
 
         # Étape 4: Calcul des scores enrichis
         for chunk in filtered_chunks:
-            chunk.semantic_score = await self._calculate_semantic_score(chunk, query)
-            chunk.relevance_score = await self._calculate_relevance_score(chunk, query)
+            chunk.semantic_score = self._calculate_semantic_score(chunk, query_tokens)
+            chunk.relevance_score = self._calculate_relevance_score(chunk, query_tokens)
             chunk.freshness_score = self._calculate_freshness_score(chunk)
             chunk.authority_score = self._calculate_authority_score(chunk)
-            chunk.combined_score = self._calculate_combined_score(chunk)
 
-        # Tri par score combiné
-        filtered_chunks.sort(key=lambda x: x.combined_score, reverse=True)
+        if not filtered_chunks:
+            return []
 
-        return filtered_chunks[: self.config.max_chunks]
+        # Score combiné en un seul produit matrice-vecteur (N, 5) @ (5,)
+        combined = self._calculate_combined_scores(filtered_chunks)
+        for chunk, combined_score in zip(filtered_chunks, combined.tolist(), strict=True):
+            chunk.combined_score = combined_score
+
+        # Top-K par score combiné : partition O(N) puis tri des K retenus
+        if len(filtered_chunks) > k:
+            top = np.argpartition(-combined, k - 1)[:k]
+        else:
+            top = np.arange(len(filtered_chunks))
+        top = top[np.argsort(-combined[top], kind="stable")]
+
+        return [filtered_chunks[i] for i in top]
+
+    def _adaptive_k(self, query: str) -> int:
+        """Top-K selon la complexité (nombre de mots) de la requête"""
+        max_chunks = self.config.max_chunks
+        if not self.config.enable_adaptive_top_k:
+            return max_chunks
+
+        thresholds = self.config.query_complexity_thresholds
+        word_count = query.count(" ") + 1
+        if word_count <= thresholds["simple"]:
+            return min(max_chunks, max(3, max_chunks // 3))
+        if word_count <= thresholds["moderate"]:
+            return max_chunks
+        return max_chunks * 2
 
     async def _retrieve_chunks(
         self, query: str, repo_context: str, limit: int
     ) -> list[RetrievalResult]:
         """Récupération de base des chunks (simulation)"""
         # Simulation - à remplacer par vraie récupération Qdrant
-        chunks = []
+        # Parties invariantes calculées une fois hors de la boucle
+        query_hash = hash(query) % 1000
+        content_suffix = f" for query: {query[:50]}..."
 
-        for i in range(min(limit, 20)):
-            chunk = RetrievalResult(
-                content=f"Content chunk {i} for query: {query[:50]}...",
+        return [
+            RetrievalResult(
+                content=f"Content chunk {i}{content_suffix}",
                 score=0.9 - (i * 0.05),
                 source=f"file_{i}.py",
-                metadata={"lines": f"{i*10}-{i*10+20}", "repo": repo_context},
-                chunk_id=f"chunk_{i}_{hash(query) % 1000}",
+                metadata=ChunkMetadata(lines=f"{i*10}-{i*10+20}", repo=repo_context),
+                chunk_id=f"chunk_{i}_{query_hash}",
             )
-            chunks.append(chunk)
-
-        return chunks
+            for i in range(min(limit, 20))
+        ]
 
-    async def _expand_query(self, original_query: str) -> str:
+    def _expand_query(self, original_query: str) -> str:
         """Expansion de requête pour récupération élargie"""
         # Ajout de synonymes et termes connexes
-        expansions = {
-            "function": ["method", "procedure", "routine"],
-            "error": ["exception", "bug", "issue", "problem"],
-            "class": ["object", "type", "structure"],
-            "variable": ["field", "attribute", "property"],
-        }
-
         expanded_terms = []
         words = original_query.lower().split()
 
         for word in words:
             expanded_terms.append(word)
-            if word in expansions:
-                expanded_terms.extend(expansions[word][:2])  # Limiter l'expansion
+            synonyms = QUERY_EXPANSIONS.get(word)
+            if synonyms:
+                expanded_terms.extend(synonyms[:MAX_EXPANSIONS_PER_WORD])  # Limiter l'expansion
 
         return " ".join(expanded_terms)
 
-    async def _semantic_reranking(
-        self, chunks: list[RetrievalResult], query: str
+    def _semantic_reranking(
+        self, chunks: list[RetrievalResult], query_tokens: frozenset[str]
     ) -> list[RetrievalResult]:
         """Reranking sémantique des résultats"""
 
-        # Calcul de scores sémantiques profonds
-        for chunk in chunks:
-            # Score de cohérence sémantique
-            semantic_coherence = await self._calculate_semantic_coherence(chunk.content, query)
-
-            # Score de spécificité contextuelle
-            contextual_specificity = self._calculate_contextual_specificity(chunk.content, query)
-
-            # Score de complétude informationnelle
-            information_completeness = self._calculate_information_completeness(
-                chunk.content, query
-            )
+        if not chunks:
+            return chunks
 
-            # Reranking basé sur la combinaison des scores
-            chunk.semantic_score = (
-                semantic_coherence * 0.4
-                + contextual_specificity * 0.3
-                + information_completeness * 0.3
-            )
+        # Entrées par chunk (scan des marqueurs), puis scores en un appel de noyau
+        coherence = np.array(
+            [self._calculate_semantic_coherence(chunk.tokens, query_tokens) for chunk in chunks]
+        )
+        analyses = np.array([self._analyze_content(chunk) for chunk in chunks], dtype=np.float64)
+
+        semantic_scores = _rerank_score_kernel(
+            coherence,
+            np.ascontiguousarray(analyses[:, 0]),  # tech_score
+            np.ascontiguousarray(analyses[:, 1]),  # length
+            np.ascontiguousarray(analyses[:, 2]),  # has_example
+            np.ascontiguousarray(analyses[:, 3]),  # has_explanation
+        )
+        for chunk, semantic_score in zip(chunks, semantic_scores.tolist(), strict=True):
+            chunk.semantic_score = semantic_score
 
-        # Tri par score sémantique
-        chunks.sort(key=lambda x: x.semantic_score, reverse=True)
-        return chunks
+        # Tri par score sémantique sur le tableau déjà calculé (stable, sans clé Python)
+        return [chunks[i] for i in np.argsort(-semantic_scores, kind="stable").tolist()]
 
-    async def _calculate_semantic_coherence(self, content: str, query: str) -> float:
+    def _calculate_semantic_coherence(
+        self, content_tokens: frozenset[str], query_tokens: frozenset[str]
+    ) -> float:
         """Calcul de cohérence sémantique (simulation)"""
         # Simulation - en production utiliser des embeddings plus sophistiqués
-        common_words = set(content.lower().split()) & set(query.lower().split())
-        return min(len(common_words) / max(len(query.split()), 1), 1.0)
-
-    def _calculate_contextual_specificity(self, content: str, _query: str) -> float:
-        """Score de spécificité contextuelle"""
-        # Bonus pour les termes techniques spécifiques
-        technical_terms = ["class", "function", "method", "variable", "import", "return"]
-        tech_score = sum(1 for term in technical_terms if term in content.lower()) / len(
-            technical_terms
-        )
-
-        # Bonus pour la longueur appropriée
-        length_score = 1.0 if 50 <= len(content) <= 500 else 0.5
-
-        return (tech_score + length_score) / 2
-
-    def _calculate_information_completeness(self, content: str, _query: str) -> float:
-        """Score de complétude informationnelle"""
-        # Analyse simple de complétude
-        has_example = any(word in content.lower() for word in ["example", "e.g.", "for instance"])
-        has_explanation = any(word in content.lower() for word in ["because", "since", "therefore"])
-        has_context = len(content) > 100
-
-        completeness = (
-            (0.3 if has_example else 0)
-            + (0.3 if has_explanation else 0)
-            + (0.4 if has_context else 0)
+        return min(len(content_tokens & query_tokens) / max(len(query_tokens), 1), 1.0)
+
+    def _analyze_content(self, chunk: RetrievalResult) -> ContentAnalysis:
+        """Analyse du contenu : un scan des marqueurs sur le texte déjà en minuscules"""
+        found = {match.group() for match in CONTENT_MARKERS_RE.finditer(chunk.content_lower)}
+
+        return ContentAnalysis(
+            # Bonus pour les termes techniques spécifiques
+            tech_score=len(found & TECHNICAL_TERMS) / len(TECHNICAL_TERMS),
+            length=len(chunk.content),
+            has_example=not found.isdisjoint(EXAMPLE_MARKERS),
+            has_explanation=not found.isdisjoint(EXPLANATION_MARKERS),
         )
 
-        return completeness
-
-    async def _compress_context(
-        self, chunks: list[RetrievalResult], query: str
+    def _compress_context(
+        self, chunks: list[RetrievalResult], query_tokens: frozenset[str]
     ) -> list[RetrievalResult]:
         """Compression intelligente du contexte"""
         if not self.config.enable_context_compression:
             return chunks
 
-        compressed_chunks = []
-        total_tokens = 0
         max_tokens = self.config.max_tokens // 2  # Réserver de l'espace pour la réponse
 
-        for chunk in chunks:
-            # Estimation des tokens (approximation)
-            chunk_tokens = len(chunk.content.split()) * 1.3
-
-            if total_tokens + chunk_tokens <= max_tokens:
-                # Compression du contenu si nécessaire
-                if len(chunk.content) > 300:
-                    compressed_content = await self._compress_chunk_content(chunk.content, query)
-                    chunk.content = compressed_content
+        # Budget : somme préfixe des estimations puis une recherche dichotomique
+        estimates = np.fromiter(
+            (self._chunk_token_estimate(chunk) for chunk in chunks),
+            dtype=np.int64,
+            count=len(chunks),
+        )
+        cutoff = int(np.searchsorted(np.cumsum(estimates), max_tokens, side="right"))
+        compressed_chunks = chunks[:cutoff]
 
-                compressed_chunks.append(chunk)
-                total_tokens += len(chunk.content.split()) * 1.3
-            else:
-                break
+        # Compression du contenu des seuls chunks retenus, si nécessaire
+        for chunk in compressed_chunks:
+            if len(chunk.content) > 300:
+                chunk.set_content(self._compress_chunk_content(chunk.content, query_tokens))
 
         logger.debug(f"Contexte compressé: {len(chunks)} -> {len(compressed_chunks)} chunks")
         return compressed_chunks
 
-    async def _compress_chunk_content(self, content: str, query: str) -> str:
-        """Compression d'un chunk individuel"""
-        # Stratégie simple de compression
-        sentences = content.split(".")
-
-        # Garder les phrases les plus pertinentes
-        relevant_sentences = []
-        query_words = set(query.lower().split())
-
-        for sentence in sentences:
-            sentence_words = set(sentence.lower().split())
-            relevance = len(query_words & sentence_words) / len(query_words) if query_words else 0
-
-            if relevance > 0.2 or len(relevant_sentences) < 3:
-                relevant_sentences.append(sentence.strip())
+    def _chunk_token_estimate(self, chunk: RetrievalResult) -> int:
+        """Tokens estimés d'un chunk, calculés une fois par contenu"""
+        if chunk.token_estimate is None:
+            self.stats["token_estimate_misses"] += 1
+            chunk.token_estimate = estimate_tokens(chunk.content)
+        else:
+            self.stats["token_estimate_hits"] += 1
+        return chunk.token_estimate
+
+    def _compress_chunk_content(self, content: str, query_tokens: frozenset[str]) -> str:
+        """Compression d'un chunk individuel (phrases en flux, arrêt à 5 retenues)"""
+        relevant_sentences: list[str] = []
+        min_overlap = 0.2 * len(query_tokens)  # relevance > 0.2 sans division
+
+        for match in SENTENCE_RE.finditer(content):
+            sentence = match.group().strip()
+            if not sentence:
+                continue
+
+            if len(relevant_sentences) >= MIN_COMPRESSED_SENTENCES:
+                # Élagage : phrase sans mot de la requête, rien à scorer
+                words = sentence.lower().split()
+                if query_tokens.isdisjoint(words):
+                    continue
+                if len(query_tokens.intersection(words)) <= min_overlap:
+                    continue
+
+            relevant_sentences.append(sentence)
+            if len(relevant_sentences) >= MAX_COMPRESSED_SENTENCES:
+                break
 
-        return (
-            ". ".join(relevant_sentences[:5]) + "." if relevant_sentences else content[:200] + "..."
-        )
+        return ". ".join(relevant_sentences) + "." if relevant_sentences else content[:200] + "..."
 
     async def _generate_fused_answer(self, chunks: list[RetrievalResult], query: str) -> str:
         """Génération avec fusion de réponses multiples"""
 
-        # Générer plusieurs réponses candidates
-        candidates = []
+        # Générer plusieurs réponses candidates, en parallèle
+        generations = []
 
         # Candidat 1: Réponse basée sur le chunk le plus pertinent
         if chunks:
-            primary_answer = await self._generate_answer_from_chunk(chunks[0], query)
-            candidates.append(primary_answer)
+            generations.append(self._generate_answer_from_chunk(chunks[0], query))
 
         # Candidat 2: Réponse basée sur la fusion des top chunks
         if len(chunks) >= 3:
             fused_context = "\n".join([chunk.content for chunk in chunks[:3]])
-            fused_answer = await self._generate_answer_from_context(fused_context, query)
-            candidates.append(fused_answer)
+            generations.append(self._generate_answer_from_context(fused_context, query))
 
         # Candidat 3: Réponse spécialisée selon l'intention
-        intent_answer = await self._generate_intent_based_answer(chunks, query)
-        if intent_answer:
-            candidates.append(intent_answer)
+        generations.append(self._generate_intent_based_answer(chunks, query))
+
+        results = await asyncio.gather(
+            *(self._guarded(generation) for generation in generations), return_exceptions=True
+        )
+
+        candidates = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Échec génération candidate: {result}")
+            elif result:
+                candidates.append(result)
 
         # Fusion des candidats
         if len(candidates) > 1:
@@ -438,6 +981,12 @@ class EnhancedRAGPipeline:
 
         return final_answer
 
+    async def _generate_cag_answer(self, query: str, repo_context: str) -> str:
+        """Génération sur le corpus préchargé du repo (sans récupération)"""
+        # Simulation - le contexte préchargé amortit le prefill entre requêtes
+        context = self.kv_cache[repo_context].context
+        return f"Corpus complet de {repo_context}: {context[:200]}... [Réponse pour: {query}]"
+
     async def _generate_single_answer(self, chunks: list[RetrievalResult], query: str) -> str:
         """Génération de réponse simple"""
         if not chunks:
@@ -483,6 +1032,7 @@ class EnhancedRAGPipeline:
 
         # Prendre les parties les plus informatives de chaque candidat
         fused_parts = []
+        seen_parts: set[str] = set()  # Déduplication en O(1) sans re-joindre les parties
 
         for i, candidate in enumerate(candidates):
             # Prendre une partie de chaque candidat
@@ -491,12 +1041,13 @@ class EnhancedRAGPipeline:
             end = start + part_length if i < len(candidates) - 1 else len(candidate)
 
             part = candidate[start:end].strip()
-            if part and part not in " ".join(fused_parts):
+            if part and part not in seen_parts:
+                seen_parts.add(part)
                 fused_parts.append(part)
 
         return " ".join(fused_parts)
 
-    async def _evaluate_response_quality(
+    def _evaluate_response_quality(
         self, answer: str, chunks: list[RetrievalResult], original_query: str
     ) -> dict[str, float]:
         """Évaluation de la qualité de la réponse"""
@@ -506,11 +1057,15 @@ class EnhancedRAGPipeline:
         # Score de cohérence
         scores["coherence"] = self._evaluate_coherence(answer)
 
+        # Mots de la réponse et de la requête, partagés par pertinence et complétude
+        answer_tokens = _tokenize(answer)
+        query_tokens = _tokenize(original_query)
+
         # Score de pertinence
-        scores["relevance"] = self._evaluate_relevance(answer, original_query)
+        scores["relevance"] = self._evaluate_relevance(answer_tokens, query_tokens)
 
         # Score de complétude
-        scores["completeness"] = self._evaluate_completeness(answer, original_query)
+        scores["completeness"] = self._evaluate_completeness(answer, answer_tokens, query_tokens)
 
         # Score de factualité (basé sur les sources)
         scores["factuality"] = self._evaluate_factuality(answer, chunks)
@@ -528,32 +1083,27 @@ class EnhancedRAGPipeline:
         length_score = 1.0 if 50 <= len(answer) <= 1000 else 0.6
 
         # Vérifier la structure
-        structure_score = (
-            1.0
-            if any(
-                word in answer.lower() for word in ["because", "therefore", "however", "moreover"]
-            )
-            else 0.7
-        )
+        structure_score = 1.0 if COHERENCE_MARKERS_RE.search(answer.lower()) else 0.7
 
         return (length_score + structure_score) / 2
 
-    def _evaluate_relevance(self, answer: str, query: str) -> float:
-        """Évaluation de la pertinence"""
-        query_words = set(query.lower().split())
-        answer_words = set(answer.lower().split())
-
-        overlap = len(query_words & answer_words)
-        relevance = overlap / len(query_words) if query_words else 0
+    def _evaluate_relevance(
+        self, answer_tokens: frozenset[str], query_tokens: frozenset[str]
+    ) -> float:
+        """Évaluation de la pertinence (ensembles de mots pré-calculés)"""
+        overlap = len(answer_tokens & query_tokens)
+        relevance = overlap / len(query_tokens) if query_tokens else 0
 
         return min(relevance * 1.5, 1.0)  # Boost la pertinence
 
-    def _evaluate_completeness(self, answer: str, query: str) -> float:
+    def _evaluate_completeness(
+        self, answer: str, answer_tokens: frozenset[str], query_tokens: frozenset[str]
+    ) -> float:
         """Évaluation de la complétude"""
         # Heuristiques simples
         has_explanation = len(answer) > 100
-        has_details = any(word in answer.lower() for word in ["example", "specifically", "detail"])
-        addresses_query = any(word in answer.lower() for word in query.lower().split())
+        has_details = DETAIL_MARKERS_RE.search(answer.lower()) is not None
+        addresses_query = not answer_tokens.isdisjoint(query_tokens)
 
         completeness = (
             (0.4 if has_explanation else 0)
@@ -595,13 +1145,17 @@ class EnhancedRAGPipeline:
         return source_confidence * 0.6 + quality_confidence * 0.4
 
     # Calcul des scores enrichis pour les chunks
-    async def _calculate_semantic_score(self, chunk: RetrievalResult, query: str) -> float:
+    def _calculate_semantic_score(
+        self, chunk: RetrievalResult, query_tokens: frozenset[str]
+    ) -> float:
         """Score sémantique enrichi"""
-        return await self._calculate_semantic_coherence(chunk.content, query)
+        return self._calculate_semantic_coherence(chunk.tokens, query_tokens)
 
-    async def _calculate_relevance_score(self, chunk: RetrievalResult, query: str) -> float:
+    def _calculate_relevance_score(
+        self, chunk: RetrievalResult, query_tokens: frozenset[str]
+    ) -> float:
         """Score de pertinence contextuelle"""
-        return self._evaluate_relevance(chunk.content, query)
+        return self._evaluate_relevance(chunk.tokens, query_tokens)
 
     def _calculate_freshness_score(self, _chunk: RetrievalResult) -> float:
         """Score de fraîcheur (basé sur les métadonnées)"""
@@ -610,26 +1164,27 @@ class EnhancedRAGPipeline:
 
     def _calculate_authority_score(self, chunk: RetrievalResult) -> float:
         """Score d'autorité du chunk"""
-        # Bonus pour certains types de fichiers
-        source = chunk.source.lower()
-        if source.endswith(".md"):
-            return 0.9  # Documentation
-        elif source.endswith(".py"):
-            return 0.8  # Code source
-        elif source.endswith(".test.py"):
-            return 0.7  # Tests
-        else:
-            return 0.6
-
-    def _calculate_combined_score(self, chunk: RetrievalResult) -> float:
-        """Score combiné final"""
-        return (
-            chunk.score * 0.3  # Score de similarité de base
-            + chunk.semantic_score * 0.25  # Score sémantique
-            + chunk.relevance_score * 0.2  # Score de pertinence
-            + chunk.freshness_score * 0.15  # Score de fraîcheur
-            + chunk.authority_score * 0.1  # Score d'autorité
-        )
+        # Bonus pour certains types de fichiers (extension calculée à la construction)
+        return AUTHORITY_BY_EXTENSION.get(chunk.extension, AUTHORITY_DEFAULT)
+
+    def _calculate_combined_scores(self, chunks: list[RetrievalResult]) -> np.ndarray:
+        """Scores combinés finaux (une ligne de composantes par chunk)"""
+        components = np.fromiter(
+            (
+                value
+                for chunk in chunks
+                for value in (
+                    chunk.score,  # Score de similarité de base
+                    chunk.semantic_score,  # Score sémantique
+                    chunk.relevance_score,  # Score de pertinence
+                    chunk.freshness_score,  # Score de fraîcheur
+                    chunk.authority_score,  # Score d'autorité
+                )
+            ),
+            dtype=np.float64,
+            count=len(chunks) * len(COMBINED_SCORE_WEIGHTS),
+        ).reshape(len(chunks), len(COMBINED_SCORE_WEIGHTS))
+        return _combined_score_kernel(components, COMBINED_SCORE_WEIGHTS)
 
     def _get_retrieval_stats(self) -> dict[str, Any]:
         """Statistiques de récupération"""
@@ -640,28 +1195,54 @@ class EnhancedRAGPipeline:
 
     def _get_generation_stats(self) -> dict[str, Any]:
         """Statistiques de génération"""
-        return {"avg_generation_time": self.stats["avg_generation_time"]}
+        return {
+            "avg_rerank_time": self.stats["avg_rerank_time"],
+            "avg_generation_time": self.stats["avg_generation_time"],
+        }
 
-    def _update_stats(self, response: RAGResponse):
-        """Mise à jour des statistiques"""
+    def _update_stats(self, stage_ns: dict[str, int]):
+        """Mise à jour des statistiques (EWMA des durées mesurées par étape)"""
         self.stats["total_queries"] += 1
 
-        # Mise à jour des moyennes (simple)
-        if self.stats["avg_retrieval_time"] == 0:
-            self.stats["avg_retrieval_time"] = (
-                response.processing_time * 0.6
-            )  # Estimation retrieval
-        else:
-            self.stats["avg_retrieval_time"] = (
-                self.stats["avg_retrieval_time"] * 0.9 + response.processing_time * 0.6 * 0.1
+        for stage, elapsed_ns in stage_ns.items():
+            key = STAGE_STATS_KEYS[stage]
+            elapsed = elapsed_ns / 1e9
+            prev = self.stats[key]
+            # Première mesure : NaN -> valeur brute, sans comparaison flottante à 0
+            self.stats[key] = (
+                elapsed
+                if math.isnan(prev)
+                else (1 - STATS_EWMA_ALPHA) * prev + STATS_EWMA_ALPHA * elapsed
             )
 
     def get_pipeline_stats(self) -> dict[str, Any]:
         """Obtenir les statistiques du pipeline"""
         return dict(self.stats)
 
+    def save_embeddings_cache(self, path: str | Path):
+        """Persiste le cache d'embeddings (npz compressé : digests sha256, int8, échelles)"""
+        if not self.embeddings_cache:
+            return
+        keys = np.frombuffer(b"".join(self.embeddings_cache), dtype=np.uint8).reshape(-1, 32)
+        entries = list(self.embeddings_cache.values())
+        np.savez_compressed(
+            path,
+            keys=keys,
+            values=np.stack([entry.values for entry in entries]),
+            scales=np.array([entry.scale for entry in entries], dtype=np.float32),
+        )
+
+    def load_embeddings_cache(self, path: str | Path):
+        """Recharge un cache d'embeddings persisté par save_embeddings_cache"""
+        with np.load(path) as data:
+            for key, values, scale in zip(
+                data["keys"], data["values"], data["scales"].tolist(), strict=True
+            ):
+                self.embeddings_cache[key.tobytes()] = QuantizedEmbedding(values, scale)
+
     def clear_caches(self):
         """Vider les caches"""
         self.embeddings_cache.clear()
         self.response_cache.clear()
+        self.kv_cache.clear()
         logger.info("Caches du pipeline RAG vidés")
@@ -3,13 +3,81 @@ Hyperion v2.9 - Response Optimizer
 Optimisation des réponses RAG avec techniques avancées
 """
 
+import asyncio
+import hashlib
+import json
 import logging
 import re
 import time
+from collections import Counter, OrderedDict
 from dataclasses import dataclass
+from itertools import pairwise
+
+try:
+    import xxhash
+
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Fragments entre deux points (segmentation des phrases en un passage)
+SENTENCE_RE = re.compile(r"[^.]+")
+
+# Blancs ASCII courants ramenés à une espace (boucle C de str.translate)
+WS_TABLE = str.maketrans({"\t": " ", "\n": " ", "\r": " "})
+
+# Lettres non ASCII égales à une lettre ASCII sous IGNORECASE que str.lower() ne ramène
+# pas à cette lettre (İ devient "i" + point combinant) : ramenées avant la recherche en table
+CASE_FOLD_TABLE = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s"})
+
+# Mots d'une phrase (tokens minuscules pour les tests de connecteurs)
+WORD_RE = re.compile(r"\w+")
+
+# Mots-clés des connecteurs logiques (tests par intersection d'ensembles)
+PREV_CONTRAST = frozenset({"however", "but", "although"})
+CURR_CONSEQUENCE = frozenset({"therefore", "thus", "consequently"})
+PREV_SEQUENCE_START = frozenset({"first", "firstly", "initially", "begin", "beginning"})
+CURR_SEQUENCE_NEXT = frozenset({"second", "then", "next", "additionally"})
+CURR_EXAMPLE = frozenset({"example", "examples", "instance", "specifically"})
+
+# Mots-clés techniques valorisant une phrase (singulier et pluriel)
+TECHNICAL_WORDS = frozenset(
+    {
+        "algorithm",
+        "algorithms",
+        "method",
+        "methods",
+        "technique",
+        "techniques",
+        "approach",
+        "approaches",
+        "implementation",
+        "implementations",
+        "configuration",
+        "configurations",
+    }
+)
+
+
+def _alternation(words) -> str:
+    """Alternance échappée des mots d'une table (les plus longs d'abord)."""
+    return "|".join(map(re.escape, sorted(words, key=len, reverse=True)))
+
+
+def _compile_alternation(words) -> re.Pattern:
+    """Une regex mots entiers pour toute une table."""
+    return re.compile(rf"\b(?:{_alternation(words)})\b", re.IGNORECASE)
+
+
+def _replacement(table: dict[str, str], matched: str) -> str:
+    """Remplacement d'un terme trouvé sans tenir compte de la casse (inchangé si absent)."""
+    key = matched.lower()
+    if key not in table:
+        key = matched.translate(CASE_FOLD_TABLE).lower()
+    return table.get(key, matched)
+
 
 @dataclass
 class OptimizationResult:
@@ -32,39 +100,103 @@ class OptimizationConfig:
     enable_factual_verification: bool = True
     target_length_words: int | None = None
     readability_target: str = "intermediate"  # basic, intermediate, advanced
+    cache_max_entries: int = 1024
+    min_length_chars: int = 0  # réponses plus courtes renvoyées telles quelles (0 = désactivé)
 
 
 class ResponseOptimizer:
     """Optimiseur de réponses RAG"""
 
+    # Registre de patterns partagé par toutes les instances (compilé une fois à l'import)
+    redundancy_patterns = (
+        r"\b(\w+)\s+\1\b",  # Mots répétés
+        r"(\b\w+\b)(?:\s+\w+){0,5}\s+\1",  # Répétitions proches
+        r"\b(et|and|or|ou)\s+\1\b",  # Connecteurs répétés
+    )
+
+    clarity_patterns = {
+        "passive_voice": r"\b(was|were|is|are|been)\s+\w+ed\b",
+        "filler_words": r"\b(actually|basically|literally|really|very|quite|rather)\b",
+        "complex_phrases": r"\b(in order to|as a matter of fact|it should be noted that)\b",
+    }
+
+    filler_words = ("actually", "basically", "literally", "really", "quite", "rather")
+    clarity_replacements = {
+        "in order to": "to",
+        "as a matter of fact": "in fact",
+        "it should be noted that": "",
+        "with regard to": "about",
+        "in the event that": "if",
+    }
+    vocabulary_replacements = {
+        "utilize": "use",
+        "implement": "use",
+        "methodology": "method",
+        "optimization": "improvement",
+        "configuration": "setup",
+        "subsequently": "then",
+        "therefore": "so",
+        "furthermore": "also",
+        "consequently": "so",
+    }
+    moderate_replacements = {
+        "subsequently": "then",
+        "furthermore": "also",
+        "consequently": "therefore",
+    }
+
+    # Regex compilées une fois pour la classe
+    _redundancy_res = tuple(re.compile(p, re.IGNORECASE) for p in redundancy_patterns)
+    _clarity_res = {
+        name: re.compile(pattern, re.IGNORECASE) for name, pattern in clarity_patterns.items()
+    }
+    # Une alternance à groupes nommés : un passage compte les trois critères
+    _clarity_re = re.compile(
+        "|".join(f"(?P<{name}>{pattern})" for name, pattern in clarity_patterns.items()),
+        re.IGNORECASE,
+    )
+    _passive_was_re = re.compile(r"\bwas (\w+)ed by\b")
+    _passive_were_re = re.compile(r"\bwere (\w+)ed by\b")
+    # Réécritures de clarté fusionnées : un passage, dispatch sur le groupe nommé
+    _clarity_rewrites = (
+        rf"(?P<filler>\b(?:{_alternation(filler_words)})\s+)"
+        rf"|(?P<complex>\b(?:{_alternation(clarity_replacements)})\b)"
+    )
+    _clarity_rewrite_re = re.compile(_clarity_rewrites, re.IGNORECASE)
+    # Variante incluant la simplification "intermediate" (étapes 2 et 5 fusionnées)
+    _clarity_moderate_rewrite_re = re.compile(
+        rf"{_clarity_rewrites}|(?P<vocabulary>\b(?:{_alternation(moderate_replacements)})\b)",
+        re.IGNORECASE,
+    )
+    _vocabulary_re = _compile_alternation(vocabulary_replacements)
+    _moderate_re = _compile_alternation(moderate_replacements)
+    _whitespace_re = re.compile(r"\s+")
+
     def __init__(self, config: OptimizationConfig = None):
         self.config = config or OptimizationConfig()
-        self.optimization_cache = {}
+        self.optimization_cache: OrderedDict[str, OptimizationResult] = OrderedDict()  # LRU
 
-        # Patterns pour l'optimisation
-        self.redundancy_patterns = [
-            r"\b(\w+)\s+\1\b",  # Mots répétés
-            r"(\b\w+\b)(?:\s+\w+){0,5}\s+\1",  # Répétitions proches
-            r"\b(et|and|or|ou)\s+\1\b",  # Connecteurs répétés
-        ]
-
-        self.clarity_patterns = {
-            "passive_voice": r"\b(was|were|is|are|been)\s+\w+ed\b",
-            "filler_words": r"\b(actually|basically|literally|really|very|quite|rather)\b",
-            "complex_phrases": r"\b(in order to|as a matter of fact|it should be noted that)\b",
-        }
-
-    async def optimize_response(
-        self, response: str, context: dict | None = None
-    ) -> OptimizationResult:
-        """Optimise une réponse RAG"""
+    def optimize_response(self, response: str, context: dict | None = None) -> OptimizationResult:
+        """Optimise une réponse RAG (calcul pur, synchrone)"""
         start_time = time.time()
 
+        # Réponse trop courte : aucune passe (ni hachage de clé de cache) ne vaut le coût
+        if len(response) < self.config.min_length_chars:
+            return OptimizationResult(
+                original_response=response,
+                optimized_response=response,
+                optimization_score=0.0,
+                techniques_applied=[],
+                processing_time=time.time() - start_time,
+            )
+
         # Vérifier le cache
-        cache_key = f"{hash(response)}_{hash(str(context))}"
-        if cache_key in self.optimization_cache:
+        cache_key = self._make_cache_key(response, context)
+        cached = self.optimization_cache.get(cache_key)
+        if cached is not None:
             logger.debug("Réponse trouvée en cache")
-            return self.optimization_cache[cache_key]
+            self.optimization_cache.move_to_end(cache_key)
+            return cached
 
         original_response = response
         optimized_response = response
@@ -77,17 +209,24 @@ class ResponseOptimizer:
                 if redundancy_removed:
                     techniques_applied.append("redundancy_removal")
 
-            # 2. Amélioration de la clarté
+            # 2. Amélioration de la clarté (fusionnée avec la lisibilité "intermediate"
+            # quand aucune étape dépendante de l'ordre ne s'intercale)
+            fused_readability = readability_improved = False
             if self.config.enable_clarity_enhancement:
-                optimized_response, clarity_improved = self._enhance_clarity(optimized_response)
+                fused_readability = (
+                    self.config.readability_target == "intermediate"
+                    and not self.config.enable_coherence_check
+                    and not self.config.target_length_words
+                )
+                optimized_response, clarity_improved, readability_improved = self._clarity_pass(
+                    optimized_response, fused_readability
+                )
                 if clarity_improved:
                     techniques_applied.append("clarity_enhancement")
 
             # 3. Vérification de cohérence
             if self.config.enable_coherence_check:
-                optimized_response, coherence_improved = await self._improve_coherence(
-                    optimized_response
-                )
+                optimized_response, coherence_improved = self._improve_coherence(optimized_response)
                 if coherence_improved:
                     techniques_applied.append("coherence_improvement")
 
@@ -99,10 +238,11 @@ class ResponseOptimizer:
                 if length_adjusted:
                     techniques_applied.append("length_adjustment")
 
-            # 5. Optimisation de lisibilité
-            optimized_response, readability_improved = self._improve_readability(
-                optimized_response, self.config.readability_target
-            )
+            # 5. Optimisation de lisibilité (déjà appliquée si fusionnée à l'étape 2)
+            if not fused_readability:
+                optimized_response, readability_improved = self._improve_readability(
+                    optimized_response, self.config.readability_target
+                )
             if readability_improved:
                 techniques_applied.append("readability_improvement")
 
@@ -121,8 +261,10 @@ class ResponseOptimizer:
                 processing_time=processing_time,
             )
 
-            # Mettre en cache
+            # Mettre en cache (éviction de la moins récemment utilisée)
             self.optimization_cache[cache_key] = result
+            if len(self.optimization_cache) > self.config.cache_max_entries:
+                self.optimization_cache.popitem(last=False)
 
             logger.info(
                 f"Réponse optimisée: score={optimization_score:.2f}, techniques={len(techniques_applied)}"
@@ -140,27 +282,49 @@ class ResponseOptimizer:
                 processing_time=time.time() - start_time,
             )
 
+    async def optimize_response_async(
+        self, response: str, context: dict | None = None
+    ) -> OptimizationResult:
+        """Optimise une réponse dans un thread, hors de la boucle d'événements"""
+        return await asyncio.to_thread(self.optimize_response, response, context)
+
+    @staticmethod
+    def _make_cache_key(response: str, context: dict | None) -> str:
+        """Clé de cache stable entre processus (XXH3-128 si disponible, sinon BLAKE2b)"""
+        data = response.encode("utf-8", "surrogatepass")
+        if XXHASH_AVAILABLE:
+            digest = xxhash.xxh3_128(data)
+        else:
+            digest = hashlib.blake2b(data, digest_size=16)
+        try:
+            context_key = json.dumps(context, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            # Clés de types mélangés (non triables) ou références circulaires : repr
+            context_key = repr(context)
+        digest.update(b"\0")
+        digest.update(context_key.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _sentences(text: str) -> list[str]:
+        """Phrases non vides du texte, sans espaces de bord"""
+        return [
+            sentence for match in SENTENCE_RE.finditer(text) if (sentence := match.group().strip())
+        ]
+
     def _remove_redundancy(self, text: str) -> tuple[str, bool]:
         """Supprime les redondances du texte"""
         original_text = text
 
-        for pattern in self.redundancy_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                text = re.sub(pattern, r"\1", text, flags=re.IGNORECASE)
+        for pattern in self._redundancy_res:
+            text = pattern.sub(r"\1", text)
 
-        # Supprimer les phrases répétitives
-        sentences = text.split(".")
-        unique_sentences = []
-        seen_sentences = set()
+        # Supprimer les phrases répétitives (dict ordonné : minuscules -> première occurrence)
+        unique_sentences: dict[str, str] = {}
+        for sentence in self._sentences(text):
+            unique_sentences.setdefault(sentence.lower(), sentence)
 
-        for sentence in sentences:
-            sentence_clean = sentence.strip().lower()
-            if sentence_clean and sentence_clean not in seen_sentences:
-                unique_sentences.append(sentence.strip())
-                seen_sentences.add(sentence_clean)
-
-        text = ". ".join(unique_sentences)
+        text = ". ".join(unique_sentences.values())
         if text and not text.endswith("."):
             text += "."
 
@@ -168,42 +332,55 @@ class ResponseOptimizer:
 
     def _enhance_clarity(self, text: str) -> tuple[str, bool]:
         """Améliore la clarté du texte"""
+        text, clarity_improved, _ = self._clarity_pass(text)
+        return text, clarity_improved
+
+    def _clarity_pass(self, text: str, with_readability: bool = False) -> tuple[str, bool, bool]:
+        """Clarté (et lisibilité "intermediate" si demandée) en un passage regex
+
+        Retourne le texte, puis si la clarté et la lisibilité ont été améliorées.
+        """
         original_text = text
 
         # Simplifier les phrases passives
-        passive_matches = re.findall(self.clarity_patterns["passive_voice"], text)
-        if passive_matches:
+        if self._clarity_res["passive_voice"].search(text):
             # Conversion simple: remplacer par des formes actives
-            text = re.sub(r"\bwas (\w+)ed by\b", r"\\1", text)
-            text = re.sub(r"\bwere (\w+)ed by\b", r"\\1", text)
-
-        # Supprimer les mots de remplissage
-        for filler_word in ["actually", "basically", "literally", "really", "quite", "rather"]:
-            text = re.sub(f"\\b{filler_word}\\s+", "", text, flags=re.IGNORECASE)
-
-        # Simplifier les phrases complexes
-        replacements = {
-            "in order to": "to",
-            "as a matter of fact": "in fact",
-            "it should be noted that": "",
-            "with regard to": "about",
-            "in the event that": "if",
-        }
-
-        for complex_phrase, simple_phrase in replacements.items():
-            text = re.sub(
-                f"\\b{re.escape(complex_phrase)}\\b", simple_phrase, text, flags=re.IGNORECASE
-            )
+            text = self._passive_was_re.sub(r"\\1", text)
+            text = self._passive_were_re.sub(r"\\1", text)
+        passive_changed = text != original_text
+
+        # Remplissage, phrases complexes (et vocabulaire) : un seul passage
+        fired: set[str] = set()
+
+        def rewrite(match: re.Match) -> str:
+            group = match.lastgroup
+            fired.add(group)
+            if group == "filler":
+                return ""
+            table = self.clarity_replacements if group == "complex" else self.moderate_replacements
+            return _replacement(table, match.group())
+
+        if with_readability:
+            text = self._clarity_moderate_rewrite_re.sub(rewrite, text)
+        else:
+            text = self._clarity_rewrite_re.sub(rewrite, text)
 
         # Nettoyer les espaces multiples
-        text = re.sub(r"\s+", " ", text).strip()
-
-        return text, text != original_text
-
-    async def _improve_coherence(self, text: str) -> tuple[str, bool]:
+        rewritten = text
+        text = text.translate(WS_TABLE)
+        # Tout blanc autre qu'une espace simple est non imprimable : la regex ne sert
+        # que sur un double espace ou un texte non imprimable (balayages natifs)
+        if "  " in text or not text.isprintable():
+            text = self._whitespace_re.sub(" ", text)
+        text = text.strip()
+
+        clarity_improved = passive_changed or bool(fired - {"vocabulary"}) or text != rewritten
+        return text, clarity_improved, "vocabulary" in fired
+
+    def _improve_coherence(self, text: str) -> tuple[str, bool]:
         """Améliore la cohérence du texte"""
         original_text = text
-        sentences = text.split(".")
+        sentences = self._sentences(text)
 
         if len(sentences) < 2:
             return text, False
@@ -211,15 +388,15 @@ class ResponseOptimizer:
         # Ajouter des connecteurs logiques si nécessaire
         improved_sentences = [sentences[0]]
 
-        for i, sentence in enumerate(sentences[1:], 1):
-            sentence = sentence.strip()
-            if not sentence:
-                continue
+        # Tokens de chaque phrase calculés une seule fois
+        tokens = [set(WORD_RE.findall(sentence.lower())) for sentence in sentences]
 
-            prev_sentence = sentences[i - 1].strip()
+        for (prev_tokens, _), (curr_tokens, sentence) in pairwise(
+            zip(tokens, sentences, strict=True)
+        ):
 
             # Détecter le type de relation et ajouter un connecteur si nécessaire
-            connector = self._suggest_connector(prev_sentence, sentence)
+            connector = self._suggest_connector(prev_tokens, curr_tokens)
             if connector:
                 sentence = f"{connector} {sentence.lower()}"
 
@@ -231,28 +408,20 @@ class ResponseOptimizer:
 
         return improved_text, improved_text != original_text
 
-    def _suggest_connector(self, prev_sentence: str, current_sentence: str) -> str | None:
-        """Suggère un connecteur logique entre deux phrases"""
-        prev_lower = prev_sentence.lower()
-        current_lower = current_sentence.lower()
-
+    def _suggest_connector(self, prev_tokens: set[str], curr_tokens: set[str]) -> str | None:
+        """Suggère un connecteur logique entre deux phrases (ensembles de tokens)"""
         # Règles simples pour les connecteurs
-        if any(word in prev_lower for word in ["however", "but", "although"]) and not any(
-            word in current_lower for word in ["therefore", "thus", "consequently"]
-        ):
+        if PREV_CONTRAST & prev_tokens and not CURR_CONSEQUENCE & curr_tokens:
             return None  # Pas besoin d'autre connecteur
 
-        if any(word in prev_lower for word in ["first", "initially", "begin"]):
-            if any(word in current_lower for word in ["second", "then", "next", "additionally"]):
+        if PREV_SEQUENCE_START & prev_tokens:
+            if CURR_SEQUENCE_NEXT & curr_tokens:
                 return None
             return "Additionally"
 
-        if any(word in current_lower for word in ["example", "instance", "specifically"]):
+        if CURR_EXAMPLE & curr_tokens:
             return "For example"
 
-        if any(word in current_lower for word in ["result", "conclusion", "therefore"]):
-            return None  # Déjà explicite
-
         return None
 
     def _adjust_length(self, text: str, target_words: int) -> tuple[str, bool]:
@@ -264,17 +433,13 @@ class ResponseOptimizer:
             return text, False
 
         # Réduire progressivement
-        sentences = text.split(".")
+        sentences = self._sentences(text)
 
         # D'abord, supprimer les phrases les moins importantes
         if len(sentences) > 1:
             # Garder les phrases avec le plus d'informations
-            sentence_scores = []
-            for sentence in sentences:
-                if not sentence.strip():
-                    continue
-                score = self._calculate_sentence_importance(sentence)
-                sentence_scores.append((sentence, score))
+            scores = self._sentence_importance_scores(sentences)
+            sentence_scores = list(zip(sentences, scores, strict=True))
 
             # Trier par importance
             sentence_scores.sort(key=lambda x: x[1], reverse=True)
@@ -286,7 +451,7 @@ class ResponseOptimizer:
             for sentence, _score in sentence_scores:
                 sentence_words = len(sentence.split())
                 if word_count + sentence_words <= target_words:
-                    kept_sentences.append(sentence.strip())
+                    kept_sentences.append(sentence)
                     word_count += sentence_words
                 else:
                     break
@@ -310,33 +475,29 @@ class ResponseOptimizer:
 
         return truncated_text, True
 
-    def _calculate_sentence_importance(self, sentence: str) -> float:
-        """Calcule l'importance d'une phrase"""
-        # Critères d'importance
+    def _sentence_importance_scores(self, sentences: list[str]) -> list[float]:
+        """Calcule l'importance de chaque phrase (liste parallèle de scores)"""
+        return [self._sentence_importance(sentence) for sentence in sentences]
+
+    @staticmethod
+    def _sentence_importance(sentence: str) -> float:
+        """Importance d'une phrase : longueur, mots-clés techniques, ouverture"""
+        words = sentence.split()
         score = 0.0
 
         # Longueur (phrases moyennes sont souvent plus informatives)
-        word_count = len(sentence.split())
+        word_count = len(words)
         if 10 <= word_count <= 25:
             score += 1.0
         elif word_count < 5:
             score -= 0.5
 
-        # Présence de mots-clés techniques
-        technical_words = [
-            "algorithm",
-            "method",
-            "technique",
-            "approach",
-            "implementation",
-            "configuration",
-        ]
-        for word in technical_words:
-            if word in sentence.lower():
-                score += 0.5
+        # Présence de mots-clés techniques (intersection d'ensembles)
+        tokens = set(WORD_RE.findall(sentence.lower()))
+        score += 0.5 * len(TECHNICAL_WORDS & tokens)
 
         # Position (première phrase souvent importante)
-        if sentence.strip().startswith(("The", "This", "It", "To")):
+        if words and words[0].startswith(("The", "This", "It", "To")):
             score += 0.3
 
         return score
@@ -358,33 +519,15 @@ class ResponseOptimizer:
 
     def _simplify_vocabulary(self, text: str) -> str:
         """Simplifie le vocabulaire"""
-        replacements = {
-            "utilize": "use",
-            "implement": "use",
-            "methodology": "method",
-            "optimization": "improvement",
-            "configuration": "setup",
-            "subsequently": "then",
-            "therefore": "so",
-            "furthermore": "also",
-            "consequently": "so",
-        }
-
-        for complex_word, simple_word in replacements.items():
-            text = re.sub(f"\\b{complex_word}\\b", simple_word, text, flags=re.IGNORECASE)
-
-        return text
+        return self._vocabulary_re.sub(
+            lambda m: _replacement(self.vocabulary_replacements, m.group(0)), text
+        )
 
     def _shorten_sentences(self, text: str) -> str:
         """Raccourcit les phrases longues"""
-        sentences = text.split(".")
         shortened = []
 
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-
+        for sentence in self._sentences(text):
             words = sentence.split()
             if len(words) > 20:
                 # Diviser en plusieurs phrases
@@ -407,12 +550,9 @@ class ResponseOptimizer:
     def _moderate_simplification(self, text: str) -> str:
         """Simplification modérée"""
         # Remplacer seulement les termes les plus complexes
-        replacements = {"subsequently": "then", "furthermore": "also", "consequently": "therefore"}
-
-        for complex_word, simple_word in replacements.items():
-            text = re.sub(f"\\b{complex_word}\\b", simple_word, text, flags=re.IGNORECASE)
-
-        return text
+        return self._moderate_re.sub(
+            lambda m: _replacement(self.moderate_replacements, m.group(0)), text
+        )
 
     def _calculate_optimization_score(self, original: str, optimized: str) -> float:
         """Calcule un score d'optimisation"""
@@ -440,29 +580,25 @@ class ResponseOptimizer:
 
     def _calculate_clarity_score(self, original: str, optimized: str) -> float:
         """Score basé sur l'amélioration de clarté"""
-        # Compter les améliorations de clarté
-        improvements = 0
-
-        # Moins de voix passive
-        original_passive = len(re.findall(self.clarity_patterns["passive_voice"], original))
-        optimized_passive = len(re.findall(self.clarity_patterns["passive_voice"], optimized))
-        if optimized_passive < original_passive:
-            improvements += 1
-
-        # Moins de mots de remplissage
-        original_fillers = len(re.findall(self.clarity_patterns["filler_words"], original))
-        optimized_fillers = len(re.findall(self.clarity_patterns["filler_words"], optimized))
-        if optimized_fillers < original_fillers:
-            improvements += 1
-
-        # Moins de phrases complexes
-        original_complex = len(re.findall(self.clarity_patterns["complex_phrases"], original))
-        optimized_complex = len(re.findall(self.clarity_patterns["complex_phrases"], optimized))
-        if optimized_complex < original_complex:
-            improvements += 1
+        # Texte inchangé : aucun critère ne peut baisser, inutile de compter
+        if optimized == original:
+            return 0.0
+
+        # Un passage par texte pour la voix passive, le remplissage et les phrases complexes
+        original_counts = self._count_clarity_issues(original)
+        optimized_counts = self._count_clarity_issues(optimized)
+
+        # Une amélioration par critère en baisse
+        improvements = sum(
+            optimized_counts[name] < original_counts[name] for name in self.clarity_patterns
+        )
 
         return improvements / 3.0  # Normaliser sur 3 critères
 
+    def _count_clarity_issues(self, text: str) -> Counter:
+        """Occurrences de chaque critère de clarté, en une seule passe regex"""
+        return Counter(match.lastgroup for match in self._clarity_re.finditer(text))
+
 
 # Instance globale avec configuration par défaut
 default_optimizer = ResponseOptimizer()
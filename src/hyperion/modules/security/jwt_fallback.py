@@ -7,54 +7,136 @@ import hashlib
 import hmac
 import json
 import time
+from calendar import timegm
+from datetime import datetime
+from functools import lru_cache
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Options orjson alignées sur json.dumps : clés non str acceptées, datetime et
+# dataclasses refusés (TypeError) au lieu d'être sérialisés d'office
+_ORJSON_OPTIONS = (
+    (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+    if ORJSON_AVAILABLE
+    else 0
+)
+
+# Claims temporels convertis en timestamps entiers à l'encodage, comme PyJWT
+_TIME_CLAIMS = ("exp", "iat", "nbf")
+
+
+def _dumps(obj) -> bytes:
+    """JSON compact en octets (orjson si disponible, mêmes entrées acceptées que json)"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass  # Cas hors orjson (entiers > 64 bits...) : json tranche
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _time_claims_to_timestamps(payload: dict) -> dict:
+    """Copie du payload où les claims exp/iat/nbf datetime deviennent des timestamps UTC"""
+    converted = {
+        claim: timegm(payload[claim].utctimetuple())
+        for claim in _TIME_CLAIMS
+        if isinstance(payload.get(claim), datetime)
+    }
+    return {**payload, **converted} if converted else payload
+
+
+# Padding base64 à ajouter selon la longueur modulo 4
+_PAD = (b"", b"===", b"==", b"=")
+
+
+def _b64(data: bytes) -> bytes:
+    """Base64 URL-safe sans padding, en octets"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+@lru_cache(maxsize=8)
+def _header_b64(algorithm: str) -> bytes:
+    """En-tête encodé, invariant pour un algorithme donné"""
+    return _b64(_dumps({"typ": "JWT", "alg": algorithm}))
+
+
+_header_b64("HS256")  # En-tête par défaut encodé au chargement
+
+
+@lru_cache(maxsize=64)
+def _hmac_prototype(key: bytes) -> hmac.HMAC:
+    """HMAC-SHA256 déjà initialisé avec la clé (pads calculés une fois, copié à chaque usage)"""
+    return hmac.new(key, None, hashlib.sha256)
+
+
+def _sign(key: str, message: bytes) -> bytes:
+    """Signature HMAC-SHA256 encodée en base64 URL-safe"""
+    mac = _hmac_prototype(key.encode()).copy()
+    mac.update(message)
+    return _b64(mac.digest())
 
 
 class jwt:
     @staticmethod
     def encode(payload, key, algorithm="HS256"):
         """Mock JWT encode"""
-        header = {"typ": "JWT", "alg": algorithm}
-
-        # Encoder header et payload en base64
-        header_b64 = base64.urlsafe_b64encode(json.dumps(header).encode()).decode().rstrip("=")
-        payload_b64 = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+        # Tout en octets : un seul décodage ASCII à la fin
+        payload = _time_claims_to_timestamps(payload)
+        message = _header_b64(algorithm) + b"." + _b64(_dumps(payload))
 
         # Créer signature simple
-        message = f"{header_b64}.{payload_b64}"
-        signature = (
-            base64.urlsafe_b64encode(
-                hmac.new(key.encode(), message.encode(), hashlib.sha256).digest()
-            )
-            .decode()
-            .rstrip("=")
-        )
+        signature = _sign(key, message)
 
-        return f"{header_b64}.{payload_b64}.{signature}"
+        return (message + b"." + signature).decode("ascii")
 
     @staticmethod
-    def decode(token, _key, _algorithms=None):
+    def decode(token, key, algorithms=None):
         """Mock JWT decode"""
+        # Tout en octets : découpage, signature et payload sans repasser par str
+        try:
+            parts = token.encode("ascii").split(b".")
+        except (AttributeError, UnicodeEncodeError) as e:
+            raise jwt.InvalidTokenError(f"Invalid token: {e}") from e
+        if len(parts) != 3:
+            raise jwt.InvalidTokenError("Invalid token format")
+
+        # Le fallback signe toujours en HMAC-SHA256
+        if algorithms is not None and "HS256" not in algorithms:
+            raise jwt.InvalidTokenError("Unsupported algorithm")
+
+        # Vérifier la signature (comparaison à temps constant)
+        header_part, payload_part, signature = parts
+        message = header_part + b"." + payload_part
+        if not hmac.compare_digest(_sign(key, message), signature):
+            raise jwt.InvalidTokenError("Invalid signature")
+
+        # Décoder le payload (padding lu dans la table)
+        payload_part += _PAD[len(payload_part) & 3]
         try:
-            parts = token.split(".")
-            if len(parts) != 3:
-                raise Exception("Invalid token format")
-
-            # Décoder le payload
-            payload_part = parts[1]
-            # Ajouter padding si nécessaire
-            payload_part += "=" * (4 - len(payload_part) % 4)
             payload = json.loads(base64.urlsafe_b64decode(payload_part))
+        except ValueError as e:  # binascii.Error, JSONDecodeError, UnicodeDecodeError
+            raise jwt.InvalidTokenError(f"Invalid token: {e}") from e
+        if not isinstance(payload, dict):
+            raise jwt.InvalidTokenError("Invalid token payload")
 
-            # Vérifier expiration
-            if "exp" in payload and payload["exp"] < time.time():
-                raise Exception("Token expired")
+        # Vérifier expiration
+        exp = payload.get("exp")
+        if exp is not None:
+            if not isinstance(exp, int | float):
+                raise jwt.InvalidTokenError("Invalid expiration")
+            if exp < time.time():
+                raise jwt.ExpiredSignatureError("Token expired")
 
-            return payload
-        except Exception as e:
-            raise Exception(f"Invalid token: {e}") from e
+        return payload
 
     class InvalidTokenError(Exception):
         pass
 
-    class ExpiredSignatureError(Exception):
+    class ExpiredSignatureError(InvalidTokenError):
         pass
@@ -3,16 +3,190 @@ Hyperion v3.0 - Audit de Sécurité Enterprise
 Audit complet des vulnérabilités et conformité sécurité
 """
 
+import bisect
 import hashlib
 import json
 import logging
+import mmap
+import os
+import re
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import re2
+
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+try:
+    import ahocorasick
+
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import hyperscan
+
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Blanc hors "\n" au sens de str.isspace : \s de RE2/Hyperscan diffère, d'où l'énumération
+UNICODE_LINE_SPACE = r"[\t\x0b\x0c\r\x1c-\x1f\x85\pZ]"
+LINE_SPACE = UNICODE_LINE_SPACE if RE2_AVAILABLE else r"[^\S\n]"
+
+# Extensions scannées (ordre des fichiers dans le rapport : par extension)
+SCAN_EXTENSIONS = (".py", ".js", ".ts", ".java", ".php", ".rb")
+
+# Scan parallèle : pool de processus au-delà de ce nombre de fichiers (démarrage amorti),
+# seulement avec plusieurs cœurs
+PARALLEL_SCAN_MIN_FILES = 64
+PARALLEL_SCAN_CHUNKSIZE = 16
+
+# Fichiers projetés en mémoire (mmap) et scannés en octets au-delà de cette taille
+# (scan regex uniquement, sans base Hyperscan)
+MMAP_MIN_BYTES = 1 << 20
+
+# Scan en octets : blancs ASCII d'une ligne et fins de ligne universelles (comme la lecture
+# texte, qui ramène "\r\n" et "\r" à "\n")
+BYTES_LINE_SPACE = r"[\t\x0b\x0c ]"
+BYTES_NEWLINE_RE = re.compile(rb"\r\n|\r|\n")
+
+# Poids du score de risque par sévérité (sévérité inconnue : poids de "low")
+SEVERITY_WEIGHTS = {"critical": 10, "high": 7, "medium": 4, "low": 1}
+
+# Lettres non ASCII égales à une lettre ASCII sous IGNORECASE (re, RE2) que str.lower()
+# ne ramène pas à cette lettre (İ devient "i" + point combinant) : ramenées avant le préfiltre
+ANCHOR_FOLD_TABLE = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s"})
+
+
+def _line_bounded(raw_pattern: str, line_space: str = LINE_SPACE) -> str:
+    """Variante d'un pattern qui ne franchit jamais un saut de ligne.
+
+    Sur une ligne isolée elle est équivalente à l'original : \\s (LINE_SPACE) et [^...]
+    y excluent simplement le "\\n", ce qui permet de scanner le fichier entier d'un passage.
+    """
+    return raw_pattern.replace("[^", r"[^\n").replace(r"\s", line_space)
+
+
+def _bytes_line_bounded(raw_pattern: str) -> bytes:
+    """Variante octets de _line_bounded, qui ne franchit ni "\\r" ni "\\n".
+
+    Hors classe, "." et \\s deviennent [^\\r\\n] et BYTES_LINE_SPACE ; [^...] exclut
+    aussi les deux fins de ligne.
+    """
+    parts = []
+    in_class = False
+    i = 0
+    while i < len(raw_pattern):
+        char = raw_pattern[i]
+        if char == "\\":
+            escape = raw_pattern[i : i + 2]
+            parts.append(BYTES_LINE_SPACE if escape == r"\s" and not in_class else escape)
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            if raw_pattern.startswith("^", i + 1):
+                char = r"[^\r\n"
+                i += 1
+        elif char == ".":
+            char = r"[^\r\n]"
+        parts.append(char)
+        i += 1
+    return "".join(parts).encode()
+
+
+def _compile_pattern(pattern: str):
+    """Compile insensible à la casse : RE2 si disponible (temps linéaire, pas de ReDoS)"""
+    if RE2_AVAILABLE:
+        return re2.compile(f"(?i){pattern}")
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _compile_bytes_pattern(pattern: bytes):
+    """Compile en octets, casse ignorée : RE2 en Latin-1 si disponible (un octet par
+    caractère, octets UTF-8 invalides compris), sinon re"""
+    if RE2_AVAILABLE:
+        options = re2.Options()
+        options.encoding = re2.Options.Encoding.LATIN1
+        options.case_sensitive = False
+        return re2.compile(pattern, options)
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _compile_vulnerability_patterns(pattern_spec: dict[str, Any]) -> dict[str, Any]:
+    """Compile une spécification de patterns (sources brutes) pour le scan.
+
+    Paires (regex compilée, source) : la source sert à l'identifiant de vulnérabilité.
+    Les regex sont bornées à une ligne pour scanner le fichier entier d'un passage ;
+    l'union de chaque catégorie (groupe p<i> = pattern i) la rejette en un passage.
+    """
+    compiled = {}
+    for vuln_type, vuln_config in pattern_spec.items():
+        raw_patterns = vuln_config["patterns"]
+        compiled[vuln_type] = {
+            **vuln_config,
+            "patterns": [(_compile_pattern(_line_bounded(raw)), raw) for raw in raw_patterns],
+            "combined": _compile_pattern(
+                "|".join(f"(?P<p{i}>{_line_bounded(raw)})" for i, raw in enumerate(raw_patterns))
+            ),
+            # Variantes octets (blancs et casse ASCII) pour les fichiers projetés en mémoire
+            "bytes_patterns": [
+                (_compile_bytes_pattern(_bytes_line_bounded(raw)), raw) for raw in raw_patterns
+            ],
+            "bytes_combined": _compile_bytes_pattern(
+                b"|".join(_bytes_line_bounded(raw) for raw in raw_patterns)
+            ),
+        }
+    return compiled
+
+
+def _build_anchor_index(
+    pattern_spec: dict[str, Any],
+) -> tuple[dict[str, frozenset[str]], frozenset[str]]:
+    """Littéraux d'ancrage (minuscules) -> catégories, et catégories sans ancrage.
+
+    Tout match d'un pattern de la catégorie contient l'un de ses littéraux "anchors" :
+    une catégorie sans littéral présent dans le fichier n'a pas besoin de ses regex.
+    """
+    literals: dict[str, set[str]] = {}
+    unanchored = set()
+    for vuln_type, vuln_config in pattern_spec.items():
+        anchors = vuln_config.get("anchors")
+        if not anchors:
+            unanchored.add(vuln_type)  # Toujours scannée
+            continue
+        for anchor in anchors:
+            literals.setdefault(anchor.lower(), set()).add(vuln_type)
+    return {literal: frozenset(types) for literal, types in literals.items()}, frozenset(unanchored)
+
+
+def _line_span(newline_offsets: list[int], index: int, length: int) -> tuple[int, int]:
+    """Bornes [début, fin) de la ligne d'indice index, d'après les offsets des sauts de ligne"""
+    start = newline_offsets[index - 1] + 1 if index else 0
+    end = newline_offsets[index] if index < len(newline_offsets) else length
+    return start, end
+
 
 @dataclass
 class SecurityVulnerability:
@@ -61,13 +235,59 @@ class SecurityAuditReport:
 class SecurityAuditor:
     """Auditeur de sécurité enterprise"""
 
-    def __init__(self):
+    def __init__(self, pattern_spec: dict[str, Any] | None = None):
         self.audit_history: list[SecurityAuditReport] = []
-        self.vulnerability_patterns = self._load_vulnerability_patterns()
+        # Index des audits par identifiant (recherche O(1) dans compare_audits)
+        self._audits_by_id: dict[str, SecurityAuditReport] = {}
+        # Sources brutes (transmissibles aux processus de scan) et regex compilées une fois
+        self.pattern_spec = pattern_spec or self._load_vulnerability_patterns()
+        self.vulnerability_patterns = _compile_vulnerability_patterns(self.pattern_spec)
         self.compliance_frameworks = self._load_compliance_frameworks()
 
+        # Base Hyperscan unique : tous les patterns, un seul passage par fichier
+        self._hs_db = None
+        self._hs_entries: list[tuple[str, str]] = []  # id -> (catégorie, source)
+        self._hs_local = threading.local()  # Un scratch par thread
+        if HYPERSCAN_AVAILABLE:
+            self._build_hyperscan_database()
+
+        # Préfiltre littéral du scan regex : automate Aho-Corasick, sinon recherche par littéral
+        self._anchor_literals, self._unanchored_types = _build_anchor_index(self.pattern_spec)
+        self._anchor_automaton = None
+        if AHOCORASICK_AVAILABLE and self._anchor_literals:
+            automaton = ahocorasick.Automaton()
+            for literal, vuln_types in self._anchor_literals.items():
+                automaton.add_word(literal, vuln_types)
+            automaton.make_automaton()
+            self._anchor_automaton = automaton
+
+    def _build_hyperscan_database(self) -> None:
+        """Compile tous les patterns (bornés à une ligne) dans une base Hyperscan"""
+        self._hs_entries = [
+            (vuln_type, raw_pattern)
+            for vuln_type, vuln_config in self.vulnerability_patterns.items()
+            for _pattern, raw_pattern in vuln_config["patterns"]
+        ]
+        expressions = [
+            _line_bounded(raw_pattern, UNICODE_LINE_SPACE).encode("utf-8")
+            for _vuln_type, raw_pattern in self._hs_entries
+        ]
+        flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        try:
+            database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            database.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=[flags] * len(expressions),
+            )
+        except hyperscan.error as e:
+            logger.warning(f"Base Hyperscan non compilée, repli sur les regex: {e}")
+            return
+        self._hs_db = database
+
     def _load_vulnerability_patterns(self) -> dict[str, Any]:
-        """Charge les patterns de vulnérabilités"""
+        """Charge les patterns de vulnérabilités (sources brutes)"""
         return {
             "sql_injection": {
                 "patterns": [
@@ -76,6 +296,8 @@ class SecurityAuditor:
                     r"OR\s+1\s*=\s*1",
                     r"\';\s*DROP\s+TABLE",
                 ],
+                # Littéraux présents dans tout match (préfiltre avant les regex)
+                "anchors": ["select", "1", "';"],
                 "severity": "critical",
                 "remediation": "Utiliser des requêtes préparées et validation des entrées",
             },
@@ -86,6 +308,7 @@ class SecurityAuditor:
                     r"onload\s*=",
                     r"innerHTML\s*=.*\+",
                 ],
+                "anchors": ["<script", "javascript:", "onload", "innerhtml"],
                 "severity": "high",
                 "remediation": "Encoder les sorties et valider les entrées utilisateur",
             },
@@ -96,16 +319,19 @@ class SecurityAuditor:
                     r'secret\s*=\s*["\'][^"\']+["\']',
                     r'token\s*=\s*["\'][^"\']+["\']',
                 ],
+                "anchors": ["password", "api_key", "secret", "token"],
                 "severity": "critical",
                 "remediation": "Utiliser des variables d'environnement ou un gestionnaire de secrets",
             },
             "path_traversal": {
                 "patterns": [r"\.\./\.\.", r"\.\.\\\.\.\\", r"%2e%2e%2f", r"%252e%252e%252f"],
+                "anchors": ["../..", "..\\..\\", "%2e%2e%2f", "%252e%252e%252f"],
                 "severity": "high",
                 "remediation": "Valider et sanitizer tous les chemins de fichiers",
             },
             "weak_crypto": {
                 "patterns": [r"md5\(", r"sha1\(", r"DES\(", r"RC4\("],
+                "anchors": ["md5(", "sha1(", "des(", "rc4("],
                 "severity": "medium",
                 "remediation": "Utiliser des algorithmes cryptographiques forts (SHA-256, AES-256)",
             },
@@ -181,57 +407,211 @@ class SecurityAuditor:
             if target.is_file():
                 files_to_scan = [target]
             elif target.is_dir():
-                files_to_scan = []
-                for ext in ["*.py", "*.js", "*.ts", "*.java", "*.php", "*.rb"]:
-                    files_to_scan.extend(target.rglob(ext))
+                files_to_scan = self._collect_source_files(target)
             else:
                 logger.warning(f"Chemin non valide pour scan: {target_path}")
                 return vulnerabilities
 
-            for file_path in files_to_scan:
-                try:
-                    with open(file_path, encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                        file_vulns = self._scan_file_content(str(file_path), content)
-                        vulnerabilities.extend(file_vulns)
-                except Exception as e:
-                    logger.error(f"Erreur lecture fichier {file_path}: {e}")
+            if len(files_to_scan) >= PARALLEL_SCAN_MIN_FILES and (os.cpu_count() or 1) > 1:
+                vulnerabilities = self._scan_files_parallel(files_to_scan)
+            else:
+                for file_path in files_to_scan:
+                    vulnerabilities.extend(self._scan_file(file_path))
 
         except Exception as e:
             logger.error(f"Erreur scan vulnérabilités: {e}")
 
         return vulnerabilities
 
+    @staticmethod
+    def _collect_source_files(target: Path) -> list[Path]:
+        """Fichiers source de l'arborescence, en un seul parcours (os.walk/scandir)"""
+        by_extension: dict[str, list[Path]] = {ext: [] for ext in SCAN_EXTENSIONS}
+        for root, _dirs, files in os.walk(target):
+            root_path = Path(root)
+            for name in files:
+                bucket = by_extension.get(name[name.rfind(".") :])
+                if bucket is not None:
+                    bucket.append(root_path / name)
+        return [path for paths in by_extension.values() for path in paths]
+
+    def _scan_files_parallel(self, files_to_scan: list[Path]) -> list[SecurityVulnerability]:
+        """Scan des fichiers dans un pool de processus (un auditeur par processus)"""
+        vulnerabilities = []
+        try:
+            with ProcessPoolExecutor(
+                initializer=_init_scan_worker, initargs=(self.pattern_spec,)
+            ) as executor:
+                for file_vulns in executor.map(
+                    _scan_file_in_worker, files_to_scan, chunksize=PARALLEL_SCAN_CHUNKSIZE
+                ):
+                    vulnerabilities.extend(file_vulns)
+        except Exception as e:
+            logger.warning(f"Scan parallèle indisponible, scan séquentiel: {e}")
+            vulnerabilities = []
+            for file_path in files_to_scan:
+                vulnerabilities.extend(self._scan_file(file_path))
+        return vulnerabilities
+
+    def _scan_file(self, file_path: Path) -> list[SecurityVulnerability]:
+        """Lecture et scan d'un fichier (erreurs de lecture journalisées)"""
+        try:
+            if self._hs_db is None and os.path.getsize(file_path) >= MMAP_MIN_BYTES:
+                # Gros fichier : projection en mémoire, sans copie ni décodage complet
+                # (Hyperscan, plus rapide, exige de l'UTF-8 valide : texte décodé)
+                with (
+                    open(file_path, "rb") as f,
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+                ):
+                    return self._scan_regex(str(file_path), mapped, binary=True)
+
+            with open(file_path, encoding="utf-8", errors="ignore") as f:
+                content = f.read()
+            return self._scan_file_content(str(file_path), content)
+        except Exception as e:
+            logger.error(f"Erreur lecture fichier {file_path}: {e}")
+            return []
+
     def _scan_file_content(self, file_path: str, content: str) -> list[SecurityVulnerability]:
-        """Scan d'un fichier pour les vulnérabilités"""
+        """Scan d'un fichier pour les vulnérabilités (texte entier, offsets -> lignes)"""
+        if self._hs_db is not None or RE2_AVAILABLE:
+            # RE2 et Hyperscan travaillent en UTF-8 : surrogates isolés remplacés par "?"
+            try:
+                data = content.encode("utf-8")
+            except UnicodeEncodeError:
+                data = content.encode("utf-8", "replace")
+                content = data.decode("utf-8")
+            if self._hs_db is not None:
+                return self._scan_hyperscan(file_path, data)
+
+        return self._scan_regex(file_path, content)
+
+    def _scan_regex(
+        self, file_path: str, content: str | bytes | mmap.mmap, binary: bool = False
+    ) -> list[SecurityVulnerability]:
+        """Scan regex du texte entier (ou des octets d'un fichier projeté), offsets -> lignes"""
+        patterns_key, combined_key = (
+            ("bytes_patterns", "bytes_combined") if binary else ("patterns", "combined")
+        )
         vulnerabilities = []
-        lines = content.split("\n")
+        newline_offsets: list[int] | None = None  # Construit au premier match
+        candidate_types = None if binary else self._anchored_types(content)
 
         for vuln_type, vuln_config in self.vulnerability_patterns.items():
-            for pattern in vuln_config["patterns"]:
-                import re
-
-                for line_num, line in enumerate(lines, 1):
-                    if re.search(pattern, line, re.IGNORECASE):
-                        vuln_id = hashlib.md5(
-                            f"{file_path}:{line_num}:{pattern}".encode()
-                        ).hexdigest()[:8]
-
-                        vulnerability = SecurityVulnerability(
-                            vuln_id=vuln_id,
-                            severity=vuln_config["severity"],
-                            category=vuln_type,
-                            description=f"Vulnérabilité {vuln_type} détectée",
-                            file_path=file_path,
-                            line_number=line_num,
-                            evidence=line.strip()[:200],
-                            remediation=vuln_config["remediation"],
-                            confidence=0.8,
-                        )
-                        vulnerabilities.append(vulnerability)
+            if candidate_types is not None and vuln_type not in candidate_types:
+                continue  # Aucun littéral d'ancrage : la catégorie ne peut pas matcher
+            if not vuln_config[combined_key].search(content):
+                continue  # Cas courant : aucun pattern de la catégorie dans le fichier
+
+            if newline_offsets is None:
+                # Dernier caractère de chaque fin de ligne ("\r\n" compris en octets) :
+                # le "\r" d'un "\r\n" reste en fin de ligne, retiré avec les blancs de la preuve
+                newline_offsets = (
+                    [m.end() - 1 for m in BYTES_NEWLINE_RE.finditer(content)]
+                    if binary
+                    else [m.start() for m in re.finditer("\n", content)]
+                )
+
+            # Ordre historique : par pattern, puis par ligne
+            for pattern, raw_pattern in vuln_config[patterns_key]:
+                last_index = -1
+                for match in pattern.finditer(content):
+                    index = bisect.bisect_left(newline_offsets, match.start())
+                    if index == last_index:
+                        continue  # Un signalement par ligne et par pattern
+                    last_index = index
+
+                    start, end = _line_span(newline_offsets, index, len(content))
+                    line = content[start:end]
+                    if binary:
+                        line = line.decode("utf-8", errors="ignore")  # Seule la ligne est décodée
+                    vulnerabilities.append(
+                        self._make_vulnerability(file_path, vuln_type, raw_pattern, index + 1, line)
+                    )
+
+        return vulnerabilities
+
+    def _anchored_types(self, content: str) -> set[str]:
+        """Catégories dont un littéral d'ancrage apparaît dans le texte (casse ignorée)"""
+        if content.isascii():
+            lowered = content.lower()
+        else:
+            lowered = content.translate(ANCHOR_FOLD_TABLE).lower()
+        found = set(self._unanchored_types)
+        all_types = len(self.vulnerability_patterns)
+
+        if self._anchor_automaton is not None:
+            # Un seul passage pour tous les littéraux, arrêté dès que tout est candidat
+            for _end, vuln_types in self._anchor_automaton.iter(lowered):
+                found |= vuln_types
+                if len(found) == all_types:
+                    break
+        else:
+            for literal, vuln_types in self._anchor_literals.items():
+                if not vuln_types <= found and literal in lowered:
+                    found |= vuln_types
+        return found
+
+    def _scan_hyperscan(self, file_path: str, data: bytes) -> list[SecurityVulnerability]:
+        """Scan Hyperscan : un passage pour tous les patterns (offsets en octets UTF-8)"""
+        match_ends: list[list[int]] = [[] for _ in self._hs_entries]
+
+        def on_match(expression_id, _start, end, _flags, _context):
+            match_ends[expression_id].append(end)
+            return None
+
+        scratch = getattr(self._hs_local, "scratch", None)
+        if scratch is None:
+            scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+        self._hs_db.scan(data, match_event_handler=on_match, scratch=scratch)
+
+        vulnerabilities = []
+        if not any(match_ends):
+            return vulnerabilities
+
+        newline_offsets = [m.start() for m in re.finditer(b"\n", data)]
+
+        # Ids dans l'ordre catégorie puis pattern ; fins de match croissantes par id
+        for (vuln_type, raw_pattern), ends in zip(self._hs_entries, match_ends, strict=True):
+            last_index = -1
+            for end in ends:
+                # Match non vide et borné à une ligne : son dernier octet est dans la ligne
+                index = bisect.bisect_left(newline_offsets, end - 1)
+                if index == last_index:
+                    continue  # Un signalement par ligne et par pattern
+                last_index = index
+
+                start, stop = _line_span(newline_offsets, index, len(data))
+                vulnerabilities.append(
+                    self._make_vulnerability(
+                        file_path, vuln_type, raw_pattern, index + 1, data[start:stop].decode()
+                    )
+                )
 
         return vulnerabilities
 
+    def _make_vulnerability(
+        self, file_path: str, vuln_type: str, raw_pattern: str, line_num: int, line: str
+    ) -> SecurityVulnerability:
+        """Construit la vulnérabilité signalée pour un pattern sur une ligne"""
+        vuln_config = self.vulnerability_patterns[vuln_type]
+        # BLAKE2b 32 bits : 8 caractères hexadécimaux sans troncature
+        vuln_id = hashlib.blake2b(
+            f"{file_path}:{line_num}:{raw_pattern}".encode("utf-8", "surrogatepass"), digest_size=4
+        ).hexdigest()
+
+        return SecurityVulnerability(
+            vuln_id=vuln_id,
+            severity=vuln_config["severity"],
+            category=vuln_type,
+            description=f"Vulnérabilité {vuln_type} détectée",
+            file_path=file_path,
+            line_number=line_num,
+            evidence=line.strip()[:200],
+            remediation=vuln_config["remediation"],
+            confidence=0.8,
+        )
+
     def check_compliance(
         self, framework: str, system_config: dict[str, Any]
     ) -> list[ComplianceCheck]:
@@ -286,19 +666,16 @@ class SecurityAuditor:
     ) -> float:
         """Calcule un score de risque global"""
         # Score basé sur les vulnérabilités
-        vuln_score = 0.0
-        severity_weights = {"critical": 10, "high": 7, "medium": 4, "low": 1}
-
-        for vuln in vulnerabilities:
-            weight = severity_weights.get(vuln.severity, 1)
-            vuln_score += weight * vuln.confidence
+        severity_weight = SEVERITY_WEIGHTS.get
+        vuln_score = sum(severity_weight(v.severity, 1) * v.confidence for v in vulnerabilities)
 
         # Score basé sur la conformité
         compliance_score = 0.0
         total_checks = len(compliance_checks)
         if total_checks > 0:
-            non_compliant = len([c for c in compliance_checks if c.status == "non_compliant"])
-            partial = len([c for c in compliance_checks if c.status == "partial"])
+            status_counts = Counter(c.status for c in compliance_checks)
+            non_compliant = status_counts["non_compliant"]
+            partial = status_counts["partial"]
             compliance_score = (non_compliant * 5 + partial * 2) / total_checks
 
         # Score final (0-100, où 0 = très sûr, 100 = très risqué)
@@ -312,7 +689,9 @@ class SecurityAuditor:
         system_config: dict[str, Any] = None,
     ) -> SecurityAuditReport:
         """Effectue un audit de sécurité complet"""
-        audit_id = hashlib.sha256(f"{target_path}:{time.time()}".encode()).hexdigest()[:12]
+        audit_id = hashlib.blake2b(
+            f"{target_path}:{time.time()}".encode("utf-8", "surrogatepass"), digest_size=6
+        ).hexdigest()
         timestamp = time.time()
 
         # Scan des vulnérabilités
@@ -328,14 +707,15 @@ class SecurityAuditor:
         # Calcul du score de risque
         risk_score = self.generate_risk_score(vulnerabilities, compliance_checks)
 
-        # Statistiques
+        # Statistiques (un seul passage, partagé avec le résumé)
         total_issues = len(vulnerabilities)
-        critical_issues = len([v for v in vulnerabilities if v.severity == "critical"])
-        high_issues = len([v for v in vulnerabilities if v.severity == "high"])
+        severity_counts = Counter(v.severity for v in vulnerabilities)
+        critical_issues = severity_counts["critical"]
+        high_issues = severity_counts["high"]
 
         # Résumé exécutif
         executive_summary = self._generate_executive_summary(
-            vulnerabilities, compliance_checks, risk_score
+            vulnerabilities, compliance_checks, risk_score, severity_counts
         )
 
         report = SecurityAuditReport(
@@ -352,6 +732,7 @@ class SecurityAuditor:
         )
 
         self.audit_history.append(report)
+        self._audits_by_id.setdefault(audit_id, report)
         logger.info(f"Audit de sécurité terminé: {audit_id}, score de risque: {risk_score}")
 
         return report
@@ -361,6 +742,7 @@ class SecurityAuditor:
         vulnerabilities: list[SecurityVulnerability],
         compliance_checks: list[ComplianceCheck],
         risk_score: float,
+        severity_counts: Counter | None = None,
     ) -> str:
         """Génère un résumé exécutif de l'audit"""
         summary_parts = []
@@ -380,8 +762,10 @@ class SecurityAuditor:
             summary_parts.append(f"✅ RISQUE {risk_level}: Score {risk_score}/100")
 
         # Vulnérabilités
-        critical_count = len([v for v in vulnerabilities if v.severity == "critical"])
-        high_count = len([v for v in vulnerabilities if v.severity == "high"])
+        if severity_counts is None:
+            severity_counts = Counter(v.severity for v in vulnerabilities)
+        critical_count = severity_counts["critical"]
+        high_count = severity_counts["high"]
 
         if critical_count > 0:
             summary_parts.append(f"🔴 {critical_count} vulnérabilités critiques détectées")
@@ -389,7 +773,7 @@ class SecurityAuditor:
             summary_parts.append(f"🟠 {high_count} vulnérabilités haute priorité")
 
         # Conformité
-        non_compliant = len([c for c in compliance_checks if c.status == "non_compliant"])
+        non_compliant = sum(c.status == "non_compliant" for c in compliance_checks)
         if non_compliant > 0:
             summary_parts.append(f"📋 {non_compliant} non-conformités détectées")
 
@@ -407,8 +791,12 @@ class SecurityAuditor:
             output_file = Path(output_path)
 
             if format == "json":
-                with open(output_file, "w", encoding="utf-8") as f:
-                    json.dump(asdict(report), f, indent=2, ensure_ascii=False)
+                if ORJSON_AVAILABLE:
+                    # Sérialisation C des dataclasses, sans copie profonde par asdict
+                    output_file.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+                else:
+                    with open(output_file, "w", encoding="utf-8") as f:
+                        json.dump(asdict(report), f, indent=2, ensure_ascii=False)
 
             elif format == "markdown":
                 markdown_content = self._generate_markdown_report(report)
@@ -481,35 +869,42 @@ class SecurityAuditor:
 
     def compare_audits(self, audit1_id: str, audit2_id: str) -> dict[str, Any]:
         """Compare deux audits"""
-        audit1 = next((a for a in self.audit_history if a.audit_id == audit1_id), None)
-        audit2 = next((a for a in self.audit_history if a.audit_id == audit2_id), None)
+        audit1 = self._audits_by_id.get(audit1_id)
+        audit2 = self._audits_by_id.get(audit2_id)
 
         if not audit1 or not audit2:
             raise ValueError("Audit non trouvé")
 
+        # Ensembles d'identifiants construits une fois (appartenance O(1))
+        ids1 = {v.vuln_id for v in audit1.vulnerabilities}
+        ids2 = {v.vuln_id for v in audit2.vulnerabilities}
+
         comparison = {
             "risk_score_change": audit2.risk_score - audit1.risk_score,
             "vulnerabilities_change": audit2.total_issues - audit1.total_issues,
             "critical_issues_change": audit2.critical_issues - audit1.critical_issues,
-            "new_vulnerabilities": len(
-                [
-                    v
-                    for v in audit2.vulnerabilities
-                    if v.vuln_id not in [v1.vuln_id for v1 in audit1.vulnerabilities]
-                ]
-            ),
-            "resolved_vulnerabilities": len(
-                [
-                    v
-                    for v in audit1.vulnerabilities
-                    if v.vuln_id not in [v2.vuln_id for v2 in audit2.vulnerabilities]
-                ]
-            ),
+            "new_vulnerabilities": sum(v.vuln_id not in ids1 for v in audit2.vulnerabilities),
+            "resolved_vulnerabilities": sum(v.vuln_id not in ids2 for v in audit1.vulnerabilities),
         }
 
         return comparison
 
 
+# Auditeur propre à chaque processus du pool de scan
+_worker_auditor: SecurityAuditor | None = None
+
+
+def _init_scan_worker(pattern_spec: dict[str, Any]) -> None:
+    """Initialise l'auditeur du processus (regex et base Hyperscan non transmissibles)"""
+    global _worker_auditor
+    _worker_auditor = SecurityAuditor(pattern_spec)
+
+
+def _scan_file_in_worker(file_path: Path) -> list[SecurityVulnerability]:
+    """Scan d'un fichier dans un processus du pool"""
+    return _worker_auditor._scan_file(file_path)
+
+
 # Instances globales
 default_security_auditor = SecurityAuditor()
 
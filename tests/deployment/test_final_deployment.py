@@ -124,7 +124,7 @@ class HyperionFinalTest:
             from hyperion.modules.rag.v2_9.response_optimizer import ResponseOptimizer
 
             optimizer = ResponseOptimizer()
-            result = await optimizer.optimize_response("Test response for optimization")
+            result = await optimizer.optimize_response_async("Test response for optimization")
 
             return result.optimization_score >= 0
         except Exception:
@@ -208,7 +208,7 @@ class HyperionFinalTest:
             from hyperion.modules.rag.v2_9.response_optimizer import default_optimizer
 
             # Test simple d'optimisation
-            result = await default_optimizer.optimize_response("Test integration response")
+            result = await default_optimizer.optimize_response_async("Test integration response")
 
             # Test analyse de patterns sur événement fictif
             test_events = [{"event_type": "rag_query", "timestamp": time.time()}]
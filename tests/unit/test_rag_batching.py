@@ -0,0 +1,75 @@
+"""
+Tests unitaires pour le micro-batching RAG (BatchedQuery, DynamicBatcher).
+
+Auteur: Ryckman Matthieu
+Projet: Hyperion (projet personnel)
+Version: 3.0.0
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from hyperion.modules.rag.batching import BatchedQuery, DynamicBatcher
+
+
+class FakeQdrant:
+    """Client Qdrant minimal : une réponse par requête, éventuellement tronquée."""
+
+    def __init__(self, drop: int = 0):
+        self.drop = drop
+
+    def query_batch_points(self, collection_name, requests, timeout):
+        responses = [SimpleNamespace(points=[request.limit]) for request in requests]
+        return responses[: len(responses) - self.drop]
+
+
+def _search_all(batcher: BatchedQuery, limits: list[int]) -> list:
+    async def run():
+        searches = [batcher.search(np.zeros(2), None, limit) for limit in limits]
+        return await asyncio.wait_for(asyncio.gather(*searches, return_exceptions=True), timeout=2)
+
+    return asyncio.run(run())
+
+
+def test_batched_query_resolves_each_search():
+    """Test un batch Qdrant : chaque recherche reçoit la réponse de sa requête."""
+    batcher = BatchedQuery(FakeQdrant(), "docs", max_wait_ms=50)
+
+    assert _search_all(batcher, [1, 2, 3]) == [[1], [2], [3]]
+
+
+def test_batched_query_short_response_fails_every_search():
+    """Test réponse Qdrant tronquée : toutes les futures échouent au lieu de rester en attente."""
+    batcher = BatchedQuery(FakeQdrant(drop=1), "docs", max_wait_ms=50)
+
+    results = _search_all(batcher, [1, 2, 3])
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_dynamic_batcher_encodes_window_in_one_call():
+    """Test fenêtre de textes encodée en un appel, chaque future recevant sa ligne."""
+    calls = []
+
+    def encode(texts):
+        calls.append(texts)
+        return np.array([[len(text)] for text in texts])
+
+    batcher = DynamicBatcher(encode, max_wait_ms=50)
+    futures = [batcher.submit(text) for text in ("a", "bb", "ccc")]
+
+    assert [future.result(timeout=2).tolist() for future in futures] == [[1], [2], [3]]
+    assert calls == [["a", "bb", "ccc"]]
+
+
+def test_dynamic_batcher_short_encoding_fails_every_future():
+    """Test encode_fn renvoyant trop peu de lignes : toutes les futures échouent."""
+    batcher = DynamicBatcher(lambda texts: np.zeros((len(texts) - 1, 2)), max_wait_ms=50)
+    futures = [batcher.submit(text) for text in ("a", "b", "c")]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=2)
@@ -0,0 +1,425 @@
+"""
+Tests unitaires pour ContextManager (RAG v2.9).
+
+Auteur: Ryckman Matthieu
+Projet: Hyperion (projet personnel)
+Version: 2.9.0
+"""
+
+import pytest
+
+from hyperion.modules.rag.v2_9.context_manager import ContextManager
+
+
+def test_detect_intent():
+    """Test détection d'intention par mots-clés."""
+    manager = ContextManager()
+
+    assert manager._detect_intent("Can you explain this module?") == "learn"
+    assert manager._detect_intent("I get an error on startup") == "troubleshoot"
+    assert manager._detect_intent("hello there") is None
+
+
+def test_keyword_stems_match_word_start():
+    """Test que les radicaux techniques matchent les mots dérivés."""
+    manager = ContextManager()
+
+    assert "auth" in manager._extract_topics_from_text("Authentication flow")
+    assert "testing" in manager._extract_topics_from_text("Run the unittests")
+    assert manager._extract_topics_from_text("rapid prototyping") == []
+
+
+def test_reference_words_are_whole_words():
+    """Test que les mots outils ne matchent pas à l'intérieur d'un mot."""
+    manager = ContextManager()
+    manager.add_conversation_turn("s1", None, "What is the API?", "An API.", [])
+    context = manager.active_contexts["s1"]
+
+    assert manager._resolve_contextual_references(context, "with items") == []
+    references = manager._resolve_contextual_references(context, "is it the same?")
+    assert references == ["Référence possible: What is the API?"]
+
+
+def test_learn_user_preferences():
+    """Test apprentissage des préférences utilisateur."""
+    manager = ContextManager()
+    manager.add_conversation_turn(
+        "s1", "u1", "Explain the database server with an example", "...", []
+    )
+    profile = manager.get_user_profile("u1")
+
+    assert profile.preferred_detail_level == "detailed"
+    assert profile.preferred_response_style == "example_heavy"
+    assert profile.domain_interests == ["backend"]
+
+
+def test_analyze_response_style():
+    """Test analyse du style de réponse."""
+    manager = ContextManager()
+
+    assert manager._analyze_response_style("See e.g. the docs") == "example_based"
+    assert manager._analyze_response_style("First do this, then that") == "step_by_step"
+    assert manager._analyze_response_style("Short answer") == "concise"
+
+
+def test_keyword_scanner_regex_fallback_matches_automaton(monkeypatch):
+    """Test que le repli regex donne les mêmes résultats que l'automate."""
+    from hyperion.modules.rag.v2_9 import context_manager as cm
+
+    text = "can you explain it? authentication tests, e.g. but also items with ci/cd"
+    reference = cm.KeywordScanner(cm.KEYWORD_CATEGORIES).scan(text)
+
+    monkeypatch.setattr(cm, "HYPERSCAN_AVAILABLE", False)
+    monkeypatch.setattr(cm, "AHOCORASICK_AVAILABLE", False)
+    fallback = cm.KeywordScanner(cm.KEYWORD_CATEGORIES).scan(text)
+
+    assert dict(fallback) == dict(reference)
+
+
+def test_keyword_scanner_hyperscan_matches_regex(monkeypatch):
+    """Test que le chemin Hyperscan (offsets UTF-8) suit les mêmes frontières."""
+    pytest.importorskip("hyperscan")
+    from hyperion.modules.rag.v2_9 import context_manager as cm
+
+    text = "é-auth réponse: ça test, e.g. déjà ci/cd; itérer « but » préauth"
+    hyperscan_hits = cm.KeywordScanner(cm.KEYWORD_CATEGORIES).scan(text)
+
+    monkeypatch.setattr(cm, "HYPERSCAN_AVAILABLE", False)
+    monkeypatch.setattr(cm, "AHOCORASICK_AVAILABLE", False)
+    regex_hits = cm.KeywordScanner(cm.KEYWORD_CATEGORIES).scan(text)
+
+    assert dict(hyperscan_hits) == dict(regex_hits)
+
+
+def test_export_user_profile_avg_satisfaction():
+    """Test moyenne de satisfaction maintenue incrémentalement."""
+    manager = ContextManager()
+    manager.add_conversation_turn("s1", "u1", "first", "...", [])
+    manager.set_satisfaction_score("s1", 0.4)
+    manager.set_satisfaction_score("s1", 0.6)  # re-score du même tour
+    manager.add_conversation_turn("s1", "u1", "second", "...", [])
+    manager.set_satisfaction_score("s1", 1.0)
+    manager.add_conversation_turn("s1", "u1", "third", "...", [])
+
+    exported = manager.export_user_profile("u1")
+
+    assert exported["interaction_count"] == 3
+    assert exported["avg_satisfaction"] == pytest.approx(0.8)
+
+
+def test_concurrent_satisfaction_scores_keep_profile_stats():
+    """Test re-notations concurrentes de sessions d'un même profil : stats cohérentes."""
+    import threading
+
+    manager = ContextManager()
+    sessions = [f"s{i}" for i in range(8)]
+    for session_id in sessions:
+        manager.add_conversation_turn(session_id, "u1", "question", "...", [])
+
+    def rate(session_id):
+        for i in range(200):
+            manager.set_satisfaction_score(session_id, i / 200)
+        manager.set_satisfaction_score(session_id, 1.0)
+
+    threads = [threading.Thread(target=rate, args=(sid,)) for sid in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    profile = manager.get_user_profile("u1")
+    assert profile.satisfaction_count == len(sessions)
+    assert profile.satisfaction_sum == pytest.approx(len(sessions))
+
+
+def test_cleanup_old_contexts_skips_touched_sessions():
+    """Test expiration des contextes via le tas d'expiration."""
+    manager = ContextManager(context_retention_hours=1)
+    old = manager.get_or_create_context("old")
+    touched = manager.get_or_create_context("touched")
+
+    # Les deux sessions ont expiré, puis "touched" est réutilisée
+    old.last_interaction_time -= 7200
+    touched.last_interaction_time -= 7200
+    manager._touch(old)
+    manager._touch(touched)
+    manager.get_or_create_context("touched")
+
+    manager._cleanup_old_contexts()
+
+    assert "old" not in manager.active_contexts
+    assert "touched" in manager.active_contexts
+
+
+def test_lru_eviction_of_sessions_and_profiles():
+    """Test éviction LRU des sessions et profils au-delà des bornes."""
+    manager = ContextManager(max_sessions=2, max_users=2)
+    for session_id in ("s1", "s2"):
+        manager.get_or_create_context(session_id)
+    manager.get_or_create_context("s1")  # s1 devient la plus récente
+    manager.get_or_create_context("s3")
+
+    assert list(manager.active_contexts) == ["s1", "s3"]
+
+    for user_id in ("u1", "u2", "u3"):
+        manager.get_user_profile(user_id)
+
+    assert list(manager.user_profiles) == ["u2", "u3"]
+
+
+def test_compress_context_history_keeps_recent_turns():
+    """Test que la compression garde les échanges récents après le résumé."""
+    manager = ContextManager()
+    threshold = manager.context_compression_threshold
+    for i in range(threshold):
+        manager.add_conversation_turn("s1", None, f"question {i}", "...", [])
+
+    history = list(manager.active_contexts["s1"].conversation_history)
+
+    assert history[0].user_query == "[SUMMARY]"
+    assert [turn.user_query for turn in history[1:]] == [
+        f"question {i}" for i in range(threshold - 5, threshold)
+    ]
+
+
+def test_conversation_turn_memoizes_query_analysis():
+    """Test que le tour mémorise minuscules et topics de la requête."""
+    manager = ContextManager()
+    manager.add_conversation_turn("s1", None, "Fix the Login Endpoint", "...", [])
+    turn = manager.active_contexts["s1"].conversation_history[-1]
+
+    assert turn.query_lower == "fix the login endpoint"
+    assert turn.query_topics == {"auth", "api"}
+    assert "auth" in manager._create_conversation_summary([turn])
+
+
+def test_active_topics_bounded_and_ordered():
+    """Test topics actifs : ordre d'apparition, borne à 5, rafraîchissement."""
+    manager = ContextManager()
+    queries = ["login", "sql", "endpoint", "mock", "exception", "token"]
+    for query in queries:
+        manager.add_conversation_turn("s1", None, query, "...", [])
+
+    context = manager.active_contexts["s1"]
+
+    assert list(context.active_topics) == [
+        "database",
+        "api",
+        "testing",
+        "error_handling",
+        "authentication",
+    ]
+    assert manager._resolve_contextual_references(context, "also") == [
+        "Topic actuel: authentication"
+    ]
+
+
+def test_active_topics_decay_per_topic():
+    """Test expiration individuelle des topics non revus depuis 5 minutes."""
+    manager = ContextManager()
+    manager.add_conversation_turn("s1", None, "login", "...", [])
+    manager.add_conversation_turn("s1", None, "sql", "...", [])
+    context = manager.active_contexts["s1"]
+    context.active_topics["authentication"] -= 600
+
+    manager.add_conversation_turn("s1", None, "endpoint", "...", [])
+
+    assert list(context.active_topics) == ["database", "api"]
+
+
+def test_cold_important_turns_are_compressed():
+    """Test compression LZ4 des réponses froides, relues à l'identique."""
+    pytest.importorskip("lz4.frame")
+    from hyperion.modules.rag.v2_9 import context_manager as cm
+
+    manager = ContextManager()
+    long_response = "Because the token expires, refresh it first. " * 20
+    manager.add_conversation_turn("s1", None, "login token", long_response, [])
+    manager.set_satisfaction_score("s1", 0.9)
+    for i in range(manager.context_compression_threshold - 1):
+        manager.add_conversation_turn("s1", None, f"question {i}", "...", [])
+
+    important = manager.active_contexts["s1"].conversation_history[1]
+
+    assert isinstance(important.system_response, cm._CompressedStr)
+    assert cm._as_text(important.system_response) == long_response
+
+
+def test_prompt_enhancement_cached_until_next_turn():
+    """Test cache des enrichissements de session, invalidé par un nouveau tour."""
+    manager = ContextManager()
+    manager.add_conversation_turn("s1", None, "login token", "...", [])
+    manager.add_conversation_turn("s1", None, "sql query", "...", [])
+
+    first = manager.get_contextual_prompt_enhancement("s1", None, "and that?")
+    cached = manager.active_contexts["s1"].cached_enhancements
+
+    assert manager.get_contextual_prompt_enhancement("s1", None, "next")["active_topics"] == [
+        "authentication",
+        "database",
+    ]
+    assert manager.active_contexts["s1"].cached_enhancements is cached
+    assert first["contextual_references"] == ["Référence possible: sql query"]
+    assert first["topic_weights"]["database"] == pytest.approx(1.0)
+    assert first["topic_weights"]["authentication"] == pytest.approx(0.6065, abs=1e-4)
+
+    manager.add_conversation_turn("s1", None, "endpoint", "...", [])
+
+    assert manager.active_contexts["s1"].cached_enhancements is None
+
+
+def test_prompt_enhancement_copy_does_not_alter_cache():
+    """Test enrichissements retournés modifiables sans corrompre le cache de session."""
+    manager = ContextManager()
+    manager.add_conversation_turn("s1", None, "login token", "...", [])
+
+    first = manager.get_contextual_prompt_enhancement("s1", None, "next")
+    first["active_topics"].append("injected")
+    first["topic_weights"]["authentication"] = 0.0
+
+    second = manager.get_contextual_prompt_enhancement("s1", None, "next")
+    assert second["active_topics"] == ["authentication"]
+    assert second["topic_weights"]["authentication"] == pytest.approx(1.0)
+
+
+def test_add_conversation_turns_batch_matches_sequential():
+    """Test qu'une rafale d'échanges produit le même état qu'en séquentiel."""
+    turns = [
+        ("Explain the login flow", "...", ["a.py"]),
+        ("How to implement the sql query", "...", []),
+        ("I get an error", "...", ["b.py"]),
+    ]
+    sequential = ContextManager()
+    for query, response, sources in turns:
+        sequential.add_conversation_turn("s1", "u1", query, response, sources)
+    batched = ContextManager()
+    batched.add_conversation_turns_batch("s1", "u1", turns)
+
+    seq_ctx = sequential.active_contexts["s1"]
+    batch_ctx = batched.active_contexts["s1"]
+
+    assert [t.user_query for t in batch_ctx.conversation_history] == [q for q, _, _ in turns]
+    assert list(batch_ctx.active_topics) == list(seq_ctx.active_topics)
+    assert batch_ctx.user_intent_chain == seq_ctx.user_intent_chain
+    assert batched.export_user_profile("u1") == sequential.export_user_profile("u1")
+
+
+def test_large_batch_summarised_before_eviction():
+    """Test rafale plus grande que le deque : compression avant toute éviction."""
+    manager = ContextManager()
+    maxlen = ContextManager().get_or_create_context("tmp").conversation_history.maxlen
+    turns = [("login token", "...", [])] + [(f"question {i}", "...", []) for i in range(maxlen)]
+
+    manager.add_conversation_turns_batch("s1", None, turns)
+    history = list(manager.active_contexts["s1"].conversation_history)
+
+    assert history[0].user_query == "[SUMMARY]"
+    assert history[0].system_response == "Topics discutés: auth"  # premier échange résumé
+    assert history[-1].user_query == f"question {maxlen - 1}"
+
+
+def test_get_most_common_topics_counts_across_sessions():
+    """Test comptage des topics actifs sur toutes les sessions."""
+    manager = ContextManager()
+    manager.add_conversation_turn("s1", None, "login with sql", "...", [])
+    manager.add_conversation_turn("s2", None, "sql endpoint", "...", [])
+    manager.add_conversation_turn("s3", None, "hello", "...", [])
+
+    assert manager._get_most_common_topics() == [
+        ("database", 2),
+        ("authentication", 1),
+        ("api", 1),
+    ]
+
+
+def test_background_analytics_reach_same_state():
+    """Test analyses post-tour en arrière-plan : même état une fois terminées."""
+    manager = ContextManager(background_analytics=True)
+    manager.add_conversation_turn("s1", "u1", "Explain the login error", "...", [])
+    manager.add_conversation_turn("s1", "u1", "How to implement the sql query", "...", [])
+    manager.close()
+
+    context = manager.active_contexts["s1"]
+
+    assert len(context.conversation_history) == 2
+    assert list(context.active_topics) == ["authentication", "error_handling", "database"]
+    assert context.user_intent_chain == ["learn", "implement"]
+    assert manager.get_user_profile("u1").preferred_detail_level == "detailed"
+
+
+def test_profile_history_spilled_to_disk(tmp_path):
+    """Test déchargement Zstd de l'historique froid d'un profil."""
+    zstandard = pytest.importorskip("zstandard")
+    import pickle
+
+    from hyperion.modules.rag.v2_9 import context_manager as cm
+
+    manager = ContextManager(profile_spill_dir=tmp_path)
+    turns = [(f"question {i}", "...", []) for i in range(cm.PROFILE_HISTORY_MAX + 1)]
+    manager.add_conversation_turns_batch("s1", "u1", turns)
+
+    profile = manager.get_user_profile("u1")
+    spill_files = list(tmp_path.glob("u1.*.zst"))
+
+    assert len(profile.interaction_history) == len(turns) - cm.PROFILE_SPILL_BATCH
+    assert manager.export_user_profile("u1")["interaction_count"] == len(turns)
+    assert len(spill_files) == 1
+
+    spilled = pickle.loads(zstandard.ZstdDecompressor().decompress(spill_files[0].read_bytes()))
+    assert [turn.user_query for turn in spilled] == [
+        f"question {i}" for i in range(cm.PROFILE_SPILL_BATCH)
+    ]
+
+
+def test_concurrent_sessions_of_one_user_spill_every_turn(tmp_path, monkeypatch):
+    """Test analyses en arrière-plan de deux sessions d'un même profil : aucun échange perdu."""
+    zstandard = pytest.importorskip("zstandard")
+    import pickle
+    import threading
+    import time
+
+    from hyperion.modules.rag.v2_9 import context_manager as cm
+
+    # Sérialisation lente : élargit la fenêtre entre lecture et suppression du lot froid
+    dumps = pickle.dumps
+    monkeypatch.setattr(cm.pickle, "dumps", lambda *a, **k: (time.sleep(0.01), dumps(*a, **k))[1])
+    manager = ContextManager(background_analytics=True, profile_spill_dir=tmp_path)
+    turns_per_session = cm.PROFILE_HISTORY_MAX
+
+    def chat(session_id):
+        for i in range(turns_per_session):
+            manager.add_conversation_turn(session_id, "u1", f"{session_id} q{i}", "...", [])
+
+    threads = [threading.Thread(target=chat, args=(sid,)) for sid in ("s1", "s2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manager.close()
+
+    profile = manager.get_user_profile("u1")
+    spilled = [
+        turn.user_query
+        for path in tmp_path.glob("u1.*.zst")
+        for turn in pickle.loads(zstandard.ZstdDecompressor().decompress(path.read_bytes()))
+    ]
+    kept = [turn.user_query for turn in profile.interaction_history]
+
+    assert len(profile.interaction_history) <= cm.PROFILE_HISTORY_MAX
+    assert len(spilled) == profile.spilled_interaction_count
+    assert sorted(spilled + kept) == sorted(
+        f"{sid} q{i}" for sid in ("s1", "s2") for i in range(turns_per_session)
+    )
+
+
+def test_domain_interests_bitset_deduplicates():
+    """Test bitset des domaines : chaque domaine n'est ajouté qu'une fois."""
+    from hyperion.modules.rag.v2_9 import context_manager as cm
+
+    manager = ContextManager()
+    manager.add_conversation_turn("s1", "u1", "docker deploy", "...", [])
+    manager.add_conversation_turn("s1", "u1", "api server and docker", "...", [])
+    profile = manager.get_user_profile("u1")
+
+    assert profile.domain_interests == ["devops", "backend"]
+    assert profile.domain_interests_bits == cm.DOMAIN_BITS["devops"] | cm.DOMAIN_BITS["backend"]
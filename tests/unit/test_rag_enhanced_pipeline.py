@@ -0,0 +1,432 @@
+"""
+Tests unitaires pour EnhancedRAGPipeline (RAG v2.9).
+
+Auteur: Ryckman Matthieu
+Projet: Hyperion (projet personnel)
+Version: 2.9.0
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from hyperion.modules.rag.v2_9.enhanced_pipeline import (
+    ChunkMetadata,
+    EnhancedRAGPipeline,
+    RAGConfig,
+    RAGResponse,
+    RetrievalResult,
+    SemanticCache,
+    dequantize_embedding,
+    estimate_tokens,
+    quantize_embedding,
+)
+
+
+def _chunk(content: str, chunk_id: str = "c1", source: str = "file.py") -> RetrievalResult:
+    return RetrievalResult(
+        content=content,
+        score=0.9,
+        source=source,
+        metadata=ChunkMetadata(lines="1-10", repo="hyperion"),
+        chunk_id=chunk_id,
+    )
+
+
+def test_retrieval_result_tokens_precomputed():
+    """Test que les mots du chunk sont calculés une fois à la construction."""
+    chunk = _chunk("Return the User object")
+
+    assert chunk.tokens == frozenset({"return", "the", "user", "object"})
+
+
+def test_relevance_uses_token_sets():
+    """Test pertinence par intersection d'ensembles de mots."""
+    pipeline = EnhancedRAGPipeline()
+    chunk = _chunk("the login handler returns a token")
+    query_tokens = frozenset({"login", "token", "refresh"})
+
+    relevance = pipeline._calculate_relevance_score(chunk, query_tokens)
+
+    assert relevance == pytest.approx(1.0)  # 2/3 * 1.5, plafonné à 1
+
+
+def test_compressed_chunk_tokens_refreshed():
+    """Test que la compression rafraîchit les mots du chunk."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(max_tokens=4096))
+    content = ". ".join(f"sentence {i} about filler words" for i in range(20))
+    chunk = _chunk(content)
+
+    [compressed] = pipeline._compress_context([chunk], frozenset({"login"}))
+
+    assert compressed.content != content
+    assert compressed.tokens == frozenset(compressed.content.lower().split())
+
+
+def test_query_end_to_end():
+    """Test requête complète sur la récupération simulée."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(max_chunks=5))
+
+    response = asyncio.run(pipeline.query("How to use auth?", "hyperion"))
+
+    assert response.answer
+    assert 0 < len(response.sources) <= 5
+    assert 0.0 <= response.confidence <= 1.0
+
+
+def test_response_cache_exact_hit():
+    """Test cache exact : la même requête ne repasse pas par le pipeline."""
+    pipeline = EnhancedRAGPipeline()
+
+    first = asyncio.run(pipeline.query("What is the API?", "hyperion"))
+    second = asyncio.run(pipeline.query("  what is the api?", "hyperion"))
+    other_repo = asyncio.run(pipeline.query("What is the API?", "other"))
+
+    assert not first.cache_hit
+    assert second.cache_hit and second.answer == first.answer
+    assert not other_repo.cache_hit
+    assert pipeline.stats["cache_hits"] == 1
+
+
+def test_response_cache_semantic_hit():
+    """Test cache sémantique : requête proche au-dessus du seuil cosinus."""
+    vectors = {
+        "auth": np.array([1.0, 0.0, 0.0]),
+        "login": np.array([0.98, 0.2, 0.0]),
+        "deploy": np.array([0.0, 0.0, 1.0]),
+    }
+
+    def embed(query: str) -> np.ndarray:
+        return next(vec for word, vec in vectors.items() if word in query)
+
+    pipeline = EnhancedRAGPipeline(embed_fn=embed)
+    asyncio.run(pipeline.query("auth setup", "hyperion"))
+
+    assert asyncio.run(pipeline.query("login setup", "hyperion")).cache_hit
+    assert not asyncio.run(pipeline.query("deploy setup", "hyperion")).cache_hit
+
+
+def test_semantic_cache_lru_eviction():
+    """Test éviction LRU du cache de réponses."""
+    cache = SemanticCache(max_size=2)
+    for key in ("a", "b"):
+        cache.put(key, RAGResponse(answer=key, sources=[], confidence=1.0, processing_time=0), "r")
+    cache.get("a")
+    cache.put("c", RAGResponse(answer="c", sources=[], confidence=1.0, processing_time=0), "r")
+
+    assert cache.get("b") is None
+    assert cache.get("a").answer == "a"
+    assert len(cache) == 2
+
+
+def test_progressive_retrieval_ranks_top_k_by_combined_score():
+    """Test classement top-K vectorisé par score combiné."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(max_chunks=3, min_similarity=0.0))
+
+    chunks = asyncio.run(pipeline._progressive_retrieval("query", "hyperion", frozenset({"query"})))
+    scores = [chunk.combined_score for chunk in chunks]
+    expected = [
+        chunk.score * 0.3
+        + chunk.semantic_score * 0.25
+        + chunk.relevance_score * 0.2
+        + chunk.freshness_score * 0.15
+        + chunk.authority_score * 0.1
+        for chunk in chunks
+    ]
+
+    assert len(chunks) == 3
+    assert scores == sorted(scores, reverse=True)
+    assert scores == pytest.approx(expected)
+    assert [chunk.source for chunk in chunks] == ["file_0.py", "file_1.py", "file_2.py"]
+
+
+def test_fused_answer_candidates_run_concurrently():
+    """Test génération concurrente des candidats, bornée par le sémaphore."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(max_concurrent_retrievals=2))
+    running = peak = 0
+
+    async def slow_answer(*_args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "answer"
+
+    pipeline._generate_answer_from_chunk = slow_answer
+    pipeline._generate_answer_from_context = slow_answer
+    pipeline._generate_intent_based_answer = slow_answer
+    chunks = [_chunk(f"content {i}", chunk_id=f"c{i}") for i in range(3)]
+
+    asyncio.run(pipeline._generate_fused_answer(chunks, "how to test"))
+
+    assert peak == 2
+
+
+def test_detect_query_intent_priority():
+    """Test détection d'intention : priorité de la table, pas de position."""
+    pipeline = EnhancedRAGPipeline()
+
+    assert pipeline._detect_query_intent("Show me how to deploy") == "how_to"
+    assert pipeline._detect_query_intent("Pourquoi ce choix ?") == "explanation"
+    assert pipeline._detect_query_intent("redis vs memcached") == "comparison"
+    assert pipeline._detect_query_intent("deploy the app") is None
+    # Mots-clés qui se chevauchent : "vs" ne masque pas "show me"
+    assert pipeline._detect_query_intent("tvshow me the code") == "example"
+
+
+def test_analyze_content_single_pass():
+    """Test analyse fusionnée : termes techniques, exemples, explications."""
+    pipeline = EnhancedRAGPipeline()
+    chunk = _chunk("This class has a method, e.g. save(), because it must Return data.")
+
+    analysis = pipeline._analyze_content(chunk)
+
+    assert analysis.tech_score == pytest.approx(3 / 6)
+    assert analysis.length == len(chunk.content)
+    assert analysis.has_example and analysis.has_explanation
+
+
+def test_semantic_reranking_kernel_scores():
+    """Test noyau de reranking : cohérence, spécificité et complétude."""
+    pipeline = EnhancedRAGPipeline()
+    short = _chunk("This class has a method, e.g. save(), because it must Return data.", "c1")
+    plain = _chunk("x" * 120, "c2")
+
+    ranked = pipeline._semantic_reranking([plain, short], frozenset({"class", "save"}))
+
+    # short : cohérence 1/2, spécificité (0.5 + 1) / 2, complétude 0.6
+    assert ranked == [short, plain]
+    assert short.semantic_score == pytest.approx(0.5 * 0.4 + 0.75 * 0.3 + 0.6 * 0.3)
+    # plain : cohérence 0, spécificité (0 + 1) / 2, complétude 0.4
+    assert plain.semantic_score == pytest.approx(0.5 * 0.3 + 0.4 * 0.3)
+
+
+def test_stage_timings_ewma():
+    """Test moyennes EWMA par étape : NaN initial, première mesure brute."""
+    pipeline = EnhancedRAGPipeline()
+    assert np.isnan(pipeline.stats["avg_retrieval_time"])
+
+    pipeline._update_stats({"retrieval": 2_000_000_000, "rerank": 0, "generation": 1_000})
+    pipeline._update_stats({"retrieval": 1_000_000_000, "rerank": 0, "generation": 1_000})
+
+    assert pipeline.stats["total_queries"] == 2
+    assert pipeline.stats["avg_retrieval_time"] == pytest.approx(0.9 * 2.0 + 0.1 * 1.0)
+    assert pipeline.stats["avg_rerank_time"] == 0.0
+    assert pipeline.stats["avg_generation_time"] == pytest.approx(1e-6)
+
+
+def test_query_records_stage_timings():
+    """Test que chaque étape de la requête est chronométrée."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(enable_response_cache=False))
+
+    response = asyncio.run(pipeline.query("How to use auth?", "hyperion"))
+
+    for key in ("avg_retrieval_time", "avg_rerank_time", "avg_generation_time"):
+        assert pipeline.stats[key] >= 0.0
+    assert response.generation_stats["avg_rerank_time"] == pipeline.stats["avg_rerank_time"]
+
+
+def test_compress_chunk_content_streams_sentences():
+    """Test compression : 3 premières phrases d'office, puis les pertinentes, 5 au plus."""
+    pipeline = EnhancedRAGPipeline()
+    content = (
+        "Intro one. Intro two! Intro three? Filler text here. "
+        "Login uses a token. Another login token step. Third login token. Fourth login token"
+    )
+
+    compressed = pipeline._compress_chunk_content(content, frozenset({"login", "token"}))
+
+    assert compressed == (
+        "Intro one. Intro two. Intro three. Login uses a token. Another login token step."
+    )
+
+
+def test_estimate_tokens_per_script_rates():
+    """Test estimation des tokens par écriture : latin, chiffres, CJK."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1  # 4 * 0.25
+    assert estimate_tokens("12345") == 2  # 5 * 0.4
+    assert estimate_tokens("数据库") == 2  # 3 * 0.55, arrondi supérieur
+
+
+def test_chunk_token_estimate_memoized():
+    """Test que l'estimation est mémorisée et invalidée au changement de contenu."""
+    pipeline = EnhancedRAGPipeline()
+    chunk = _chunk("short content")
+
+    pipeline._chunk_token_estimate(chunk)
+    pipeline._chunk_token_estimate(chunk)
+    assert pipeline.stats["token_estimate_misses"] == 1
+    assert pipeline.stats["token_estimate_hits"] == 1
+
+    chunk.set_content("new content")
+    assert chunk.token_estimate is None
+
+
+def test_fuse_answer_candidates_dedups_parts():
+    """Test fusion : une partie identique n'est ajoutée qu'une fois."""
+    pipeline = EnhancedRAGPipeline()
+
+    fused = asyncio.run(pipeline._fuse_answer_candidates(["abcdabcd", "xyzwabcd"], "q"))
+
+    assert fused == "abcd"
+
+
+def _keyword_embed(text: str) -> np.ndarray:
+    """Embedding jouet : un axe par mot-clé présent."""
+    text = text.lower()
+    return np.array([float(word in text) for word in ("auth", "token", "deploy")]) + 1e-3
+
+
+def test_index_chunks_batched_retrieval():
+    """Test récupération vectorielle : requête et expansion en un seul lot."""
+    config = RAGConfig(max_chunks=2, min_similarity=0.5)
+    pipeline = EnhancedRAGPipeline(config, embed_fn=_keyword_embed)
+    pipeline.index_chunks(
+        "hyperion",
+        [
+            _chunk("auth token refresh", chunk_id="a", source="auth.py"),
+            _chunk("deploy with docker", chunk_id="d", source="deploy.md"),
+        ],
+    )
+
+    chunks = asyncio.run(pipeline._progressive_retrieval("auth token", "hyperion", frozenset()))
+
+    assert [chunk.chunk_id for chunk in chunks] == ["a"]
+    assert chunks[0].score == pytest.approx(1.0, abs=1e-2)
+    # Le chunk indexé n'est pas muté par le pipeline
+    assert pipeline.chunk_indexes["hyperion"]._chunks[0].combined_score == 0.0
+
+
+def test_embeddings_cache_roundtrip(tmp_path):
+    """Test persistance du cache d'embeddings (clés sha256 + vecteurs)."""
+    pipeline = EnhancedRAGPipeline(embed_fn=_keyword_embed)
+    embedding = pipeline._get_query_embedding("auth setup")
+    path = tmp_path / "embeddings.npz"
+    pipeline.save_embeddings_cache(path)
+
+    restored = EnhancedRAGPipeline(embed_fn=None)
+    restored.load_embeddings_cache(path)
+
+    np.testing.assert_allclose(restored._get_query_embedding("auth setup"), embedding, atol=1e-2)
+
+
+def test_embeddings_cache_lru_eviction():
+    """Test cache d'embeddings : LRU borné, évictions comptées."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(max_embedding_cache_size=2), embed_fn=_keyword_embed)
+    pipeline._get_query_embedding("auth")
+    pipeline._get_query_embedding("token")
+    pipeline._get_query_embedding("auth")  # "auth" redevient le plus récent
+    pipeline._get_query_embedding("deploy")
+
+    assert len(pipeline.embeddings_cache) == 2
+    assert pipeline.stats["cache_evictions"] == 1
+
+    calls = []
+    pipeline.embed_fn = lambda text: calls.append(text) or _keyword_embed(text)
+    pipeline._get_query_embedding("auth")
+    assert calls == []
+
+
+def test_quantize_embedding_roundtrip():
+    """Test quantification int8 par vecteur : erreur bornée par l'échelle."""
+    vector = np.array([0.6, -0.8, 0.0], dtype=np.float32)
+
+    quantized = quantize_embedding(vector)
+
+    assert quantized.values.dtype == np.int8
+    assert quantized.values.tolist() == [95, -127, 0]
+    np.testing.assert_allclose(
+        dequantize_embedding(quantized), vector, atol=quantized.scale / 2 + 1e-7
+    )
+    assert quantize_embedding(np.zeros(3)).scale == 1.0
+
+
+def test_adaptive_top_k_by_query_complexity():
+    """Test top-K adaptatif : moins de chunks pour les requêtes simples."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(max_chunks=9))
+
+    assert pipeline._adaptive_k("what is redis") == 3
+    assert pipeline._adaptive_k(" ".join(["word"] * 10)) == 9
+    assert pipeline._adaptive_k(" ".join(["word"] * 20)) == 18
+
+    simple = asyncio.run(pipeline._progressive_retrieval("what is redis", "hyperion", frozenset()))
+    assert len(simple) == 3
+
+    pipeline.config.enable_adaptive_top_k = False
+    assert pipeline._adaptive_k("what is redis") == 9
+
+
+def test_cag_fast_path_for_small_corpus():
+    """Test CAG : petit corpus indexé, réponse sans passer par la récupération."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(enable_response_cache=False), embed_fn=_keyword_embed)
+    pipeline.index_chunks("small", [_chunk("auth token refresh", chunk_id="a")])
+
+    async def no_retrieval(*_args):
+        raise AssertionError("récupération appelée")
+
+    pipeline._progressive_retrieval = no_retrieval
+    response = asyncio.run(pipeline.query("How to refresh a token?", "small"))
+
+    assert response.answer.startswith("Corpus complet de small")
+    assert [chunk.chunk_id for chunk in response.sources] == ["a"]
+    assert "small" in pipeline.kv_cache
+
+    pipeline.config.cag_threshold_tokens = 0
+    pipeline.index_chunks("small", [_chunk("deploy with docker", chunk_id="d")])
+    assert "small" not in pipeline.kv_cache
+    assert pipeline._get_cag_context("small") is None
+
+
+def test_completeness_and_expansion_constants():
+    """Test complétude par ensembles de mots et expansion limitée à 2 synonymes."""
+    pipeline = EnhancedRAGPipeline()
+    answer = "For example, the login handler checks the token."
+
+    score = pipeline._evaluate_completeness(
+        answer, frozenset(answer.lower().split()), frozenset({"login", "flow"})
+    )
+
+    assert score == pytest.approx(0.3 + 0.3)
+    expanded = pipeline._expand_query("Function error")
+    assert expanded == "function method procedure error exception bug"
+
+
+def test_semantic_reranking_order_is_stable():
+    """Test tri du reranking : scores décroissants, ordre d'origine en cas d'égalité."""
+    pipeline = EnhancedRAGPipeline()
+    chunks = [_chunk("x" * 120, f"c{i}") for i in range(3)] + [_chunk("class save", "best")]
+
+    ranked = pipeline._semantic_reranking(chunks, frozenset({"class", "save"}))
+
+    assert [chunk.chunk_id for chunk in ranked] == ["best", "c0", "c1", "c2"]
+
+
+def test_compress_context_prefix_sum_budget():
+    """Test budget de tokens : chunks gardés tant que la somme cumulée tient."""
+    pipeline = EnhancedRAGPipeline(RAGConfig(max_tokens=100))  # Budget de 50 tokens
+    chunks = [_chunk("a" * 80, f"c{i}") for i in range(4)]  # 20 tokens chacun
+
+    kept = pipeline._compress_context(chunks, frozenset())
+
+    assert [chunk.chunk_id for chunk in kept] == ["c0", "c1"]
+    assert pipeline._compress_context([], frozenset()) == []
+
+
+def test_authority_score_by_extension():
+    """Test score d'autorité par extension précalculée."""
+    pipeline = EnhancedRAGPipeline()
+    scores = {
+        source: pipeline._calculate_authority_score(_chunk("x", source=source))
+        for source in ("README.MD", "app.py", "app.test.py", "Makefile", "md")
+    }
+
+    assert scores == {
+        "README.MD": 0.9,
+        "app.py": 0.8,
+        "app.test.py": 0.8,
+        "Makefile": 0.6,
+        "md": 0.6,
+    }
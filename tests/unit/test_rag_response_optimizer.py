@@ -0,0 +1,228 @@
+"""
+Tests unitaires pour ResponseOptimizer (RAG v2.9).
+
+Auteur: Ryckman Matthieu
+Projet: Hyperion (projet personnel)
+Version: 2.9.0
+"""
+
+import asyncio
+
+import pytest
+
+from hyperion.modules.rag.v2_9 import response_optimizer
+from hyperion.modules.rag.v2_9.response_optimizer import OptimizationConfig, ResponseOptimizer
+
+
+def test_simplify_vocabulary_single_pass():
+    """Test table de vocabulaire appliquée en une passe, insensible à la casse."""
+    optimizer = ResponseOptimizer()
+
+    text = "Utilize the Configuration, therefore implement it."
+
+    assert optimizer._simplify_vocabulary(text) == "use the setup, so use it."
+
+
+def test_enhance_clarity_replaces_complex_phrases():
+    """Test suppression du remplissage et simplification des phrases complexes."""
+    optimizer = ResponseOptimizer()
+
+    text, improved = optimizer._enhance_clarity(
+        "It should be noted that we really need this In Order To work."
+    )
+
+    assert improved
+    assert text == "we need this to work."
+
+
+def test_clarity_score_counts_all_criteria_in_one_pass():
+    """Test score de clarté : trois critères comptés par une seule regex."""
+    optimizer = ResponseOptimizer()
+    original = "It was tested by us, basically in order to check it."
+
+    assert optimizer._count_clarity_issues(original) == {
+        "passive_voice": 1,
+        "filler_words": 1,
+        "complex_phrases": 1,
+    }
+    score = optimizer._calculate_clarity_score(original, "We test it to check it.")
+    assert score == pytest.approx(1.0)
+
+
+def test_filler_words_removed_in_one_pass():
+    """Test suppression de tous les mots de remplissage par une seule alternance."""
+    optimizer = ResponseOptimizer()
+
+    text, improved = optimizer._enhance_clarity("Actually it is Really rather good")
+
+    assert improved
+    assert text == "it is good"
+
+
+def test_cache_key_stable_and_order_independent():
+    """Test clé de cache (XXH3 ou BLAKE2b) : indépendante de l'ordre des clés du contexte."""
+    key = ResponseOptimizer._make_cache_key("answer", {"a": 1, "b": 2})
+
+    assert key == ResponseOptimizer._make_cache_key("answer", {"b": 2, "a": 1})
+    assert key != ResponseOptimizer._make_cache_key("answer", None)
+    assert len(key) == 32
+
+
+def test_cache_key_blake2b_fallback_without_xxhash(monkeypatch):
+    """Test repli BLAKE2b quand xxhash n'est pas installé."""
+    monkeypatch.setattr(response_optimizer, "XXHASH_AVAILABLE", False)
+
+    key = ResponseOptimizer._make_cache_key("answer", None)
+
+    assert key == ResponseOptimizer._make_cache_key("answer", None)
+    assert len(key) == 32
+
+
+def test_cache_key_tolerates_unsortable_context():
+    """Test clé de cache : contexte à clés de types mélangés accepté (repli repr)."""
+    context = {1: "a", "b": 2}
+
+    key = ResponseOptimizer._make_cache_key("answer", context)
+
+    assert key == ResponseOptimizer._make_cache_key("answer", {1: "a", "b": 2})
+    assert ResponseOptimizer().optimize_response("It works.", context).optimized_response
+
+
+def test_optimization_cache_lru_eviction():
+    """Test cache d'optimisation borné : éviction de l'entrée la moins récente."""
+    optimizer = ResponseOptimizer(OptimizationConfig(cache_max_entries=2))
+
+    for response in ("first answer.", "second answer.", "first answer.", "third answer."):
+        optimizer.optimize_response(response)
+
+    cached = [result.original_response for result in optimizer.optimization_cache.values()]
+    assert cached == ["first answer.", "third answer."]
+
+
+def test_remove_redundancy_keeps_first_sentence_occurrence():
+    """Test déduplication des phrases : première occurrence conservée, ordre préservé."""
+    optimizer = ResponseOptimizer()
+
+    text, removed = optimizer._remove_redundancy("Cache works. Index builds. cache WORKS. Done")
+
+    assert removed
+    assert text == "Cache works. Index builds. Done."
+
+
+def test_sentences_are_trimmed_and_non_empty():
+    """Test segmentation en phrases par regex : fragments vides ignorés."""
+    assert ResponseOptimizer._sentences(" First.  Second ..Third. ") == ["First", "Second", "Third"]
+    assert ResponseOptimizer._sentences("...") == []
+
+
+def test_fused_clarity_and_readability_pass():
+    """Test passage fusionné : clarté et lisibilité "intermediate" en une réécriture."""
+    config = OptimizationConfig(enable_coherence_check=False, enable_conciseness=False)
+    fused = ResponseOptimizer(config)
+    staged = ResponseOptimizer(config)
+    response = "Actually, in order to deploy, Subsequently restart it."
+
+    result = fused.optimize_response(response)
+    text, clarity_improved = staged._enhance_clarity(response)
+
+    assert result.optimized_response == staged._moderate_simplification(text)
+    assert result.optimized_response == "Actually, to deploy, then restart it."
+    assert clarity_improved
+    assert result.techniques_applied == ["clarity_enhancement", "readability_improvement"]
+
+
+def test_replacements_fold_non_ascii_case_variants():
+    """Test ſ, ı, İ égaux à s, i sous IGNORECASE : remplacés comme leur forme ASCII."""
+    optimizer = ResponseOptimizer()
+
+    result = optimizer.optimize_response(
+        "We ran the job. Conſequently it worked well in order to ship."
+    )
+
+    assert result.optimized_response == "We ran the job. therefore it worked well to ship."
+    assert result.techniques_applied == ["clarity_enhancement", "readability_improvement"]
+    assert optimizer._simplify_vocabulary("Conſequently, utılıze İt") == "so, use İt"
+    assert optimizer._moderate_simplification("Conſequently done") == "therefore done"
+    assert response_optimizer._replacement({"to": "x"}, "ſo") == "ſo"
+
+
+def test_coherence_connectors_match_whole_words():
+    """Test connecteurs choisis par mots entiers (plus de faux positifs en sous-chaîne)."""
+    optimizer = ResponseOptimizer()
+
+    text, improved = optimizer._improve_coherence(
+        "First load the index. Query it. One example is search"
+    )
+
+    assert improved
+    assert text == "First load the index. Additionally query it. For example one example is search."
+    assert optimizer._suggest_connector({"attribute"}, {"thus"}) is None
+    assert optimizer._suggest_connector({"firstly"}, {"then", "run"}) is None
+
+
+def test_sentence_importance_scores_are_parallel():
+    """Test scores d'importance : une liste parallèle, mots-clés par tokens entiers."""
+    optimizer = ResponseOptimizer()
+    sentences = [
+        "The method and its configuration",
+        "Short one",
+        "This approach covers every implementation detail we rely on for the index today",
+    ]
+
+    assert optimizer._sentence_importance_scores(sentences) == pytest.approx([1.3, -0.5, 2.3])
+
+
+def test_clarity_score_skips_unchanged_text():
+    """Test score de clarté nul sans comptage quand le texte est inchangé."""
+    optimizer = ResponseOptimizer()
+    optimizer._count_clarity_issues = None  # tout appel échouerait
+
+    assert optimizer._calculate_clarity_score("It was done by us.", "It was done by us.") == 0.0
+
+
+def test_enhance_clarity_collapses_any_whitespace_run():
+    """Test normalisation des blancs : regex seulement si un blanc hors espace simple existe."""
+    optimizer = ResponseOptimizer()
+
+    assert optimizer._enhance_clarity(" Keep  it\tshort now ") == ("Keep it short now", True)
+    assert optimizer._enhance_clarity("Keep it short") == ("Keep it short", False)
+
+
+def test_short_response_returned_unchanged():
+    """Test retour anticipé sous min_length_chars, sans passe ni mise en cache."""
+    optimizer = ResponseOptimizer(OptimizationConfig(min_length_chars=64))
+
+    result = optimizer.optimize_response("Actually, it was done by us.")
+
+    assert result.optimized_response == "Actually, it was done by us."
+    assert result.techniques_applied == []
+    assert result.optimization_score == 0.0
+    assert not optimizer.optimization_cache
+
+
+def test_optimize_response_async_matches_sync():
+    """Test variante asynchrone (thread) : même résultat que l'appel synchrone."""
+    response = "It should be noted that we really need this In Order To work."
+
+    result = asyncio.run(ResponseOptimizer().optimize_response_async(response))
+    expected = ResponseOptimizer().optimize_response(response)
+
+    assert result.optimized_response == expected.optimized_response
+    assert result.techniques_applied == expected.techniques_applied
+
+
+def test_enhance_clarity_translates_line_breaks():
+    """Test sauts de ligne et tabulations isolés ramenés à une espace sans regex."""
+    optimizer = ResponseOptimizer()
+    optimizer._whitespace_re = None  # la regex ne doit pas être nécessaire
+
+    assert optimizer._enhance_clarity("Keep\nit\tshort\r") == ("Keep it short", True)
+
+
+def test_pattern_registry_shared_across_instances():
+    """Test registre de patterns au niveau classe : aucune recompilation par instance."""
+    first, second = ResponseOptimizer(), ResponseOptimizer(OptimizationConfig())
+
+    assert first._clarity_re is second._clarity_re
+    assert first._redundancy_res is ResponseOptimizer._redundancy_res
+    assert "_clarity_rewrite_re" not in vars(first)
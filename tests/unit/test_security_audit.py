@@ -0,0 +1,266 @@
+"""
+Tests unitaires pour l'auditeur de sécurité (v3.0).
+
+Auteur: Ryckman Matthieu
+Projet: Hyperion (projet personnel)
+Version: 3.0.0
+"""
+
+import hashlib
+import json
+import re
+
+import pytest
+
+from hyperion.modules.security.v3_0 import audit_security
+from hyperion.modules.security.v3_0.audit_security import SecurityAuditor, _line_bounded
+
+
+def test_vulnerability_patterns_compiled_once():
+    """Test patterns compilés à l'initialisation, source conservée pour l'identifiant."""
+    auditor = SecurityAuditor()
+
+    for vuln_config in auditor.vulnerability_patterns.values():
+        for pattern, raw_pattern in vuln_config["patterns"]:
+            assert pattern.pattern.endswith(_line_bounded(raw_pattern))
+    assert auditor.vulnerability_patterns["weak_crypto"]["patterns"][0][0].search("x = MD5(y)")
+
+
+def test_compile_pattern_falls_back_to_re(monkeypatch):
+    """Test repli sur re (insensible à la casse) quand google-re2 est absent."""
+    monkeypatch.setattr(audit_security, "RE2_AVAILABLE", False)
+
+    pattern = audit_security._compile_pattern(r"UNION\s+SELECT")
+
+    assert isinstance(pattern, re.Pattern)
+    assert pattern.search("union select")
+
+
+def test_scan_file_content_reports_line_and_stable_id():
+    """Test scan d'un contenu : ligne, catégorie et identifiant dérivé de la source."""
+    auditor = SecurityAuditor()
+    content = "x = 1\nquery = 'a' union select b\n"
+
+    vulns = auditor._scan_file_content("app.py", content)
+
+    assert [(v.category, v.line_number) for v in vulns] == [("sql_injection", 2)]
+    expected_id = hashlib.blake2b(b"app.py:2:UNION\\s+SELECT", digest_size=4).hexdigest()
+    assert vulns[0].vuln_id == expected_id
+    assert vulns[0].evidence == "query = 'a' union select b"
+
+
+def test_combined_category_pattern_keeps_every_hit():
+    """Test union par catégorie : chaque pattern présent sur la ligne reste signalé."""
+    auditor = SecurityAuditor()
+    content = "password = 'a'; token = 'b'\nclean line\napi_key='c'"
+
+    vulns = auditor._scan_file_content("conf.py", content)
+
+    assert auditor.vulnerability_patterns["xss"]["combined"].search("x.innerHTML = a + b")
+    assert [v.line_number for v in vulns if v.category == "hardcoded_secrets"] == [1, 3, 1]
+
+
+def test_whole_file_scan_never_spans_lines():
+    """Test scan du texte entier : aucun match à cheval sur deux lignes, une fois par ligne."""
+    auditor = SecurityAuditor()
+    content = "x = 'UNION'\nSELECT 1\nmd5(a) + md5(b)"
+
+    vulns = auditor._scan_file_content("app.py", content)
+
+    assert [(v.category, v.line_number, v.evidence) for v in vulns] == [
+        ("weak_crypto", 3, "md5(a) + md5(b)")
+    ]
+
+
+def test_hyperscan_scan_matches_regex_scan(monkeypatch):
+    """Test que la base Hyperscan (offsets UTF-8) signale les mêmes lignes que les regex."""
+    pytest.importorskip("hyperscan")
+    content = "é = 1\nquery = 'é' UNION\u00a0SELECT x\nmd5(a) ; Password = 'ß'\n../..\nOR 1=1"
+
+    hyperscan_auditor = SecurityAuditor()
+    assert hyperscan_auditor._hs_db is not None
+    hyperscan_vulns = hyperscan_auditor._scan_file_content("app.py", content)
+
+    monkeypatch.setattr(audit_security, "HYPERSCAN_AVAILABLE", False)
+    regex_vulns = SecurityAuditor()._scan_file_content("app.py", content)
+
+    assert hyperscan_vulns == regex_vulns
+    assert len(regex_vulns) == 5
+
+
+def test_parallel_scan_matches_sequential_scan(tmp_path):
+    """Test pool de processus : mêmes vulnérabilités, dans l'ordre des fichiers."""
+    files = []
+    for index in range(4):
+        path = tmp_path / f"module_{index}.py"
+        path.write_text(f"x = {index}\nkey = md5(data)\napi_key = 'k{index}'\n")
+        files.append(path)
+    auditor = SecurityAuditor()
+
+    parallel = auditor._scan_files_parallel(files)
+    sequential = [vuln for path in files for vuln in auditor._scan_file(path)]
+
+    assert parallel == sequential
+    assert len(parallel) == 8
+
+
+def test_large_file_scanned_through_mmap(tmp_path, monkeypatch):
+    """Test gros fichier projeté en mémoire : mêmes lignes et preuves que le scan texte."""
+    path = tmp_path / "bundle.js"
+    path.write_text("const a = 1;\nel.innerHTML = 'é' + x;\n" * 3, encoding="utf-8")
+    auditor = SecurityAuditor()
+    auditor._hs_db = None
+    expected = auditor._scan_file(path)
+
+    monkeypatch.setattr(audit_security, "MMAP_MIN_BYTES", 1)
+    mapped = auditor._scan_file(path)
+
+    assert mapped == expected
+    assert [v.line_number for v in mapped] == [2, 4, 6]
+    assert mapped[0].evidence == "el.innerHTML = 'é' + x;"
+
+
+@pytest.mark.parametrize("newline", ["\r\n", "\r"])
+def test_large_file_mmap_universal_newlines(tmp_path, monkeypatch, newline):
+    """Test fins de ligne "\\r\\n" et "\\r" en octets : mêmes lignes que la lecture texte."""
+    path = tmp_path / "bundle.js"
+    lines = ["const a = 1;", "el.innerHTML = a", "+ b; password = 'x';"] * 2
+    path.write_bytes(newline.join(lines).encode())
+    auditor = SecurityAuditor()
+    auditor._hs_db = None
+    expected = auditor._scan_file(path)
+
+    monkeypatch.setattr(audit_security, "MMAP_MIN_BYTES", 1)
+    mapped = auditor._scan_file(path)
+
+    assert mapped == expected
+    assert [v.line_number for v in mapped] == [3, 6]
+    assert mapped[0].evidence == "+ b; password = 'x';"
+
+
+@pytest.mark.skipif(not audit_security.RE2_AVAILABLE, reason="google-re2 non installé")
+def test_bytes_patterns_compiled_with_re2():
+    """Test variantes octets compilées par RE2 (temps linéaire) quand il est disponible."""
+    auditor = SecurityAuditor()
+    sql = auditor.vulnerability_patterns["sql_injection"]
+
+    assert all(type(p).__module__.startswith("re2") for p, _raw in sql["bytes_patterns"])
+    assert type(sql["bytes_combined"]).__module__.startswith("re2")
+    assert sql["bytes_combined"].search(b"x = 'ab\xff';  drop table users")
+    assert not sql["bytes_combined"].search(b"SELECT a\rFROM b WHERE c = d + e")
+
+
+def test_collect_source_files_single_walk(tmp_path):
+    """Test collecte en un parcours : extensions filtrées, groupées dans l'ordre historique."""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "app.js").write_text("")
+    (tmp_path / "pkg" / "core.py").write_text("")
+    (tmp_path / "main.py").write_text("")
+    (tmp_path / "README.md").write_text("")
+    (tmp_path / "notes.PY").write_text("")
+
+    files = SecurityAuditor._collect_source_files(tmp_path)
+
+    assert sorted(files[:2]) == [tmp_path / "main.py", tmp_path / "pkg" / "core.py"]
+    assert files[2:] == [tmp_path / "pkg" / "app.js"]
+
+
+def test_vuln_id_tolerates_undecodable_file_names():
+    """Test identifiant calculé même pour un nom de fichier non décodable (surrogates)."""
+    auditor = SecurityAuditor()
+
+    vulns = auditor._scan_file_content("caf\udce9.py", "h = md5(x)")
+
+    assert len(vulns) == 1
+    assert len(vulns[0].vuln_id) == 8
+
+
+def test_full_audit_tallies_severities_once(tmp_path):
+    """Test audit complet : compteurs de sévérité et résumé issus d'un même décompte."""
+    (tmp_path / "app.py").write_text("q = 'x' UNION SELECT y\nh = md5(z)\nel.innerHTML = a + b\n")
+    auditor = SecurityAuditor()
+
+    report = auditor.perform_full_audit(str(tmp_path))
+
+    assert (report.total_issues, report.critical_issues, report.high_issues) == (3, 1, 1)
+    assert "🔴 1 vulnérabilités critiques détectées" in report.executive_summary
+    assert "🟠 1 vulnérabilités haute priorité" in report.executive_summary
+    assert len(report.audit_id) == 12
+
+
+def test_compare_audits_uses_id_index(tmp_path):
+    """Test comparaison d'audits : index par identifiant et différences par ensembles."""
+    app = tmp_path / "app.py"
+    app.write_text("h = md5(z)\nel.innerHTML = a + b\n")
+    auditor = SecurityAuditor()
+    first = auditor.perform_full_audit(str(tmp_path))
+    app.write_text("h = md5(z)\nq = 'x' UNION SELECT y\n")
+    second = auditor.perform_full_audit(str(tmp_path))
+    auditor.audit_history.clear()  # la recherche passe par l'index
+
+    comparison = auditor.compare_audits(first.audit_id, second.audit_id)
+
+    assert comparison["new_vulnerabilities"] == 1
+    assert comparison["resolved_vulnerabilities"] == 1
+    with pytest.raises(ValueError):
+        auditor.compare_audits(first.audit_id, "inconnu")
+
+
+def test_anchor_prefilter_selects_candidate_categories():
+    """Test préfiltre littéral : seules les catégories dont un ancrage apparaît sont scannées."""
+    auditor = SecurityAuditor()
+    fallback = SecurityAuditor()
+    fallback._anchor_automaton = None  # repli sans pyahocorasick : recherche par littéral
+
+    for scanner in (auditor, fallback):
+        assert scanner._anchored_types("h = MD5(data)") == {"weak_crypto"}
+        assert scanner._anchored_types("x = y") == set()
+        # Équivalences de casse Unicode des regex (İ ~ i, ſ ~ s) conservées
+        assert scanner._anchored_types("javascrİpt: paſsword") == {"xss", "hardcoded_secrets"}
+
+
+def test_anchor_prefilter_keeps_regex_results():
+    """Test préfiltre littéral : résultats du scan regex identiques, catégorie non ancrée incluse."""
+    spec = SecurityAuditor()._load_vulnerability_patterns()
+    spec["custom"] = {"patterns": [r"eval\("], "severity": "low", "remediation": "-"}
+    auditor = SecurityAuditor(spec)
+    auditor._hs_db = None
+    content = "q = 'x' UNION SELECT y\nr = eval(s)\nh = sha1(z)\n"
+
+    vulnerabilities = auditor._scan_file_content("app.py", content)
+
+    assert auditor._anchored_types("r = eval(s)") == {"custom"}
+    assert [(v.category, v.line_number) for v in vulnerabilities] == [
+        ("sql_injection", 1),
+        ("weak_crypto", 3),
+        ("custom", 2),
+    ]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_export_report_json_matches_stdlib(tmp_path, monkeypatch, use_orjson):
+    """Test export JSON (orjson si disponible) : même document que json.dump(asdict(...))."""
+    if use_orjson:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(audit_security, "ORJSON_AVAILABLE", use_orjson)
+    (tmp_path / "app.py").write_text("el.innerHTML = a + b\n# clé : token = 'é'\n")
+    auditor = SecurityAuditor()
+    report = auditor.perform_full_audit(str(tmp_path))
+    output = tmp_path / "report.json"
+
+    assert auditor.export_report(report, str(output))
+
+    expected = json.dumps(audit_security.asdict(report), indent=2, ensure_ascii=False)
+    assert output.read_text(encoding="utf-8") == expected
+
+
+def test_risk_score_severity_weights():
+    """Test score de risque : poids par niveau de sévérité, inconnu au poids minimal."""
+    auditor = SecurityAuditor()
+    vulnerabilities = [
+        audit_security.SecurityVulnerability("a", severity, "xss", "-", confidence=0.5)
+        for severity in ("critical", "high", "medium", "low", "unknown")
+    ]
+
+    # (10 + 7 + 4 + 1 + 1) * 0.5 * 2 / 3
+    assert auditor.generate_risk_score(vulnerabilities, []) == pytest.approx(7.67)
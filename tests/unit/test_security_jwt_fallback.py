@@ -0,0 +1,114 @@
+"""
+Tests unitaires pour le fallback JWT.
+
+Auteur: Ryckman Matthieu
+Projet: Hyperion (projet personnel)
+Version: 3.0.0
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from hyperion.modules.security import jwt_fallback
+from hyperion.modules.security.jwt_fallback import jwt
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def test_encode_matches_reference_token():
+    """Test encode : en-tête, payload et signature HMAC-SHA256 attendus."""
+    payload = {"sub": "user-1", "exp": 4_102_444_800}
+
+    token = jwt.encode(payload, "secret")
+
+    header_b64 = _b64(b'{"typ":"JWT","alg":"HS256"}')  # JSON compact
+    payload_b64 = _b64(json.dumps(payload, separators=(",", ":")).encode())
+    message = f"{header_b64}.{payload_b64}".encode()
+    signature = _b64(hmac.new(b"secret", message, hashlib.sha256).digest())
+    assert token == f"{header_b64}.{payload_b64}.{signature}"
+
+
+def test_encode_decode_roundtrip():
+    """Test aller-retour encode/decode du payload."""
+    payload = {"sub": "user-1", "roles": ["admin"], "exp": 4_102_444_800}
+
+    assert jwt.decode(jwt.encode(payload, "secret"), "secret") == payload
+
+
+def test_decode_rejects_bad_signature():
+    """Test decode : signature vérifiée avec la clé, à temps constant."""
+    token = jwt.encode({"sub": "user-1"}, "secret")
+
+    with pytest.raises(jwt.InvalidTokenError, match="Invalid signature"):
+        jwt.decode(token, "other-secret")
+    with pytest.raises(jwt.InvalidTokenError, match="Invalid signature"):
+        jwt.decode(token[:-2] + "xx", "secret")
+    assert jwt.decode(token, "secret", algorithms=["HS256"]) == {"sub": "user-1"}
+
+
+def test_decode_pads_every_payload_length():
+    """Test padding par table : payloads de toutes longueurs modulo 4."""
+    for size in range(8):
+        payload = {"sub": "u" * size}
+
+        assert jwt.decode(jwt.encode(payload, "secret"), "secret") == payload
+
+
+def test_decode_raises_specific_error_types():
+    """Test decode : erreurs typées comme PyJWT (expiré, format, payload illisible)."""
+    expired = jwt.encode({"sub": "user-1", "exp": 1}, "secret")
+    garbage = jwt.encode({"sub": "user-1"}, "secret").split(".")
+    garbage[1] = "bm90LWpzb24"  # "not-json"
+    message = f"{garbage[0]}.{garbage[1]}".encode()
+    garbage[2] = _b64(hmac.new(b"secret", message, hashlib.sha256).digest())
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        jwt.decode(expired, "secret")
+    with pytest.raises(jwt.InvalidTokenError, match="Invalid token format"):
+        jwt.decode("a.b", "secret")
+    with pytest.raises(jwt.InvalidTokenError):
+        jwt.decode(".".join(garbage), "secret")
+    assert issubclass(jwt.ExpiredSignatureError, jwt.InvalidTokenError)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_auth_manager_payload_roundtrip(monkeypatch, use_orjson):
+    """Test payload type auth_manager : iat/exp datetime encodés en timestamps, quel que soit le JSON."""
+    if use_orjson:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(jwt_fallback, "ORJSON_AVAILABLE", use_orjson)
+    now = datetime.utcnow()
+    payload = {
+        "session_id": "s-1",
+        "user_id": "user-1",
+        "type": "access",
+        "iat": now,
+        "exp": now + timedelta(seconds=3600),
+    }
+
+    decoded = jwt.decode(jwt.encode(payload, "secret"), "secret", algorithms=["HS256"])
+
+    assert decoded["exp"] - decoded["iat"] == 3600
+    assert decoded["iat"] == int((now - datetime(1970, 1, 1)).total_seconds())
+    assert isinstance(payload["exp"], datetime)  # payload appelant non modifié
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_encode_accepts_same_inputs_with_or_without_orjson(monkeypatch, use_orjson):
+    """Test encode : clés non str acceptées, datetime hors claims refusé, dans les deux chemins."""
+    if use_orjson:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(jwt_fallback, "ORJSON_AVAILABLE", use_orjson)
+
+    token = jwt.encode({1: "a", "big": 2**70}, "secret")
+
+    assert jwt.decode(token, "secret") == {"1": "a", "big": 2**70}
+    with pytest.raises(TypeError):
+        jwt.encode({"at": datetime.utcnow()}, "secret")